@@ -1,15 +1,39 @@
 # -*- coding: utf-8 -*-
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.datastructures import UploadFile
 from pydantic import BaseModel
 from .services.ocr_service import OCRService
-from .services.db_service import DatabaseService
-from .services.stats_service import StatsService
+from .services.db_service import InvalidCursorError
+from .services.storage import DB_BACKEND, create_db_services
+from .services.job_service import InvalidCallbackURLError, OCRJobService, QueueFullError
+from .services.stats_cache import StatsCache
+from .services import executor, receipt_export
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import json
 
-app = FastAPI(title="K마트 영수증 스캐너 API")
+# 업로드 이미지 최대 크기 (바이트)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+# /api/ocr/batch 한 번에 받을 최대 이미지 수
+MAX_BATCH_IMAGES = int(os.getenv("MAX_BATCH_IMAGES", "20"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 작업 DB(OCR_JOBS_DB)는 import가 아니라 앱 시작 시에 연다
+    global job_service
+    job_service = OCRJobService(ocr_service, db_service)
+    await job_service.start()
+    yield
+    await job_service.stop()
+    executor.shutdown()
+
+
+app = FastAPI(title="K마트 영수증 스캐너 API", lifespan=lifespan)
 
 # CORS 설정 (로컬 네트워크 허용)
 app.add_middleware(
@@ -22,8 +46,10 @@ app.add_middleware(
 
 # 서비스 초기화
 ocr_service = OCRService()
-db_service = DatabaseService()
-stats_service = StatsService(db_service.client)
+db_service, stats_service = create_db_services()
+job_service: OCRJobService | None = None   # lifespan에서 생성
+stats_cache = StatsCache()
+db_service.add_write_listener(stats_cache.invalidate)
 
 
 class ImageRequest(BaseModel):
@@ -76,7 +102,12 @@ async def health_check():
     return json_response({
         "status": "healthy",
         "gemini_configured": bool(api_key),
-        "database_connected": db_service.is_connected()
+        "database_backend": DB_BACKEND,
+        "database_connected": db_service.is_connected(),
+        "ocr_cache": ocr_service.cache.stats(),
+        "image_preprocess": ocr_service.preprocess_stats,
+        "ocr_jobs": job_service.stats(),
+        "stats_cache": stats_cache.stats()
     })
 
 
@@ -90,18 +121,186 @@ async def process_receipt(request: ImageRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _read_limited(chunks) -> bytes:
+    """업로드 스트림을 MAX_UPLOAD_BYTES 한도의 버퍼로 읽습니다."""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        if len(buffer) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="이미지 크기가 너무 큽니다.")
+    return bytes(buffer)
+
+
+async def _upload_chunks(upload: UploadFile):
+    while chunk := await upload.read(_UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+
+def _limit_body(request: Request, limit: int) -> Request:
+    """본문을 limit 바이트까지만 받는 Request를 돌려줍니다.
+    Content-Length가 없는 chunked 업로드도 Starlette가 multipart를 파싱(임시 파일 기록)하는
+    도중에 한도를 넘으면 413으로 중단됩니다.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise HTTPException(status_code=413, detail="이미지 크기가 너무 큽니다.")
+
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > limit:
+                raise HTTPException(status_code=413, detail="이미지 크기가 너무 큽니다.")
+        return message
+
+    return Request(request.scope, receive)
+
+
+async def _read_image_upload(request: Request) -> bytes:
+    """multipart/form-data(`image` 필드) 또는 image/* 본문에서 이미지 바이트를 읽습니다."""
+    request = _limit_body(request, MAX_UPLOAD_BYTES)
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form(max_files=1)
+        upload = form.get("image")
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(status_code=400, detail="image 파일 필드가 필요합니다.")
+        image_data = await _read_limited(_upload_chunks(upload))
+    elif content_type.startswith("image/"):
+        image_data = await _read_limited(request.stream())
+    else:
+        raise HTTPException(status_code=415, detail="multipart/form-data 또는 image/* 형식만 지원합니다.")
+
+    if not image_data:
+        raise HTTPException(status_code=400, detail="이미지가 비어 있습니다.")
+    return image_data
+
+
+@app.post("/api/ocr/upload")
+async def process_receipt_upload(request: Request):
+    """영수증 이미지를 multipart/form-data(`image` 필드) 또는 image/* 본문으로 받아 분석합니다.
+    base64 JSON(/api/ocr)보다 전송량이 약 25% 적고 서버에서 사본을 만들지 않습니다.
+    """
+    image_data = await _read_image_upload(request)
+    try:
+        result = await ocr_service.process_bytes(image_data)
+        return json_response(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/ocr/jobs", status_code=202)
+async def create_ocr_job(request: Request, auto_save: bool = False, callback_url: str = None):
+    """OCR 작업을 백그라운드 큐에 등록하고 즉시 job ID를 반환합니다.
+    - auto_save=true: 인식 성공 시 영수증을 바로 저장
+    - callback_url: 완료 시 작업 상태를 POST로 전달 (https, 공인 주소만. 아니면 400)
+    """
+    image_data = await _read_image_upload(request)
+    try:
+        job_id = await job_service.submit(image_data, auto_save, callback_url)
+    except InvalidCallbackURLError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return JSONResponse(
+        status_code=202,
+        content={"success": True, "job_id": job_id, "status": "queued"},
+        media_type="application/json; charset=utf-8",
+    )
+
+
+@app.get("/api/ocr/jobs/{job_id}")
+async def get_ocr_job(job_id: str):
+    """OCR 작업 상태와 결과를 조회합니다."""
+    job = await job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return json_response({"success": True, **job})
+
+
+@app.post("/api/ocr/stream")
+async def process_receipt_stream(request: Request):
+    """영수증 이미지를 분석하면서 상호명/카드명/상품을 인식되는 즉시 NDJSON으로 스트리밍합니다.
+    마지막 줄은 {"event": "result"} 로 /api/ocr/upload와 같은 전체 결과를 담습니다.
+    """
+    image_data = await _read_image_upload(request)
+
+    async def stream():
+        async for event in ocr_service.stream_bytes(image_data):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson; charset=utf-8")
+
+
+@app.post("/api/ocr/batch")
+async def process_receipt_batch(request: Request):
+    """여러 영수증 이미지(multipart `images` 필드 반복)를 동시에 분석하고,
+    끝나는 순서대로 결과를 NDJSON 한 줄씩 스트리밍합니다.
+    동시 Gemini 호출 수는 OCRService의 전역 제한(OCR_MAX_CONCURRENCY)을 따릅니다.
+    """
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("multipart/form-data"):
+        raise HTTPException(status_code=415, detail="multipart/form-data 형식만 지원합니다.")
+
+    # 이미지별 한도는 아래 _read_limited가, 전체 본문 한도는 파싱 중에 적용
+    request = _limit_body(request, MAX_UPLOAD_BYTES * MAX_BATCH_IMAGES)
+    form = await request.form(max_files=MAX_BATCH_IMAGES)
+    uploads = [f for f in form.getlist("images") if isinstance(f, UploadFile)]
+    if not uploads:
+        raise HTTPException(status_code=400, detail="images 파일 필드가 필요합니다.")
+
+    images = [(upload.filename, await _read_limited(_upload_chunks(upload))) for upload in uploads]
+
+    async def run(index: int, filename: str | None, image_data: bytes) -> dict:
+        try:
+            result = await ocr_service.process_bytes(image_data)
+        except Exception as e:
+            result = ocr_service._error_result(f"OCR 처리 오류: {str(e)}")
+        return {"index": index, "filename": filename, **result}
+
+    async def stream():
+        tasks = [asyncio.create_task(run(i, name, data)) for i, (name, data) in enumerate(images)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        finally:
+            # 클라이언트 연결이 끊기면 남은 OCR 호출 취소
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson; charset=utf-8")
+
+
+def _receipt_data(request: SaveReceiptRequest) -> dict:
+    return {
+        "items": [item.model_dump() for item in request.items],
+        "rawText": request.rawText,
+        "storeName": request.storeName,
+        "cardName": request.cardName,
+        "purchaseDateTime": request.purchaseDateTime
+    }
+
+
 @app.post("/api/receipts")
 async def save_receipt(request: SaveReceiptRequest):
     """인식된 영수증 결과를 데이터베이스에 저장합니다."""
     try:
-        data = {
-            "items": [item.model_dump() for item in request.items],
-            "rawText": request.rawText,
-            "storeName": request.storeName,
-            "cardName": request.cardName,
-            "purchaseDateTime": request.purchaseDateTime
-        }
-        result = await db_service.save_receipt(data)
+        result = await db_service.save_receipt(_receipt_data(request))
+        return json_response(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/receipts/bulk")
+async def save_receipts_bulk(requests: list[SaveReceiptRequest]):
+    """여러 영수증을 한 번의 트랜잭션으로 저장합니다."""
+    try:
+        result = await db_service.save_receipts([_receipt_data(request) for request in requests])
         return json_response(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -114,9 +313,11 @@ async def get_receipts(
     end_date: str = None,
     store_name: str = None,
     card_name: str = None,
-    search: str = None
+    search: str = None,
+    cursor: str = None
 ):
-    """저장된 영수증 목록을 조회합니다."""
+    """저장된 영수증 목록을 조회합니다. 응답의 next_cursor를 cursor로 넘기면 다음 페이지를 조회합니다.
+    잘못된 cursor는 400."""
     try:
         result = await db_service.get_receipts(
             limit=limit,
@@ -124,9 +325,12 @@ async def get_receipts(
             end_date=end_date,
             store_name=store_name,
             card_name=card_name,
-            search=search
+            search=search,
+            cursor=cursor
         )
         return json_response(result)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -151,66 +355,141 @@ async def delete_receipt(receipt_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/export")
+async def export_receipts(
+    format: str = "csv",
+    start_date: str = None,
+    end_date: str = None,
+    store_name: str = None,
+    card_name: str = None
+):
+    """영수증 + 상품 + 할인 전체 이력을 CSV / NDJSON / Parquet 파일로 스트리밍합니다.
+    keyset 페이지 단위로 읽어 바로 내보내므로 이력 크기와 관계없이 메모리 사용량이 일정합니다.
+    """
+    if format not in receipt_export.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 형식입니다: {format} (csv, ndjson, parquet)")
+    if format == "parquet" and not receipt_export.parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet 내보내기에는 pyarrow 설치가 필요합니다.")
+    if not db_service.is_connected():
+        raise HTTPException(status_code=503, detail="데이터베이스 연결이 설정되지 않았습니다.")
+
+    pages = db_service.export_receipts_iter(start_date, end_date, store_name, card_name)
+    writer = {
+        "csv":     receipt_export.to_csv,
+        "ndjson":  receipt_export.to_ndjson,
+        "parquet": receipt_export.to_parquet,
+    }[format]
+    media_type, extension = receipt_export.EXPORT_FORMATS[format]
+
+    return StreamingResponse(
+        writer(pages),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="receipts.{extension}"'},
+    )
+
+
 # ===== Statistics APIs =====
 
-@app.get("/api/stats/summary")
-async def get_stats_summary(start_date: str = None, end_date: str = None):
-    """기간별 요약 통계를 조회합니다."""
+async def _stats_response(request: Request, endpoint: str, compute, **params):
+    """통계 응답 캐시 + ETag 재검증.
+    캐시에 있으면 캐시 결과, 없으면 계산 후 저장합니다.
+    ETag는 응답 내용의 해시이며, If-None-Match가 같으면 본문 없이 304로 응답합니다.
+    다른 프로세스(임포터, 다른 워커)의 쓰기는 DB 변경 카운터로 감지합니다 (StatsCache.sync).
+    """
+    key = stats_cache.key(endpoint, **params)
+
     try:
-        result = await stats_service.get_summary(start_date, end_date)
-        return json_response(result)
+        await stats_cache.sync(db_service.data_generation)
+        generation = stats_cache.generation
+        result = stats_cache.get(key)
+        if result is None:
+            result = await compute()
+            if result.get("success"):
+                stats_cache.set(key, result, generation)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    response = json_response(result)
+    if not result.get("success"):
+        return response
+
+    etag = stats_cache.etag(result)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
+
+
+@app.get("/api/stats/summary")
+async def get_stats_summary(request: Request, start_date: str = None, end_date: str = None):
+    """기간별 요약 통계를 조회합니다."""
+    return await _stats_response(
+        request, "summary",
+        lambda: stats_service.get_summary(start_date, end_date),
+        start_date=start_date, end_date=end_date,
+    )
+
 
 @app.get("/api/stats/monthly")
-async def get_monthly_stats(start_date: str = None, end_date: str = None):
+async def get_monthly_stats(request: Request, start_date: str = None, end_date: str = None):
     """월별 지출 통계를 조회합니다."""
-    try:
-        result = await stats_service.get_monthly_stats(start_date, end_date)
-        return json_response(result)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _stats_response(
+        request, "monthly",
+        lambda: stats_service.get_monthly_stats(start_date, end_date),
+        start_date=start_date, end_date=end_date,
+    )
 
 
 @app.get("/api/stats/by-store")
-async def get_store_stats(start_date: str = None, end_date: str = None):
+async def get_store_stats(request: Request, start_date: str = None, end_date: str = None):
     """상점별 지출 통계를 조회합니다."""
-    try:
-        result = await stats_service.get_store_stats(start_date, end_date)
-        return json_response(result)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _stats_response(
+        request, "by-store",
+        lambda: stats_service.get_store_stats(start_date, end_date),
+        start_date=start_date, end_date=end_date,
+    )
 
 
 @app.get("/api/stats/by-card")
-async def get_card_stats(start_date: str = None, end_date: str = None):
+async def get_card_stats(request: Request, start_date: str = None, end_date: str = None):
     """카드별 지출 통계를 조회합니다."""
-    try:
-        result = await stats_service.get_card_stats(start_date, end_date)
-        return json_response(result)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _stats_response(
+        request, "by-card",
+        lambda: stats_service.get_card_stats(start_date, end_date),
+        start_date=start_date, end_date=end_date,
+    )
 
 
 @app.get("/api/stats/frequent-items")
-async def get_frequent_items(start_date: str = None, end_date: str = None, limit: int = 10):
+async def get_frequent_items(request: Request, start_date: str = None, end_date: str = None, limit: int = 10):
     """자주 구매하는 상품 통계를 조회합니다."""
-    try:
-        result = await stats_service.get_frequent_items(start_date, end_date, limit)
-        return json_response(result)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _stats_response(
+        request, "frequent-items",
+        lambda: stats_service.get_frequent_items(start_date, end_date, limit),
+        start_date=start_date, end_date=end_date, limit=limit,
+    )
+
+
+@app.get("/api/stats/dashboard")
+async def get_dashboard_stats(request: Request, start_date: str = None, end_date: str = None, limit: int = 10):
+    """대시보드 패널(요약/월별/상점별/카드별/자주 구매 상품)을 한 번의 요청으로 조회합니다."""
+    return await _stats_response(
+        request, "dashboard",
+        lambda: stats_service.get_dashboard(start_date, end_date, limit),
+        start_date=start_date, end_date=end_date, limit=limit,
+    )
 
 
 @app.get("/api/stats/store/{store_name}/cards")
-async def get_store_card_stats(store_name: str, start_date: str = None, end_date: str = None):
+async def get_store_card_stats(request: Request, store_name: str, start_date: str = None, end_date: str = None):
     """특정 상점의 카드별 지출 통계를 조회합니다."""
-    try:
-        result = await stats_service.get_store_card_stats(store_name, start_date, end_date)
-        return json_response(result)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _stats_response(
+        request, "store-cards",
+        lambda: stats_service.get_store_card_stats(store_name, start_date, end_date),
+        start_date=start_date, end_date=end_date, store_name=store_name,
+    )
 
 
 class DiscountRequest(BaseModel):
@@ -232,26 +511,96 @@ async def add_discount(receipt_id: int, request: DiscountRequest):
 # ===== Admin APIs =====
 
 @app.post("/api/admin/cleanup")
-async def cleanup_data():
+async def cleanup_data(
+    batch_size: int = 500,
+    no_after_receipt_id: int = 0,
+    card_after_id: int = 0,
+    stream: bool = False
+):
     """기존 DB 데이터 유효성 검사 및 정리.
     - items.no 없으면 레코드 순서대로 001부터 부여
     - receipts.card_name 없으면 raw_text 분석으로 결제수단 추론
+    배치 단위로 진행하며, 실패 시 응답의 no_after_receipt_id / card_after_id로 재개합니다.
+    stream=true면 배치마다 진행 상황을 NDJSON 한 줄씩 스트리밍합니다.
+    """
+    if stream:
+        if not db_service.is_connected():
+            raise HTTPException(status_code=503, detail="데이터베이스 연결이 설정되지 않았습니다.")
+
+        async def progress_stream():
+            try:
+                async for progress in db_service.cleanup_data_iter(batch_size, no_after_receipt_id, card_after_id):
+                    yield json.dumps(progress, ensure_ascii=False) + "\n"
+                yield json.dumps({"phase": "done"}) + "\n"
+            except Exception as e:
+                yield json.dumps({"phase": "error", "error": f"정리 오류: {str(e)}"}, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(progress_stream(), media_type="application/x-ndjson; charset=utf-8")
+
+    try:
+        result = await db_service.cleanup_data(batch_size, no_after_receipt_id, card_after_id)
+        return json_response(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/admin/rollups/rebuild")
+async def rebuild_rollups():
+    """통계 롤업 테이블을 원본 데이터 기준으로 다시 계산합니다.
+    (backend/scripts/stats_rollups.sql 참고)
     """
     try:
-        result = await db_service.cleanup_data()
+        result = await db_service.rebuild_rollups()
+        return json_response(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admin/rollups/verify")
+async def verify_rollups():
+    """통계 롤업 테이블과 원본 재집계 결과의 차이(drift)를 조회합니다."""
+    try:
+        result = await db_service.verify_rollups()
+        return json_response(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admin/duplicates")
+async def find_duplicates(limit: int = 100):
+    """중복 저장된 영수증(상호명 + 구매 시각 + 합계 + 상품 목록이 같은)을 묶음으로 조회합니다.
+    (backend/scripts/receipt_fingerprint.sql 참고)
+    """
+    try:
+        result = await db_service.find_duplicates(limit)
         return json_response(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/admin/migrate-discounts")
-async def migrate_discounts():
+async def migrate_discounts(dry_run: bool = False, batch_size: int = 5000, after_id: int = 0):
     """기존 items 테이블의 할인 항목을 discounts 테이블로 이전합니다.
-    실행 전 Supabase에서 discounts 테이블이 생성되어 있어야 합니다.
-    (backend/scripts/create_discounts_table.sql 참고)
+    실행 전 Supabase에서 discounts 테이블과 이전 함수가 생성되어 있어야 합니다.
+    (backend/scripts/create_discounts_table.sql, migrate_discounts_function.sql 참고)
+    - dry_run=true: 변경 없이 이전 대상 건수만 확인
+    - after_id: 실패 응답의 last_id를 넘기면 이어서 진행
+    """
+    try:
+        result = await db_service.migrate_discounts(dry_run, batch_size, after_id)
+        return json_response(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/admin/link-products")
+async def link_products(batch_size: int = 2000, after_id: int = 0):
+    """기존 items를 products 카탈로그(정규화된 상품명/바코드)에 연결합니다.
+    실행 전 Supabase에서 backend/scripts/products_catalog.sql을 실행해야 합니다.
+    - after_id: 실패 응답의 last_id를 넘기면 이어서 진행
     """
     try:
-        result = await db_service.migrate_discounts()
+        result = await db_service.link_products(batch_size, after_id)
         return json_response(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
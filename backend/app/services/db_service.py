@@ -1,16 +1,25 @@
 # -*- coding: utf-8 -*-
 from supabase import create_client, Client
+import base64
+import json
 import os
 import re
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from .executor import execute
+from .payment_detector import detect_payment_method
+from .product_normalizer import normalize_product_name, product_key
 
 load_dotenv()
 
-# 할인 항목 판별 키워드
+# 할인 항목 판별 키워드 (scripts/migrate_discounts_function.sql의 정규식과 동일하게 유지)
 _DISCOUNT_KEYWORDS = ["할인", "DC", "DISCOUNT", "쿠폰", "COUPON"]
 
 
+class InvalidCursorError(ValueError):
+    pass
+
+
 class DatabaseService:
     def __init__(self):
         url = os.getenv("SUPABASE_URL")
@@ -21,9 +30,20 @@ class DatabaseService:
         else:
             self.client = None
 
+        # 데이터 변경 시 호출할 콜백 (통계 캐시 무효화 등)
+        self._write_listeners: list = []
+
     def is_connected(self) -> bool:
         return self.client is not None
 
+    def add_write_listener(self, listener) -> None:
+        """저장/삭제/할인 추가/관리자 작업으로 데이터가 바뀌면 listener()를 호출합니다."""
+        self._write_listeners.append(listener)
+
+    def _notify_write(self) -> None:
+        for listener in self._write_listeners:
+            listener()
+
     # ── 날짜 변환 헬퍼 ───────────────────────────────────────────────────────
     def _to_purchase_date(self, dt_str: str) -> str | None:
         """YY-MM-DD HH:MM 형식을 ISO 8601 문자열로 변환 (purchase_date 컬럼 저장용)"""
@@ -73,7 +93,9 @@ class DatabaseService:
 
     # ── 할인 항목 판별 ────────────────────────────────────────────────────────
     def _is_discount_item(self, item: dict) -> bool:
-        """상품 항목이 할인 항목인지 판별합니다."""
+        """상품 항목이 할인 항목인지 판별합니다.
+        (receipt_fingerprint.sql / migrate_discounts_function.sql의 SQL 판별과 같은 기준)
+        """
         amount = item.get("amount", 0) or 0
         if amount < 0:
             return True
@@ -81,78 +103,159 @@ class DatabaseService:
         return any(kw in name for kw in _DISCOUNT_KEYWORDS)
 
     # ── 영수증 저장 ───────────────────────────────────────────────────────────
+    def _build_receipt_payload(self, data: dict) -> dict:
+        """OCR 결과를 save_receipt RPC 입력(JSONB)으로 변환합니다.
+        할인 항목은 items가 아닌 discounts로 분리합니다.
+        """
+        all_items = data.get("items", [])
+
+        regular_items  = [i for i in all_items if not self._is_discount_item(i)]
+        discount_items = [i for i in all_items if self._is_discount_item(i)]
+
+        total_amount = sum(i.get("amount", 0) for i in all_items)
+        purchase_dt  = data.get("purchaseDateTime")
+
+        items_data = []
+        for idx, item in enumerate(regular_items, start=1):
+            no = item.get("no")
+            if not no or not str(no).strip():
+                no = f"{idx:03d}"
+            name = item.get("name", "")
+            items_data.append({
+                "no":              no,
+                "name":            name,
+                "barcode":         item.get("barcode"),
+                "unit_price":      item.get("unitPrice", 0),
+                "quantity":        item.get("quantity", 0),
+                "amount":          item.get("amount", 0),
+                # products 카탈로그 연결용 (scripts/products_catalog.sql)
+                "product_key":     product_key(name, item.get("barcode")),
+                "normalized_name": normalize_product_name(name),
+            })
+
+        discounts_data = [
+            {
+                "name":   item.get("name", "할인"),
+                "amount": abs(item.get("amount", 0)),
+            }
+            for item in discount_items
+        ]
+
+        return {
+            "store_name":        data.get("storeName"),
+            "card_name":         data.get("cardName") or self._detect_payment_method(data.get("rawText", "")),
+            "purchase_datetime": purchase_dt,
+            "purchase_date":     self._to_purchase_date(purchase_dt),  # ★ TIMESTAMPTZ
+            "raw_text":          data.get("rawText", ""),
+            "total_amount":      total_amount,
+            "items":             items_data,
+            "discounts":         discounts_data,
+        }
+
     async def save_receipt(self, data: dict) -> dict:
         """영수증 인식 결과를 데이터베이스에 저장합니다.
         할인 항목은 discounts 테이블에 별도 저장합니다.
+        receipts/items/discounts를 save_receipt RPC 한 번으로 원자적으로 저장
+        (backend/scripts/save_receipt_function.sql 참고)
+        이미 저장된 영수증(fingerprint 일치)이면 새로 저장하지 않고 기존 receipt_id를 반환합니다.
+        (backend/scripts/receipt_fingerprint.sql 참고)
         """
         if not self.client:
             return {"success": False, "error": "데이터베이스 연결이 설정되지 않았습니다."}
 
         try:
-            all_items = data.get("items", [])
-
-            regular_items  = [i for i in all_items if not self._is_discount_item(i)]
-            discount_items = [i for i in all_items if self._is_discount_item(i)]
-
-            total_amount = sum(i.get("amount", 0) for i in all_items)
-            purchase_dt  = data.get("purchaseDateTime")
-
-            receipt_data = {
-                "store_name":        data.get("storeName"),
-                "card_name":         data.get("cardName"),
-                "purchase_datetime": purchase_dt,
-                "purchase_date":     self._to_purchase_date(purchase_dt),  # ★ TIMESTAMPTZ
-                "raw_text":          data.get("rawText", ""),
-                "total_amount":      total_amount,
-            }
-            receipt_result = self.client.table("receipts").insert(receipt_data).execute()
-            if not receipt_result.data:
+            payload = self._build_receipt_payload(data)
+            result = await execute(self.client.rpc("save_receipt", {"p_receipt": payload}))
+            if not result.data or not result.data.get("receipt_id"):
                 return {"success": False, "error": "영수증 저장 실패"}
 
-            receipt_id = receipt_result.data[0]["id"]
-
-            if regular_items:
-                items_data = []
-                for idx, item in enumerate(regular_items, start=1):
-                    no = item.get("no")
-                    if not no or not str(no).strip():
-                        no = f"{idx:03d}"
-                    items_data.append({
-                        "receipt_id": receipt_id,
-                        "no":         no,
-                        "name":       item.get("name", ""),
-                        "barcode":    item.get("barcode"),
-                        "unit_price": item.get("unitPrice", 0),
-                        "quantity":   item.get("quantity", 0),
-                        "amount":     item.get("amount", 0),
-                    })
-                self.client.table("items").insert(items_data).execute()
-
-            if discount_items:
-                discounts_data = [
-                    {
-                        "receipt_id": receipt_id,
-                        "name":       item.get("name", "할인"),
-                        "amount":     abs(item.get("amount", 0)),
-                    }
-                    for item in discount_items
-                ]
-                self.client.table("discounts").insert(discounts_data).execute()
+            if result.data.get("duplicate"):
+                return {
+                    "success":    True,
+                    "receipt_id": result.data["receipt_id"],
+                    "duplicate":  True,
+                    "message":    "이미 저장된 영수증입니다.",
+                }
 
+            self._notify_write()
             return {
                 "success":        True,
-                "receipt_id":     receipt_id,
-                "discount_count": len(discount_items),
+                "receipt_id":     result.data["receipt_id"],
+                "duplicate":      False,
+                "discount_count": len(payload["discounts"]),
                 "message":        "저장 완료",
             }
 
         except Exception as e:
             return {"success": False, "error": f"저장 오류: {str(e)}"}
 
+    async def save_receipts(self, data_list: list[dict]) -> dict:
+        """여러 영수증을 save_receipts_bulk RPC 한 번으로 저장합니다. 하나라도 실패하면 전체 롤백.
+        receipt_ids는 입력 순서대로이며, 중복 영수증은 기존 id를 가리킵니다.
+        """
+        if not self.client:
+            return {"success": False, "error": "데이터베이스 연결이 설정되지 않았습니다."}
+
+        try:
+            payloads = [self._build_receipt_payload(data) for data in data_list]
+            result = await execute(self.client.rpc("save_receipts_bulk", {"p_receipts": payloads}))
+            saved = result.data or []
+            receipt_ids = [row["receipt_id"] for row in saved]
+            duplicate_count = sum(1 for row in saved if row.get("duplicate"))
+            if duplicate_count < len(saved):
+                self._notify_write()
+
+            return {
+                "success":         True,
+                "receipt_ids":     receipt_ids,
+                "duplicate_count": duplicate_count,
+                "message":         f"{len(receipt_ids) - duplicate_count}건 저장 완료, 중복 {duplicate_count}건",
+            }
+
+        except Exception as e:
+            return {"success": False, "error": f"저장 오류: {str(e)}"}
+
     # ── 영수증 목록 조회 ─────────────────────────────────────────────────────
     # raw_text를 제외한 영수증 목록 컬럼
     _RECEIPT_LIST_COLS = "id, store_name, card_name, purchase_datetime, purchase_date, total_amount, created_at"
 
+    def _encode_cursor(self, sort_key, receipt_id: int) -> str:
+        """(정렬 키, id) 쌍을 불투명한 커서 문자열로 인코딩"""
+        raw = json.dumps([sort_key, receipt_id])
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    def _decode_cursor(self, cursor: str, sort_type: str = "date") -> tuple:
+        """커서를 (정렬 키, id)로 디코딩하고 검증합니다. 잘못된 커서면 InvalidCursorError.
+        sort_type="date": 정렬 키는 None 또는 ISO 8601 시각 (정규화한 문자열로 반환)
+        sort_type="rank": 정렬 키는 검색 유사도 숫자
+        """
+        try:
+            sort_key, receipt_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            if isinstance(receipt_id, bool) or not isinstance(receipt_id, int):
+                raise ValueError("id")
+            if sort_type == "rank":
+                if isinstance(sort_key, bool) or not isinstance(sort_key, (int, float)):
+                    raise ValueError("rank")
+                return float(sort_key), receipt_id
+            if sort_key is not None:
+                if not isinstance(sort_key, str):
+                    raise ValueError("purchase_date")
+                # 정규화: 필터 문자열에 들어가는 값은 isoformat() 출력 문자만 남음
+                sort_key = datetime.fromisoformat(sort_key).isoformat()
+            return sort_key, receipt_id
+        except (ValueError, TypeError, UnicodeError) as e:
+            raise InvalidCursorError("잘못된 커서입니다.") from e
+
+    def _apply_cursor(self, query, cursor: str):
+        """(purchase_date DESC, id DESC) 순서(NULL 먼저)에서 커서 이후 행만 조회하는 keyset 조건"""
+        purchase_date, receipt_id = self._decode_cursor(cursor)
+        if purchase_date is None:
+            return query.or_(f"and(purchase_date.is.null,id.lt.{receipt_id}),purchase_date.not.is.null")
+        return query.or_(
+            f'purchase_date.lt."{purchase_date}",'
+            f'and(purchase_date.eq."{purchase_date}",id.lt.{receipt_id})'
+        )
+
     async def get_receipts(
         self,
         limit: int = 20,
@@ -160,11 +263,14 @@ class DatabaseService:
         end_date: str = None,
         store_name: str = None,
         card_name: str = None,
-        search: str = None
+        search: str = None,
+        cursor: str = None
     ) -> dict:
         """저장된 영수증 목록을 조회합니다.
         - raw_text 제외: 목록에서 불필요한 대용량 컬럼 전송 방지
-        - 검색 시 items 먼저 조회: limit 적용 전 매칭 receipt_id 확보
+        - 검색 시 search_receipts RPC: 트라이그램 인덱스로 상품명 검색, 유사도 순 정렬
+        - keyset 페이지네이션: (purchase_date, id) 커서로 다음 페이지 조회 → N번째 페이지도 첫 페이지와 같은 비용
+        잘못된 커서는 InvalidCursorError (main.py에서 400)
         """
         if not self.client:
             return {"success": False, "error": "데이터베이스 연결이 설정되지 않았습니다."}
@@ -173,16 +279,9 @@ class DatabaseService:
             start = self._parse_filter_date(start_date)
             end   = self._parse_filter_date(end_date)
 
-            # 검색어가 있으면 items에서 먼저 matching receipt_id 확보
-            search_ids: set | None = None
+            # 검색어가 있으면 search_receipts RPC 한 번으로 검색/조인/정렬/페이지네이션
             if search:
-                items_result = self.client.table("items")\
-                    .select("receipt_id")\
-                    .ilike("name", f"%{search}%")\
-                    .execute()
-                search_ids = set(item["receipt_id"] for item in items_result.data)
-                if not search_ids:
-                    return {"success": True, "receipts": []}
+                return await self._search_receipts(search, start, end, store_name, card_name, limit, cursor)
 
             query = self.client.table("receipts").select(self._RECEIPT_LIST_COLS)
 
@@ -194,15 +293,55 @@ class DatabaseService:
                 query = query.gte("purchase_date", start.isoformat())
             if end:
                 query = query.lt("purchase_date", (end + timedelta(days=1)).isoformat())
-            if search_ids is not None:
-                query = query.in_("id", list(search_ids))
+            if cursor:
+                query = self._apply_cursor(query, cursor)
 
-            result = query.order("purchase_date", desc=True).limit(limit).execute()
-            return {"success": True, "receipts": result.data}
+            # limit + 1건을 조회해 다음 페이지 존재 여부 확인
+            query = query.order("purchase_date", desc=True).order("id", desc=True)
+            result = await execute(query.limit(limit + 1))
 
+            receipts = result.data[:limit]
+            next_cursor = None
+            if len(result.data) > limit:
+                next_cursor = self._encode_cursor(receipts[-1].get("purchase_date"), receipts[-1]["id"])
+            return {"success": True, "receipts": receipts, "next_cursor": next_cursor}
+
+        except InvalidCursorError:
+            raise
         except Exception as e:
             return {"success": False, "error": f"조회 오류: {str(e)}"}
 
+    async def _search_receipts(
+        self,
+        search: str,
+        start: datetime | None,
+        end: datetime | None,
+        store_name: str | None,
+        card_name: str | None,
+        limit: int,
+        cursor: str | None
+    ) -> dict:
+        """상품명으로 영수증을 검색합니다. (backend/scripts/item_search.sql 참고)
+        결과는 유사도(rank) 순이며 커서는 (rank, id) keyset입니다.
+        """
+        params = {
+            "p_query": search,
+            "p_start": start.isoformat() if start else None,
+            "p_end":   (end + timedelta(days=1)).isoformat() if end else None,
+            "p_store": store_name,
+            "p_card":  card_name,
+            "p_limit": limit + 1,
+        }
+        if cursor:
+            params["p_after_rank"], params["p_after_id"] = self._decode_cursor(cursor, sort_type="rank")
+
+        result = await execute(self.client.rpc("search_receipts", params))
+        receipts = result.data[:limit]
+        next_cursor = None
+        if len(result.data) > limit:
+            next_cursor = self._encode_cursor(receipts[-1]["rank"], receipts[-1]["id"])
+        return {"success": True, "receipts": receipts, "next_cursor": next_cursor}
+
     # ── 영수증 상세 조회 ─────────────────────────────────────────────────────
     async def get_receipt_detail(self, receipt_id: int) -> dict:
         """특정 영수증의 상세 정보를 조회합니다. (할인 항목 포함)
@@ -212,11 +351,11 @@ class DatabaseService:
             return {"success": False, "error": "데이터베이스 연결이 설정되지 않았습니다."}
 
         try:
-            result = self.client.table("receipts").select(
+            result = await execute(self.client.table("receipts").select(
                 "id, store_name, card_name, purchase_datetime, total_amount, created_at,"
                 "items(id, no, name, unit_price, quantity, amount),"
                 "discounts(id, name, amount, item_id)"
-            ).eq("id", receipt_id).execute()
+            ).eq("id", receipt_id))
 
             if not result.data:
                 return {"success": False, "error": "영수증을 찾을 수 없습니다."}
@@ -232,6 +371,54 @@ class DatabaseService:
         except Exception as e:
             return {"success": False, "error": f"조회 오류: {str(e)}"}
 
+    # ── 전체 내보내기 ────────────────────────────────────────────────────────
+    _EXPORT_COLS = (
+        "id, store_name, card_name, purchase_datetime, purchase_date, total_amount, created_at,"
+        "items(no, name, barcode, unit_price, quantity, amount),"
+        "discounts(name, amount)"
+    )
+
+    async def export_receipts_iter(
+        self,
+        start_date: str = None,
+        end_date: str = None,
+        store_name: str = None,
+        card_name: str = None,
+        batch_size: int = 200
+    ):
+        """영수증(상품/할인 포함)을 batch_size건씩 페이지 단위로 돌려주는 async generator.
+        get_receipts와 같은 (purchase_date DESC, id DESC) keyset 커서로 넘기므로
+        전체 이력 크기와 관계없이 한 페이지만 메모리에 올린다.
+        """
+        start = self._parse_filter_date(start_date)
+        end   = self._parse_filter_date(end_date)
+        cursor = None
+
+        while True:
+            query = self.client.table("receipts").select(self._EXPORT_COLS)
+            if store_name:
+                query = query.eq("store_name", store_name)
+            if card_name:
+                query = query.eq("card_name", card_name)
+            if start:
+                query = query.gte("purchase_date", start.isoformat())
+            if end:
+                query = query.lt("purchase_date", (end + timedelta(days=1)).isoformat())
+            if cursor:
+                query = self._apply_cursor(query, cursor)
+
+            query = query.order("purchase_date", desc=True).order("id", desc=True)
+            result = await execute(query.limit(batch_size))
+            receipts = result.data or []
+            if not receipts:
+                return
+
+            yield receipts
+
+            if len(receipts) < batch_size:
+                return
+            cursor = self._encode_cursor(receipts[-1].get("purchase_date"), receipts[-1]["id"])
+
     # ── 영수증 삭제 ───────────────────────────────────────────────────────────
     async def delete_receipt(self, receipt_id: int) -> dict:
         """영수증을 삭제합니다."""
@@ -239,7 +426,8 @@ class DatabaseService:
             return {"success": False, "error": "데이터베이스 연결이 설정되지 않았습니다."}
 
         try:
-            self.client.table("receipts").delete().eq("id", receipt_id).execute()
+            await execute(self.client.table("receipts").delete().eq("id", receipt_id))
+            self._notify_write()
             return {"success": True, "message": "삭제 완료"}
 
         except Exception as e:
@@ -258,94 +446,129 @@ class DatabaseService:
             }
             if item_id is not None:
                 row["item_id"] = item_id
-            result = self.client.table("discounts").insert(row).execute()
+            result = await execute(self.client.table("discounts").insert(row))
+            self._notify_write()
             return {"success": True, "discount": result.data[0]}
         except Exception as e:
             return {"success": False, "error": f"저장 오류: {str(e)}"}
 
     # ── 결제수단 감지 ────────────────────────────────────────────────────────
     def _detect_payment_method(self, raw_text: str) -> str | None:
-        """raw_text에서 결제수단을 감지합니다."""
-        if not raw_text:
-            return None
+        """raw_text에서 결제수단을 감지합니다. (payment_detector 키워드 표 참고)"""
+        return detect_payment_method(raw_text)
 
-        text_lower = raw_text.lower()
-
-        if "배민1" in raw_text or "배민 1" in raw_text or "baemin1" in text_lower or "baemin 1" in text_lower:
-            return "배민1(one)"
-        if "배달의민족" in raw_text or "배민" in raw_text or "baemin" in text_lower:
-            return "배달의민족"
-        if "요기요" in raw_text or "yogiyo" in text_lower:
-            return "요기요"
-        if "쿠팡이츠" in raw_text or "쿠팡 이츠" in raw_text or "coupang eats" in text_lower:
-            return "쿠팡이츠"
-        if "땡겨요" in raw_text:
-            return "땡겨요"
-        if "카카오페이" in raw_text or "kakaopay" in text_lower or "kakao pay" in text_lower:
-            return "카카오페이"
-        if "네이버페이" in raw_text or "naverpay" in text_lower or "naver pay" in text_lower:
-            return "네이버페이"
-        if "삼성페이" in raw_text or "samsung pay" in text_lower:
-            return "삼성페이"
-        if "애플페이" in raw_text or "apple pay" in text_lower:
-            return "애플페이"
-        if "토스페이" in raw_text or "toss pay" in text_lower:
-            return "토스페이"
-        if "토스" in raw_text or "toss" in text_lower:
-            return "토스"
-        if "현금" in raw_text:
-            return "현금"
+    # ── Admin: 데이터 정리 ───────────────────────────────────────────────────
+    async def cleanup_data_iter(
+        self,
+        batch_size: int = 500,
+        no_after_receipt_id: int = 0,
+        card_after_id: int = 0
+    ):
+        """데이터 정리를 배치 단위로 진행하며 배치마다 진행 상황을 yield 합니다.
+        - items.no: cleanup_item_numbers RPC로 영수증 batch_size개씩 일괄 번호 부여
+          (backend/scripts/cleanup_function.sql 참고)
+        - receipts.card_name: 빈 영수증을 id 순으로 batch_size건씩 조회해 결제수단 추론,
+          같은 결제수단끼리 묶어 UPDATE ... WHERE id IN (...) 한 번으로 반영
+        각 진행 상황의 no_after_receipt_id / card_after_id를 다시 넘기면 그 지점부터 재개합니다.
+        """
+        fixed = 0
+
+        while True:
+            result = await execute(self.client.rpc("cleanup_item_numbers", {
+                "p_after_receipt_id": no_after_receipt_id,
+                "p_limit":            batch_size,
+            }))
+            row = result.data[0] if result.data else {}
+            if not row.get("receipts_scanned"):
+                break
+
+            no_after_receipt_id = row["last_receipt_id"]
+            fixed += row["items_fixed"]
+            yield {
+                "phase":               "no",
+                "scanned":             row["receipts_scanned"],
+                "fixed":               row["items_fixed"],
+                "no_after_receipt_id": no_after_receipt_id,
+                "card_after_id":       card_after_id,
+            }
+            if row["receipts_scanned"] < batch_size:
+                break
+
+        while True:
+            # card_name 수정: NULL/빈값인 행만, raw_text 포함 필요 컬럼만 선택
+            receipts_result = await execute(
+                self.client.table("receipts")
+                .select("id, store_name, card_name, raw_text")
+                .or_("card_name.is.null,card_name.eq.")
+                .gt("id", card_after_id)
+                .order("id")
+                .limit(batch_size)
+            )
+            receipts = receipts_result.data
+            if not receipts:
+                break
+
+            by_method: dict[str, list[int]] = {}
+            for receipt in receipts:
+                detected = self._detect_payment_method(receipt.get("raw_text", ""))
+                if detected:
+                    by_method.setdefault(detected, []).append(receipt["id"])
+
+            for method, ids in by_method.items():
+                await execute(
+                    self.client.table("receipts")
+                    .update({"card_name": method}).in_("id", ids)
+                )
 
-        return None
+            card_after_id = receipts[-1]["id"]
+            batch_fixed = sum(len(ids) for ids in by_method.values())
+            fixed += batch_fixed
+            yield {
+                "phase":               "card",
+                "scanned":             len(receipts),
+                "fixed":               batch_fixed,
+                "methods":             {method: len(ids) for method, ids in by_method.items()},
+                "no_after_receipt_id": no_after_receipt_id,
+                "card_after_id":       card_after_id,
+            }
+            if len(receipts) < batch_size:
+                break
 
-    # ── Admin: 데이터 정리 ───────────────────────────────────────────────────
-    async def cleanup_data(self) -> dict:
-        """기존 데이터 유효성 검사 및 정리."""
+        if fixed:
+            self._notify_write()
+
+    async def cleanup_data(
+        self,
+        batch_size: int = 500,
+        no_after_receipt_id: int = 0,
+        card_after_id: int = 0
+    ) -> dict:
+        """기존 데이터 유효성 검사 및 정리. (cleanup_data_iter의 진행 상황을 모아 요약)"""
         if not self.client:
             return {"success": False, "error": "데이터베이스 연결이 설정되지 않았습니다."}
 
         no_fixed = 0
         card_fixed = 0
         details = []
+        resume = {"no_after_receipt_id": no_after_receipt_id, "card_after_id": card_after_id}
 
         try:
-            # no 수정: 필요한 컬럼만 조회, receipt_id+id 순 정렬로 번호 부여 순서 보장
-            all_items_result = self.client.table("items")\
-                .select("id, no, receipt_id").order("receipt_id").order("id").execute()
-
-            receipt_items: dict[int, list] = {}
-            for item in all_items_result.data:
-                rid = item["receipt_id"]
-                receipt_items.setdefault(rid, []).append(item)
-
-            for rid, items in receipt_items.items():
-                for idx, item in enumerate(items, start=1):
-                    no = item.get("no")
-                    if not no or not str(no).strip():
-                        new_no = f"{idx:03d}"
-                        self.client.table("items")\
-                            .update({"no": new_no}).eq("id", item["id"]).execute()
-                        no_fixed += 1
-                        details.append(f"[no] item id={item['id']} receipt_id={rid} → {new_no}")
-
-            # card_name 수정: NULL/빈값인 행만 조회, raw_text 포함 필요 컬럼만 선택
-            receipts_result = self.client.table("receipts")\
-                .select("id, store_name, card_name, raw_text")\
-                .or_("card_name.is.null,card_name.eq.")\
-                .execute()
-
-            for receipt in receipts_result.data:
-                card_name = receipt.get("card_name")
-                if not card_name or not str(card_name).strip():
-                    detected = self._detect_payment_method(receipt.get("raw_text", ""))
-                    if detected:
-                        self.client.table("receipts")\
-                            .update({"card_name": detected}).eq("id", receipt["id"]).execute()
-                        card_fixed += 1
-                        details.append(
-                            f"[card] receipt id={receipt['id']} "
-                            f"({receipt.get('store_name', '?')}) → {detected}"
-                        )
+            async for progress in self.cleanup_data_iter(batch_size, no_after_receipt_id, card_after_id):
+                resume = {k: progress[k] for k in ("no_after_receipt_id", "card_after_id")}
+                if progress["phase"] == "no":
+                    no_fixed += progress["fixed"]
+                    details.append(
+                        f"[no] receipt id ≤ {progress['no_after_receipt_id']}: "
+                        f"영수증 {progress['scanned']}건 검사, {progress['fixed']}건 수정"
+                    )
+                else:
+                    card_fixed += progress["fixed"]
+                    methods = ", ".join(f"{m} {n}건" for m, n in progress["methods"].items())
+                    details.append(
+                        f"[card] receipt id ≤ {progress['card_after_id']}: "
+                        f"{progress['scanned']}건 검사, {progress['fixed']}건 수정"
+                        + (f" ({methods})" if methods else "")
+                    )
 
             return {
                 "success":         True,
@@ -356,57 +579,201 @@ class DatabaseService:
             }
 
         except Exception as e:
-            return {"success": False, "error": f"정리 오류: {str(e)}"}
+            return {"success": False, "error": f"정리 오류: {str(e)}", **resume}
+
+    # ── Admin: 통계 롤업 재구축/검증 ─────────────────────────────────────────
+    async def rebuild_rollups(self) -> dict:
+        """통계 롤업 테이블을 원본 테이블 기준으로 다시 계산합니다.
+        (backend/scripts/stats_rollups.sql 참고)
+        """
+        if not self.client:
+            return {"success": False, "error": "데이터베이스 연결이 설정되지 않았습니다."}
+
+        try:
+            result = await execute(self.client.rpc("rebuild_stats_rollups", {}))
+            row = result.data[0] if result.data else {}
+            self._notify_write()
+            return {
+                "success":      True,
+                "receipt_rows": row.get("receipt_rows", 0),
+                "item_rows":    row.get("item_rows", 0),
+                "message":      "롤업 재구축 완료",
+            }
+        except Exception as e:
+            return {"success": False, "error": f"롤업 재구축 오류: {str(e)}"}
+
+    async def data_generation(self) -> int | None:
+        """원본 테이블이 바뀔 때마다 증가하는 DB 쪽 변경 카운터 (통계 캐시의 프로세스 간 무효화용).
+        조회할 수 없으면 None (backend/scripts/stats_rollups.sql 6. 참고)
+        """
+        if not self.client:
+            return None
+
+        try:
+            result = await execute(self.client.rpc("stats_data_generation", {}))
+            return result.data
+        except Exception:
+            return None
+
+    async def verify_rollups(self) -> dict:
+        """롤업 테이블과 원본 재집계 결과가 다른 행(drift)을 조회합니다."""
+        if not self.client:
+            return {"success": False, "error": "데이터베이스 연결이 설정되지 않았습니다."}
+
+        try:
+            result = await execute(self.client.rpc("verify_stats_rollups", {}))
+            return {
+                "success":     True,
+                "consistent":  not result.data,
+                "drift_count": len(result.data),
+                "drift":       result.data,
+            }
+        except Exception as e:
+            return {"success": False, "error": f"롤업 검증 오류: {str(e)}"}
+
+    async def find_duplicates(self, limit: int = 100) -> dict:
+        """fingerprint가 같은 기존 영수증 묶음을 조회합니다. (receipt_ids 첫 번째가 원본)
+        (backend/scripts/receipt_fingerprint.sql 참고)
+        """
+        if not self.client:
+            return {"success": False, "error": "데이터베이스 연결이 설정되지 않았습니다."}
+
+        try:
+            result = await execute(self.client.rpc("find_duplicate_receipts", {"p_limit": limit}))
+            groups = result.data or []
+            return {
+                "success":         True,
+                "group_count":     len(groups),
+                "duplicate_count": sum(group["duplicate_count"] for group in groups),
+                "groups":          groups,
+            }
+        except Exception as e:
+            return {"success": False, "error": f"중복 조회 오류: {str(e)}"}
 
     # ── Admin: 할인 항목 마이그레이션 ────────────────────────────────────────
-    async def migrate_discounts(self) -> dict:
-        """기존 items 테이블에서 할인 항목을 찾아 discounts 테이블로 이전합니다."""
+    async def migrate_discounts(self, dry_run: bool = False, batch_size: int = 5000, after_id: int = 0) -> dict:
+        """기존 items 테이블에서 할인 항목을 찾아 discounts 테이블로 이전합니다.
+        items를 id 순으로 batch_size건씩 migrate_discount_items RPC로 처리합니다.
+        (backend/scripts/migrate_discounts_function.sql 참고)
+        - dry_run: 실제 변경 없이 이전 대상 건수만 집계
+        - after_id: 중단된 작업을 이어서 진행할 때 마지막으로 처리한 item id
+        """
+        if not self.client:
+            return {"success": False, "error": "데이터베이스 연결이 설정되지 않았습니다."}
+
+        scanned    = 0
+        migrated   = 0
+        duplicates = 0
+        progress   = []
+
+        try:
+            while True:
+                result = await execute(self.client.rpc("migrate_discount_items", {
+                    "p_after_id": after_id,
+                    "p_limit":    batch_size,
+                    "p_dry_run":  dry_run,
+                }))
+                row = result.data[0] if result.data else {}
+                if not row.get("scanned"):
+                    break
+
+                scanned    += row["scanned"]
+                migrated   += row["migrated"]
+                duplicates += row["duplicates"]
+                after_id    = row["last_id"]
+                progress.append(
+                    f"[batch] item id ≤ {after_id}: 검사 {row['scanned']}건, "
+                    f"이전 {row['migrated']}건, 중복 {row['duplicates']}건"
+                )
+
+                if row["scanned"] < batch_size:
+                    break
+
+            if migrated and not dry_run:
+                self._notify_write()
+
+            action = "이전 예정" if dry_run else "이전"
+            return {
+                "success":    True,
+                "dry_run":    dry_run,
+                "scanned":    scanned,
+                "migrated":   migrated,
+                "duplicates": duplicates,
+                "skipped":    scanned - migrated - duplicates,
+                "last_id":    after_id,
+                "progress":   progress,
+                "message":    f"마이그레이션 완료 — 할인 항목 {migrated}건 {action}, "
+                              f"중복 {duplicates}건, 일반 상품 {scanned - migrated - duplicates}건 유지",
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "last_id": after_id,
+                "error":   f"마이그레이션 오류: {str(e)}",
+            }
+
+    # ── Admin: 상품 카탈로그 연결 ────────────────────────────────────────────
+    async def link_products(self, batch_size: int = 2000, after_id: int = 0) -> dict:
+        """product_id가 없는 기존 items를 products 카탈로그에 연결합니다.
+        items를 id 순으로 batch_size건씩 읽어 상품명을 정규화한 뒤 link_item_products RPC로 연결합니다.
+        (backend/scripts/products_catalog.sql 참고)
+        - after_id: 중단된 작업을 이어서 진행할 때 마지막으로 처리한 item id
+        """
         if not self.client:
             return {"success": False, "error": "데이터베이스 연결이 설정되지 않았습니다."}
 
-        migrated = 0
-        skipped  = 0
-        details  = []
+        scanned = 0
+        linked  = 0
 
         try:
-            all_items = self.client.table("items").select("*").order("id").execute().data
-
-            for item in all_items:
-                if not self._is_discount_item(item):
-                    skipped += 1
-                    continue
-
-                exists = self.client.table("discounts")\
-                    .select("id")\
-                    .eq("receipt_id", item["receipt_id"])\
-                    .eq("name", item.get("name", ""))\
-                    .execute()
-
-                if exists.data:
-                    details.append(f"[skip] item id={item['id']} 이미 존재")
-                    continue
-
-                self.client.table("discounts").insert({
-                    "receipt_id": item["receipt_id"],
-                    "name":       item.get("name", "할인"),
-                    "amount":     abs(item.get("amount", 0)),
-                }).execute()
-
-                self.client.table("items").delete().eq("id", item["id"]).execute()
-
-                migrated += 1
-                details.append(
-                    f"[이전] item id={item['id']} receipt_id={item['receipt_id']} "
-                    f"'{item.get('name')}' ₩{abs(item.get('amount', 0)):,}"
+            while True:
+                result = await execute(
+                    self.client.table("items")
+                    .select("id, name, barcode")
+                    .is_("product_id", "null")
+                    .gt("id", after_id)
+                    .order("id")
+                    .limit(batch_size)
                 )
+                rows = result.data or []
+                if not rows:
+                    break
+
+                payload = [
+                    {
+                        "id":              row["id"],
+                        "name":            row.get("name") or "",
+                        "barcode":         row.get("barcode"),
+                        "product_key":     product_key(row.get("name"), row.get("barcode")),
+                        "normalized_name": normalize_product_name(row.get("name")),
+                    }
+                    for row in rows
+                ]
+                payload = [row for row in payload if row["product_key"]]
+                if payload:
+                    count = await execute(self.client.rpc("link_item_products", {"p_items": payload}))
+                    linked += count.data or 0
+
+                scanned += len(rows)
+                after_id = rows[-1]["id"]
+                if len(rows) < batch_size:
+                    break
+
+            if linked:
+                self._notify_write()
 
             return {
-                "success":  True,
-                "migrated": migrated,
-                "skipped":  skipped,
-                "details":  details,
-                "message":  f"마이그레이션 완료 — 할인 항목 {migrated}건 이전, 일반 상품 {skipped}건 유지",
+                "success": True,
+                "scanned": scanned,
+                "linked":  linked,
+                "last_id": after_id,
+                "message": f"상품 연결 완료 — {scanned}건 중 {linked}건 연결",
             }
 
         except Exception as e:
-            return {"success": False, "error": f"마이그레이션 오류: {str(e)}"}
+            return {
+                "success": False,
+                "last_id": after_id,
+                "error":   f"상품 연결 오류: {str(e)}",
+            }
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""블로킹 I/O를 이벤트 루프 밖에서 실행하기 위한 공용 스레드 풀.
+
+supabase-py의 `.execute()`는 동기 HTTP 호출이므로 async 핸들러 안에서
+그대로 호출하면 PostgREST 왕복 동안 uvicorn 이벤트 루프 전체가 멈춘다.
+DB 호출은 전용 풀(DB_POOL_SIZE)에서 실행해 동시 요청끼리 I/O가 겹치도록 한다.
+이미지 전처리 같은 CPU 작업은 별도 풀(IMAGE_POOL_SIZE)을 써서 DB 호출과 경쟁하지 않게 한다.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+IMAGE_POOL_SIZE = int(os.getenv("IMAGE_POOL_SIZE", "2"))
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+_cpu_executor = ThreadPoolExecutor(max_workers=IMAGE_POOL_SIZE, thread_name_prefix="cpu")
+
+
+async def run_db(fn, *args, **kwargs):
+    """동기 DB 호출 fn(*args, **kwargs)을 DB 전용 스레드 풀에서 실행합니다."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, partial(fn, *args, **kwargs))
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """CPU 작업 fn(*args, **kwargs)을 전처리 전용 스레드 풀에서 실행합니다."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_cpu_executor, partial(fn, *args, **kwargs))
+
+
+async def execute(query):
+    """PostgREST 쿼리 빌더의 `.execute()`를 이벤트 루프 밖에서 실행합니다."""
+    return await run_db(query.execute)
+
+
+def shutdown():
+    """앱 종료 시 풀을 정리합니다."""
+    _db_executor.shutdown(wait=False, cancel_futures=True)
+    _cpu_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Gemini 전송 전 영수증 이미지 전처리.
+
+휴대폰 원본 사진(수 MB)을 그대로 보내면 업로드·추론 지연과 토큰 비용이 커진다.
+EXIF 회전 보정 → 여백 자르기 → 긴 변 축소 → 흑백 변환 → JPEG/WebP 재인코딩.
+"""
+import io
+import os
+from PIL import Image, ImageChops, ImageOps
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OCR_IMAGE_MAX_EDGE = int(os.getenv("OCR_IMAGE_MAX_EDGE", "2048"))
+OCR_IMAGE_FORMAT = os.getenv("OCR_IMAGE_FORMAT", "JPEG").upper()  # JPEG | WEBP
+OCR_IMAGE_QUALITY = int(os.getenv("OCR_IMAGE_QUALITY", "85"))
+OCR_IMAGE_GRAYSCALE = os.getenv("OCR_IMAGE_GRAYSCALE", "true").lower() == "true"
+
+# 여백 판정 임계값: 모서리 색과 이 값 이상 차이 나는 픽셀부터 내용으로 본다
+_CROP_THRESHOLD = 24
+_CROP_MARGIN = 16
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+def settings_key() -> str:
+    """캐시 버전에 포함할 전처리 설정 문자열"""
+    return f"{OCR_IMAGE_MAX_EDGE}/{OCR_IMAGE_FORMAT}/{OCR_IMAGE_QUALITY}/{OCR_IMAGE_GRAYSCALE}"
+
+
+def _crop_border(img: Image.Image) -> Image.Image:
+    """모서리 색과 비슷한 균일한 배경 여백을 잘라냅니다."""
+    gray = img.convert("L")
+    background = Image.new("L", gray.size, gray.getpixel((0, 0)))
+    diff = ImageChops.difference(gray, background).point(lambda p: 255 if p > _CROP_THRESHOLD else 0)
+    bbox = diff.getbbox()
+    if not bbox:
+        return img
+    left, top, right, bottom = bbox
+    bbox = (
+        max(left - _CROP_MARGIN, 0),
+        max(top - _CROP_MARGIN, 0),
+        min(right + _CROP_MARGIN, img.width),
+        min(bottom + _CROP_MARGIN, img.height),
+    )
+    return img.crop(bbox)
+
+
+def preprocess_image(image_data: bytes) -> tuple[bytes, str, dict]:
+    """이미지를 전처리하여 (바이트, MIME 타입, 통계)를 반환합니다.
+    CPU 작업이므로 이벤트 루프가 아닌 스레드 풀에서 호출해야 합니다.
+    """
+    with Image.open(io.BytesIO(image_data)) as src:
+        img = ImageOps.exif_transpose(src)
+        img = _crop_border(img)
+
+        if max(img.size) > OCR_IMAGE_MAX_EDGE:
+            img.thumbnail((OCR_IMAGE_MAX_EDGE, OCR_IMAGE_MAX_EDGE), Image.Resampling.LANCZOS)
+
+        img = img.convert("L") if OCR_IMAGE_GRAYSCALE else img.convert("RGB")
+
+        out = io.BytesIO()
+        img.save(out, format=OCR_IMAGE_FORMAT, quality=OCR_IMAGE_QUALITY, optimize=True)
+
+    processed = out.getvalue()
+    return processed, _MIME_TYPES.get(OCR_IMAGE_FORMAT, "image/jpeg"), {
+        "bytes_before": len(image_data),
+        "bytes_after":  len(processed),
+        "size":         list(img.size),
+    }
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""백그라운드 OCR 작업 큐.
+
+긴 /api/ocr 요청은 Render 프록시 타임아웃이나 모바일 연결 끊김으로 Gemini 호출이 낭비된다.
+작업을 SQLite에 기록하고 즉시 job ID를 돌려준 뒤, 워커 풀이 OCR(+선택적 저장)을 수행한다.
+클라이언트는 GET으로 상태를 폴링하거나 callback_url로 완료 알림(webhook)을 받는다.
+작업 DB는 Supabase 호출과 겹치지 않도록 전용 스레드 하나에서만 다루고(WAL, synchronous=NORMAL),
+이미지는 커밋에 싣지 않고 DB 옆 디렉터리(<OCR_JOBS_DB 이름>_images)의 파일로 둔다.
+끝난 작업은 OCR_JOB_RETENTION_SECONDS가 지나면 결과와 함께 삭제한다.
+callback_url은 서버가 직접 요청을 보내므로 https만 허용하고, 내부 주소(사설/루프백/링크 로컬 등)로
+해석되는 호스트는 거부한다. OCR_CALLBACK_ALLOWED_HOSTS를 설정하면 그 호스트만 허용한다.
+서버가 재시작되면 queued/running 상태의 작업을 다시 큐에 넣는다.
+"""
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OCR_JOBS_DB = os.getenv("OCR_JOBS_DB", "ocr_jobs.db")
+OCR_JOB_WORKERS = int(os.getenv("OCR_JOB_WORKERS", "2"))
+OCR_JOB_QUEUE_SIZE = int(os.getenv("OCR_JOB_QUEUE_SIZE", "100"))
+# 끝난(done/failed) 작업 보관 기간(초)
+OCR_JOB_RETENTION_SECONDS = int(os.getenv("OCR_JOB_RETENTION_SECONDS", "86400"))
+# callback_url 허용 호스트 (쉼표 구분). 비어 있으면 공인 주소로 해석되는 https 호스트 모두 허용
+OCR_CALLBACK_ALLOWED_HOSTS = {
+    host.strip().lower() for host in os.getenv("OCR_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()
+}
+
+_WEBHOOK_TIMEOUT = 10
+_PURGE_INTERVAL = 3600
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class InvalidCallbackURLError(ValueError):
+    pass
+
+
+async def validate_callback_url(callback_url: str) -> None:
+    """callback_url이 허용되는 https 주소인지 확인합니다. 아니면 InvalidCallbackURLError."""
+    try:
+        url = httpx.URL(callback_url)
+    except Exception as e:
+        raise InvalidCallbackURLError(f"잘못된 callback_url입니다: {str(e)}")
+    if url.scheme != "https" or not url.host:
+        raise InvalidCallbackURLError("callback_url은 https URL이어야 합니다.")
+
+    host = url.host.lower()
+    if OCR_CALLBACK_ALLOWED_HOSTS:
+        if host not in OCR_CALLBACK_ALLOWED_HOSTS:
+            raise InvalidCallbackURLError("허용되지 않은 callback_url 호스트입니다.")
+        return
+
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, url.port or 443, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        raise InvalidCallbackURLError("callback_url 호스트를 찾을 수 없습니다.")
+    for *_, sockaddr in infos:
+        address = ipaddress.ip_address(sockaddr[0].split("%", 1)[0])
+        if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise InvalidCallbackURLError("내부 주소로 향하는 callback_url은 허용되지 않습니다.")
+
+
+class OCRJobService:
+    def __init__(self, ocr_service, db_service, db_path: str = OCR_JOBS_DB):
+        self.ocr_service = ocr_service
+        self.db_service = db_service
+        self._image_dir = Path(os.path.splitext(db_path)[0] + "_images")
+        self._image_dir.mkdir(parents=True, exist_ok=True)
+        # 작업 DB 전용 스레드 하나 (연결을 한 스레드만 쓰므로 잠금 불필요)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr-jobs")
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"            # queued | running | done | failed
+            " auto_save INTEGER NOT NULL DEFAULT 0,"
+            " callback_url TEXT,"
+            " result TEXT,"
+            " receipt_id INTEGER,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_ocr_jobs_status_updated ON ocr_jobs (status, updated_at)")
+        self._db.commit()
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+
+    # ── SQLite/파일 헬퍼 (작업 전용 스레드에서 실행) ──────────────────────────
+    async def _call(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args))
+
+    def _write(self, sql: str, params: tuple) -> None:
+        self._db.execute(sql, params)
+        self._db.commit()
+
+    def _read(self, sql: str, params: tuple) -> list[tuple]:
+        return self._db.execute(sql, params).fetchall()
+
+    def _image_path(self, job_id: str) -> Path:
+        return self._image_dir / job_id
+
+    def _insert(self, job_id: str, image_data: bytes, auto_save: bool, callback_url: str | None) -> None:
+        """이미지 파일을 먼저 쓰고 작업 행을 넣음 (행이 있으면 이미지도 있음)"""
+        path = self._image_path(job_id)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(image_data)
+        tmp.replace(path)
+        now = time.time()
+        self._write(
+            "INSERT INTO ocr_jobs (id, status, auto_save, callback_url, created_at, updated_at)"
+            " VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, int(auto_save), callback_url, now, now),
+        )
+
+    def _finish(self, job_id: str, status: str, result: str | None, receipt_id: int | None,
+                error: str | None) -> None:
+        self._write(
+            "UPDATE ocr_jobs SET status = ?, result = ?, receipt_id = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, result, receipt_id, error, time.time(), job_id),
+        )
+        self._image_path(job_id).unlink(missing_ok=True)
+
+    def _purge(self, retention: float) -> int:
+        """보관 기간이 지난 끝난 작업과, 행이 없는 이미지 파일을 지움"""
+        cursor = self._db.execute(
+            "DELETE FROM ocr_jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+            (time.time() - retention,),
+        )
+        self._db.commit()
+        active = {job_id for (job_id,) in self._db.execute(
+            "SELECT id FROM ocr_jobs WHERE status IN ('queued', 'running')"
+        )}
+        for path in self._image_dir.iterdir():
+            if path.name not in active and path.stem not in active:
+                path.unlink(missing_ok=True)
+        return cursor.rowcount
+
+    # ── 수명 주기 ────────────────────────────────────────────────────────────
+    async def start(self) -> None:
+        await self._call(self._purge, OCR_JOB_RETENTION_SECONDS)
+        # 재시작 전 끝나지 않은 작업 복구
+        rows = await self._call(
+            self._read,
+            "SELECT id FROM ocr_jobs WHERE status IN ('queued', 'running') ORDER BY created_at",
+            (),
+        )
+        for (job_id,) in rows:
+            self._queue.put_nowait(job_id)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(OCR_JOB_WORKERS)]
+        self._workers.append(asyncio.create_task(self._purge_loop()))
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self._call(self._db.close)
+        self._executor.shutdown(wait=False)
+
+    async def _purge_loop(self) -> None:
+        while True:
+            await asyncio.sleep(min(_PURGE_INTERVAL, max(OCR_JOB_RETENTION_SECONDS, 1)))
+            try:
+                await self._call(self._purge, OCR_JOB_RETENTION_SECONDS)
+            except sqlite3.Error:
+                pass
+
+    # ── 작업 등록/조회 ───────────────────────────────────────────────────────
+    async def submit(self, image_data: bytes, auto_save: bool = False, callback_url: str | None = None) -> str:
+        """작업을 등록하고 job ID를 반환합니다.
+        대기열이 가득 차면 QueueFullError, callback_url이 허용되지 않으면 InvalidCallbackURLError.
+        """
+        if callback_url:
+            await validate_callback_url(callback_url)
+        if self._queue.qsize() >= OCR_JOB_QUEUE_SIZE:
+            raise QueueFullError("OCR 작업 대기열이 가득 찼습니다.")
+
+        job_id = uuid.uuid4().hex
+        await self._call(self._insert, job_id, image_data, auto_save, callback_url)
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    async def get(self, job_id: str) -> dict | None:
+        rows = await self._call(
+            self._read,
+            "SELECT id, status, result, receipt_id, error, created_at, updated_at"
+            " FROM ocr_jobs WHERE id = ?",
+            (job_id,),
+        )
+        if not rows:
+            return None
+        job_id, status, result, receipt_id, error, created_at, updated_at = rows[0]
+        return {
+            "job_id":     job_id,
+            "status":     status,
+            "result":     json.loads(result) if result else None,
+            "receipt_id": receipt_id,
+            "error":      error,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "workers": OCR_JOB_WORKERS if self._workers else 0}
+
+    # ── 워커 ─────────────────────────────────────────────────────────────────
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._call(self._finish, job_id, "failed", None, None, f"작업 처리 오류: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        rows = await self._call(self._read, "SELECT auto_save, callback_url FROM ocr_jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return
+        auto_save, callback_url = rows[0]
+        try:
+            image_data = await self._call(self._image_path(job_id).read_bytes)
+        except FileNotFoundError:
+            await self._call(self._finish, job_id, "failed", None, None, "작업 이미지가 없습니다.")
+            return
+
+        await self._call(
+            self._write,
+            "UPDATE ocr_jobs SET status = 'running', updated_at = ? WHERE id = ?",
+            (time.time(), job_id),
+        )
+
+        result = await self.ocr_service.process_bytes(image_data)
+        receipt_id = None
+        error = result.get("error")
+
+        if result.get("success") and auto_save:
+            saved = await self.db_service.save_receipt(result)
+            if saved.get("success"):
+                receipt_id = saved.get("receipt_id")
+            else:
+                error = saved.get("error")
+
+        status = "done" if result.get("success") and not error else "failed"
+        await self._call(self._finish, job_id, status, json.dumps(result, ensure_ascii=False), receipt_id, error)
+
+        if callback_url:
+            await self._notify(callback_url, await self.get(job_id))
+
+    async def _notify(self, callback_url: str, job: dict) -> None:
+        """완료된 작업을 callback_url로 POST합니다. 실패해도 작업 상태에는 영향 없음.
+        등록 이후 DNS가 바뀌었을 수 있으므로 보내기 전에 다시 검사합니다.
+        """
+        try:
+            await validate_callback_url(callback_url)
+            async with httpx.AsyncClient(timeout=_WEBHOOK_TIMEOUT) as client:
+                await client.post(callback_url, json=job)
+        except Exception:
+            pass
@@ -0,0 +1,489 @@
+# -*- coding: utf-8 -*-
+"""로컬 SQLite 저장소.
+
+DB_BACKEND=sqlite이면 Supabase 대신 LOCAL_DB_PATH의 SQLite 파일에 저장한다.
+DatabaseService / StatsService와 같은 메서드·응답 형식을 제공하므로 main.py의 핸들러는 그대로 쓴다.
+1인 가구 배포, 오프라인 개발, 네트워크 없는 벤치마크용으로, 모든 조회가 네트워크 왕복 없이 끝난다.
+- 결제수단 감지/할인 분리/상품 키 계산은 DatabaseService의 _build_receipt_payload를 그대로 사용
+- 중복 저장 방지는 receipt_fingerprint.sql과 같은 구성(상호명 + 구매 시각(분) + 합계 + 상품 목록)
+- 통계는 롤업 테이블 없이 인덱스를 탄 집계 쿼리로 바로 계산
+- Supabase 전용 관리자 작업(롤업 재구축, 할인 이전, 상품 연결, 데이터 정리)은 지원하지 않음
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import timedelta
+from dotenv import load_dotenv
+from .db_service import DatabaseService, InvalidCursorError
+from .executor import run_db
+from .stats_service import StatsService
+
+load_dotenv()
+
+LOCAL_DB_PATH = os.getenv("LOCAL_DB_PATH", "receipts.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipts (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    store_name        TEXT,
+    card_name         TEXT,
+    purchase_datetime TEXT,
+    purchase_date     TEXT,
+    raw_text          TEXT NOT NULL DEFAULT '',
+    total_amount      INTEGER NOT NULL DEFAULT 0,
+    fingerprint       TEXT UNIQUE,
+    created_at        TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_receipts_purchase_date_id ON receipts(purchase_date DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS items (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    receipt_id  INTEGER NOT NULL REFERENCES receipts(id) ON DELETE CASCADE,
+    no          TEXT,
+    name        TEXT,
+    barcode     TEXT,
+    unit_price  INTEGER,
+    quantity    INTEGER,
+    amount      INTEGER,
+    product_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_items_receipt_id ON items(receipt_id);
+CREATE INDEX IF NOT EXISTS idx_items_product_key ON items(product_key);
+
+CREATE TABLE IF NOT EXISTS discounts (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    receipt_id INTEGER NOT NULL REFERENCES receipts(id) ON DELETE CASCADE,
+    name       TEXT,
+    amount     INTEGER,
+    item_id    INTEGER REFERENCES items(id) ON DELETE SET NULL
+);
+CREATE INDEX IF NOT EXISTS idx_discounts_receipt_id ON discounts(receipt_id);
+"""
+
+_UNSUPPORTED = "로컬 DB(DB_BACKEND=sqlite)에서는 지원하지 않는 작업입니다."
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _fingerprint(payload: dict) -> str | None:
+    """receipt_fingerprint.sql과 같은 구성의 영수증 fingerprint. 구매 시각이 없으면 None"""
+    if not payload.get("purchase_date"):
+        return None
+    items = sorted(
+        f"{_WHITESPACE.sub('', item.get('name') or '').lower()}:{item.get('quantity') or 0}:{item.get('amount') or 0}"
+        for item in payload["items"]
+    )
+    source = "|".join([
+        (payload.get("store_name") or "").strip().lower(),
+        payload["purchase_date"][:16],
+        str(payload.get("total_amount") or 0),
+        hashlib.md5("|".join(items).encode("utf-8")).hexdigest(),
+    ])
+    return hashlib.md5(source.encode("utf-8")).hexdigest()
+
+
+class LocalDatabaseService(DatabaseService):
+    def __init__(self, db_path: str = LOCAL_DB_PATH):
+        self.client = None
+        self._write_listeners: list = []
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def is_connected(self) -> bool:
+        return True
+
+    # ── SQLite 헬퍼 (DB 스레드 풀에서 실행) ──────────────────────────────────
+    def _read(self, sql: str, params: tuple = ()) -> list[dict]:
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params).fetchall()]
+
+    def _date_where(self, start_date: str, end_date: str, where: list, params: list) -> None:
+        start = self._parse_filter_date(start_date)
+        end   = self._parse_filter_date(end_date)
+        if start:
+            where.append("r.purchase_date >= ?")
+            params.append(start.isoformat())
+        if end:
+            where.append("r.purchase_date < ?")
+            params.append((end + timedelta(days=1)).isoformat())
+
+    # ── 영수증 저장 ───────────────────────────────────────────────────────────
+    def _save_payloads(self, payloads: list[dict]) -> list[dict]:
+        """한 트랜잭션으로 저장. 입력 순서대로 {"receipt_id", "duplicate"} 반환"""
+        results = []
+        with self._lock, self._db:
+            for payload in payloads:
+                fingerprint = _fingerprint(payload)
+                if fingerprint:
+                    existing = self._db.execute(
+                        "SELECT id FROM receipts WHERE fingerprint = ?", (fingerprint,)
+                    ).fetchone()
+                    if existing:
+                        results.append({"receipt_id": existing[0], "duplicate": True})
+                        continue
+
+                cursor = self._db.execute(
+                    "INSERT INTO receipts (store_name, card_name, purchase_datetime, purchase_date, raw_text,"
+                    " total_amount, fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (payload["store_name"], payload["card_name"], payload["purchase_datetime"],
+                     payload["purchase_date"], payload["raw_text"], payload["total_amount"], fingerprint),
+                )
+                receipt_id = cursor.lastrowid
+                self._db.executemany(
+                    "INSERT INTO items (receipt_id, no, name, barcode, unit_price, quantity, amount, product_key)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(receipt_id, i["no"], i["name"], i["barcode"], i["unit_price"], i["quantity"], i["amount"],
+                      i["product_key"]) for i in payload["items"]],
+                )
+                self._db.executemany(
+                    "INSERT INTO discounts (receipt_id, name, amount) VALUES (?, ?, ?)",
+                    [(receipt_id, d["name"], d["amount"]) for d in payload["discounts"]],
+                )
+                results.append({"receipt_id": receipt_id, "duplicate": False})
+        return results
+
+    async def save_receipt(self, data: dict) -> dict:
+        try:
+            payload = self._build_receipt_payload(data)
+            saved = (await run_db(self._save_payloads, [payload]))[0]
+            if saved["duplicate"]:
+                return {
+                    "success":    True,
+                    "receipt_id": saved["receipt_id"],
+                    "duplicate":  True,
+                    "message":    "이미 저장된 영수증입니다.",
+                }
+
+            self._notify_write()
+            return {
+                "success":        True,
+                "receipt_id":     saved["receipt_id"],
+                "duplicate":      False,
+                "discount_count": len(payload["discounts"]),
+                "message":        "저장 완료",
+            }
+        except Exception as e:
+            return {"success": False, "error": f"저장 오류: {str(e)}"}
+
+    async def save_receipts(self, data_list: list[dict]) -> dict:
+        try:
+            payloads = [self._build_receipt_payload(data) for data in data_list]
+            saved = await run_db(self._save_payloads, payloads)
+            receipt_ids = [row["receipt_id"] for row in saved]
+            duplicate_count = sum(1 for row in saved if row["duplicate"])
+            if duplicate_count < len(saved):
+                self._notify_write()
+
+            return {
+                "success":         True,
+                "receipt_ids":     receipt_ids,
+                "duplicate_count": duplicate_count,
+                "message":         f"{len(receipt_ids) - duplicate_count}건 저장 완료, 중복 {duplicate_count}건",
+            }
+        except Exception as e:
+            return {"success": False, "error": f"저장 오류: {str(e)}"}
+
+    # ── 영수증 목록 조회 ─────────────────────────────────────────────────────
+    def _cursor_where(self, cursor: str, where: list, params: list) -> None:
+        """(purchase_date DESC, id DESC) 순서(NULL 먼저)에서 커서 이후 행만 조회"""
+        purchase_date, receipt_id = self._decode_cursor(cursor)
+        if purchase_date is None:
+            where.append("((r.purchase_date IS NULL AND r.id < ?) OR r.purchase_date IS NOT NULL)")
+            params.append(receipt_id)
+        else:
+            where.append("(r.purchase_date < ? OR (r.purchase_date = ? AND r.id < ?))")
+            params.extend([purchase_date, purchase_date, receipt_id])
+
+    def _list_receipts(self, where: list, params: list, limit: int) -> list[dict]:
+        # Supabase(PostgreSQL) DESC 정렬과 같이 purchase_date NULL을 먼저
+        sql = (
+            f"SELECT {self._RECEIPT_LIST_COLS} FROM receipts r"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY r.purchase_date IS NULL DESC, r.purchase_date DESC, r.id DESC LIMIT ?"
+        )
+        return self._read(sql, (*params, limit))
+
+    async def get_receipts(
+        self,
+        limit: int = 20,
+        start_date: str = None,
+        end_date: str = None,
+        store_name: str = None,
+        card_name: str = None,
+        search: str = None,
+        cursor: str = None
+    ) -> dict:
+        """저장된 영수증 목록을 조회합니다. 검색어는 상품명 부분 일치(LIKE)로 찾고 날짜순으로 정렬합니다."""
+        try:
+            where, params = [], []
+            self._date_where(start_date, end_date, where, params)
+            if store_name:
+                where.append("r.store_name = ?")
+                params.append(store_name)
+            if card_name:
+                where.append("r.card_name = ?")
+                params.append(card_name)
+            if search:
+                # 검색어의 %, _는 와일드카드가 아닌 문자 그대로 찾음
+                escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                where.append("EXISTS (SELECT 1 FROM items i WHERE i.receipt_id = r.id AND i.name LIKE ? ESCAPE '\\')")
+                params.append(f"%{escaped}%")
+            if cursor:
+                self._cursor_where(cursor, where, params)
+
+            rows = await run_db(self._list_receipts, where, params, limit + 1)
+            receipts = rows[:limit]
+            next_cursor = None
+            if len(rows) > limit:
+                next_cursor = self._encode_cursor(receipts[-1]["purchase_date"], receipts[-1]["id"])
+            return {"success": True, "receipts": receipts, "next_cursor": next_cursor}
+
+        except InvalidCursorError:
+            raise
+        except Exception as e:
+            return {"success": False, "error": f"조회 오류: {str(e)}"}
+
+    # ── 영수증 상세 조회 ─────────────────────────────────────────────────────
+    def _attach_children(self, receipts: list[dict], item_cols: str, discount_cols: str) -> list[dict]:
+        """영수증 목록에 items/discounts를 붙입니다. (영수증 수와 관계없이 쿼리 2번)"""
+        if not receipts:
+            return receipts
+        ids = [r["id"] for r in receipts]
+        marks = ",".join("?" * len(ids))
+        by_id = {r["id"]: {**r, "items": [], "discounts": []} for r in receipts}
+        for item in self._read(f"SELECT receipt_id, {item_cols} FROM items WHERE receipt_id IN ({marks})"
+                               " ORDER BY id", tuple(ids)):
+            by_id[item.pop("receipt_id")]["items"].append(item)
+        for discount in self._read(f"SELECT receipt_id, {discount_cols} FROM discounts"
+                                   f" WHERE receipt_id IN ({marks}) ORDER BY id", tuple(ids)):
+            by_id[discount.pop("receipt_id")]["discounts"].append(discount)
+        return [by_id[i] for i in ids]
+
+    async def get_receipt_detail(self, receipt_id: int) -> dict:
+        try:
+            rows = await run_db(
+                self._read,
+                "SELECT id, store_name, card_name, purchase_datetime, total_amount, created_at"
+                " FROM receipts WHERE id = ?",
+                (receipt_id,),
+            )
+            if not rows:
+                return {"success": False, "error": "영수증을 찾을 수 없습니다."}
+
+            row = (await run_db(self._attach_children, rows,
+                                "id, no, name, unit_price, quantity, amount", "id, name, amount, item_id"))[0]
+            return {
+                "success":   True,
+                "receipt":   {k: v for k, v in row.items() if k not in ("items", "discounts")},
+                "items":     row["items"],
+                "discounts": row["discounts"],
+            }
+
+        except Exception as e:
+            return {"success": False, "error": f"조회 오류: {str(e)}"}
+
+    # ── 전체 내보내기 ────────────────────────────────────────────────────────
+    async def export_receipts_iter(
+        self,
+        start_date: str = None,
+        end_date: str = None,
+        store_name: str = None,
+        card_name: str = None,
+        batch_size: int = 200
+    ):
+        cursor = None
+        while True:
+            where, params = [], []
+            self._date_where(start_date, end_date, where, params)
+            if store_name:
+                where.append("r.store_name = ?")
+                params.append(store_name)
+            if card_name:
+                where.append("r.card_name = ?")
+                params.append(card_name)
+            if cursor:
+                self._cursor_where(cursor, where, params)
+
+            receipts = await run_db(self._list_receipts, where, params, batch_size)
+            if not receipts:
+                return
+            yield await run_db(self._attach_children, receipts,
+                               "no, name, barcode, unit_price, quantity, amount", "name, amount")
+
+            if len(receipts) < batch_size:
+                return
+            cursor = self._encode_cursor(receipts[-1]["purchase_date"], receipts[-1]["id"])
+
+    # ── 영수증 삭제 / 할인 추가 ──────────────────────────────────────────────
+    def _write(self, sql: str, params: tuple) -> int:
+        with self._lock, self._db:
+            return self._db.execute(sql, params).lastrowid
+
+    async def delete_receipt(self, receipt_id: int) -> dict:
+        try:
+            await run_db(self._write, "DELETE FROM receipts WHERE id = ?", (receipt_id,))
+            self._notify_write()
+            return {"success": True, "message": "삭제 완료"}
+        except Exception as e:
+            return {"success": False, "error": f"삭제 오류: {str(e)}"}
+
+    async def add_discount(self, receipt_id: int, name: str, amount: int, item_id: int = None) -> dict:
+        try:
+            discount_id = await run_db(
+                self._write,
+                "INSERT INTO discounts (receipt_id, name, amount, item_id) VALUES (?, ?, ?, ?)",
+                (receipt_id, name, abs(amount), item_id),
+            )
+            self._notify_write()
+            return {"success": True, "discount": {
+                "id": discount_id, "receipt_id": receipt_id, "name": name, "amount": abs(amount), "item_id": item_id,
+            }}
+        except Exception as e:
+            return {"success": False, "error": f"저장 오류: {str(e)}"}
+
+    # ── Admin ────────────────────────────────────────────────────────────────
+    async def find_duplicates(self, limit: int = 100) -> dict:
+        # 저장 시 fingerprint로 막으므로 로컬 DB에는 중복 묶음이 생기지 않음
+        return {"success": True, "group_count": 0, "duplicate_count": 0, "groups": []}
+
+    def _data_version(self) -> int:
+        with self._lock:
+            return self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    async def data_generation(self) -> int | None:
+        """PRAGMA data_version: 다른 연결(임포터, 다른 워커)이 커밋할 때마다 바뀝니다.
+        이 연결 자신의 쓰기는 write listener로 이미 무효화되므로 반영되지 않아도 됩니다.
+        """
+        return await run_db(self._data_version)
+
+    async def cleanup_data_iter(self, *args, **kwargs):
+        # 스트리밍 응답이 Supabase 경로의 실패와 같은 error 이벤트로 끝나도록 함
+        yield {"phase": "error", "error": _UNSUPPORTED}
+
+    async def cleanup_data(self, *args, **kwargs) -> dict:
+        return {"success": False, "error": _UNSUPPORTED}
+
+    async def rebuild_rollups(self) -> dict:
+        return {"success": False, "error": _UNSUPPORTED}
+
+    async def verify_rollups(self) -> dict:
+        return {"success": False, "error": _UNSUPPORTED}
+
+    async def migrate_discounts(self, *args, **kwargs) -> dict:
+        return {"success": False, "error": _UNSUPPORTED}
+
+    async def link_products(self, *args, **kwargs) -> dict:
+        return {"success": False, "error": _UNSUPPORTED}
+
+
+class LocalStatsService(StatsService):
+    """LocalDatabaseService의 SQLite 파일에서 StatsService와 같은 형식의 통계를 계산합니다."""
+
+    def __init__(self, db: LocalDatabaseService):
+        # 상속한 `if not self.client` 검사는 SQLite 연결을 보도록 client에 연결 객체를 넘김
+        super().__init__(db._db)
+        self.db = db
+
+    async def _query(self, sql: str, start_date: str, end_date: str, where: list = None, params: list = None,
+                     suffix: str = "", suffix_params: tuple = ()) -> list[dict]:
+        where, params = list(where or []), list(params or [])
+        self.db._date_where(start_date, end_date, where, params)
+        sql += (" WHERE " + " AND ".join(where) if where else "") + suffix
+        return await run_db(self.db._read, sql, (*params, *suffix_params))
+
+    async def get_summary(self, start_date: str = None, end_date: str = None) -> dict:
+        try:
+            row = (await self._query(
+                "SELECT COALESCE(SUM(r.total_amount), 0) AS total_amount, COUNT(*) AS receipt_count FROM receipts r",
+                start_date, end_date,
+            ))[0]
+            total_amount, receipt_count = row["total_amount"], row["receipt_count"]
+            return {
+                "success": True,
+                "data": {
+                    "total_amount": total_amount,
+                    "receipt_count": receipt_count,
+                    "avg_amount": total_amount // receipt_count if receipt_count > 0 else 0
+                }
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def get_monthly_stats(self, start_date: str = None, end_date: str = None) -> dict:
+        try:
+            data = await self._query(
+                "SELECT strftime('%Y.%m', r.purchase_date) AS month,"
+                " COALESCE(SUM(r.total_amount), 0) AS total_amount, COUNT(*) AS receipt_count FROM receipts r",
+                start_date, end_date, ["r.purchase_date IS NOT NULL"], suffix=" GROUP BY 1 ORDER BY 1",
+            )
+            return {"success": True, "data": data}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def get_store_stats(self, start_date: str = None, end_date: str = None) -> dict:
+        try:
+            data = await self._query(
+                "SELECT COALESCE(NULLIF(r.store_name, ''), '기타') AS store_name,"
+                " COALESCE(SUM(r.total_amount), 0) AS total_amount, COUNT(*) AS visit_count FROM receipts r",
+                start_date, end_date, suffix=" GROUP BY 1 ORDER BY total_amount DESC",
+            )
+            return {"success": True, "data": data}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def _card_stats(self, start_date: str, end_date: str, store_name: str = None) -> dict:
+        try:
+            where, params = [], []
+            if store_name:
+                where.append("COALESCE(NULLIF(r.store_name, ''), '기타') = ?")
+                params.append(store_name)
+            data = await self._query(
+                "SELECT COALESCE(NULLIF(r.card_name, ''), '기타') AS card_name,"
+                " COALESCE(SUM(r.total_amount), 0) AS total_amount, COUNT(*) AS usage_count FROM receipts r",
+                start_date, end_date, where, params, suffix=" GROUP BY 1 ORDER BY total_amount DESC",
+            )
+            return {"success": True, "data": data}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def get_card_stats(self, start_date: str = None, end_date: str = None) -> dict:
+        return await self._card_stats(start_date, end_date)
+
+    async def get_store_card_stats(self, store_name: str, start_date: str = None, end_date: str = None) -> dict:
+        return await self._card_stats(start_date, end_date, store_name)
+
+    async def get_frequent_items(self, start_date: str = None, end_date: str = None, limit: int = 10) -> dict:
+        """frequent_items_function.sql과 같은 계산 (구매한 날 단위로 묶고 LAG 윈도 함수, 상품 키는 product_key)"""
+        try:
+            where = ["TRIM(COALESCE(i.name, '')) <> ''"]
+            data = await self._query(
+                "WITH purchases AS ("
+                " SELECT COALESCE(i.product_key, 'n:' || TRIM(i.name)) AS item_key, TRIM(i.name) AS name,"
+                " COALESCE(i.quantity, 1) AS quantity, COALESCE(i.amount, 0) AS amount,"
+                " date(r.purchase_date) AS day"
+                " FROM items i JOIN receipts r ON r.id = i.receipt_id",
+                start_date, end_date, where,
+                suffix=(
+                    "), days AS ("
+                    " SELECT item_key, day, MIN(name) AS name, SUM(quantity) AS quantity, SUM(amount) AS amount"
+                    " FROM purchases GROUP BY item_key, day"
+                    "), gaps AS ("
+                    " SELECT d.*, CAST(julianday(d.day) - julianday(LAG(d.day)"
+                    " OVER (PARTITION BY d.item_key ORDER BY d.day)) AS INTEGER) AS gap_days"
+                    " FROM days d)"
+                    " SELECT MIN(name) AS name, SUM(quantity) AS purchase_count, SUM(amount) AS total_amount,"
+                    " SUM(gap_days) / NULLIF(COUNT(gap_days), 0) AS avg_interval_days"
+                    " FROM gaps GROUP BY item_key ORDER BY purchase_count DESC LIMIT ?"
+                ),
+                suffix_params=(limit,),
+            )
+            return {"success": True, "data": data}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""OCR 결과 캐시.
+
+같은 영수증 사진을 다시 올리면 Gemini 호출 없이 저장된 파싱 결과를 돌려준다.
+키는 디코딩된 이미지 바이트 + 프롬프트/모델 버전의 SHA-256.
+- 1단계: 메모리 LRU (크기/TTL 제한)
+- 2단계: SQLite 파일 (선택, OCR_CACHE_DB 지정 시) — 재시작 후에도 유지.
+  조회/저장은 전용 스레드 하나에서 실행해 이벤트 루프를 막지 않고,
+  저장할 때 TTL이 지난 행을 주기적으로 지운다.
+get은 사본을 돌려주므로 호출한 쪽이 결과를 고쳐도 캐시에는 영향이 없다.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "256"))
+OCR_CACHE_TTL_SECONDS = int(os.getenv("OCR_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+OCR_CACHE_DB = os.getenv("OCR_CACHE_DB", "")
+
+# 디스크 캐시에서 만료된 행을 지우는 최소 간격(초)
+_SWEEP_INTERVAL = 3600
+
+
+class OCRCache:
+    def __init__(
+        self,
+        version: str,
+        max_size: int = OCR_CACHE_SIZE,
+        ttl: int = OCR_CACHE_TTL_SECONDS,
+        db_path: str = OCR_CACHE_DB,
+    ):
+        self._version = hashlib.sha256(version.encode("utf-8")).digest()
+        self._max_size = max_size
+        self._ttl = ttl
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        self._db: sqlite3.Connection | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._last_sweep = 0.0
+        if db_path:
+            # 디스크 캐시 전용 스레드 하나 (연결을 한 스레드만 쓰므로 잠금 불필요)
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr-cache")
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("PRAGMA synchronous = NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                " key TEXT PRIMARY KEY, stored_at REAL NOT NULL, result TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_stored_at ON ocr_cache (stored_at)")
+            self._db.commit()
+
+    def key(self, image_data: bytes) -> str:
+        return hashlib.sha256(self._version + image_data).hexdigest()
+
+    async def _call(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args))
+
+    async def get(self, key: str) -> dict | None:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry and now - entry[0] < self._ttl:
+            self._memory.move_to_end(key)
+            self._hits += 1
+            return copy.deepcopy(entry[1])
+        if entry:
+            del self._memory[key]
+
+        if self._db is not None:
+            row = await self._call(self._disk_get, key, now)
+            if row:
+                stored_at, result = row
+                self._put_memory(key, stored_at, result)
+                self._disk_hits += 1
+                return copy.deepcopy(result)
+
+        self._misses += 1
+        return None
+
+    async def set(self, key: str, result: dict) -> None:
+        now = time.time()
+        result = copy.deepcopy(result)
+        self._put_memory(key, now, result)
+        if self._db is not None:
+            await self._call(self._disk_set, key, now, json.dumps(result, ensure_ascii=False))
+
+    # ── 디스크 캐시 (전용 스레드에서 실행) ────────────────────────────────────
+    def _disk_get(self, key: str, now: float) -> tuple[float, dict] | None:
+        row = self._db.execute("SELECT stored_at, result FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+        if row and now - row[0] < self._ttl:
+            return row[0], json.loads(row[1])
+        if row:
+            self._db.execute("DELETE FROM ocr_cache WHERE key = ?", (key,))
+            self._db.commit()
+        return None
+
+    def _disk_set(self, key: str, now: float, result: str) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO ocr_cache (key, stored_at, result) VALUES (?, ?, ?)",
+            (key, now, result),
+        )
+        if now - self._last_sweep >= _SWEEP_INTERVAL:
+            self._db.execute("DELETE FROM ocr_cache WHERE stored_at < ?", (now - self._ttl,))
+            self._last_sweep = now
+        self._db.commit()
+
+    def _put_memory(self, key: str, stored_at: float, result: dict) -> None:
+        self._memory[key] = (stored_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_size:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "hits":        self._hits + self._disk_hits,
+            "memory_hits": self._hits,
+            "disk_hits":   self._disk_hits,
+            "misses":      self._misses,
+            "size":        len(self._memory),
+            "disk_enabled": self._db is not None,
+        }
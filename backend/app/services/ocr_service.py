@@ -1,45 +1,30 @@
 import google.generativeai as genai
+import asyncio
 import base64
 import json
+import random
 import re
 import os
 from dotenv import load_dotenv
+from .ocr_cache import OCRCache
+from .executor import run_cpu
+from . import image_preprocess
+from .stream_parser import ReceiptStreamParser, StreamParseError
 
 load_dotenv()
 
+GEMINI_MODEL = "gemini-flash-latest"
 
-class OCRService:
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if api_key:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel("gemini-flash-latest")
-        else:
-            self.model = None
-
-    async def process_image(self, base64_image: str) -> dict:
-        """Base64 이미지를 분석하여 영수증 정보를 추출합니다."""
-
-        if not self.model:
-            return {
-                "success": False,
-                "storeName": None,
-                "cardName": None,
-                "items": [],
-                "rawText": "",
-                "purchaseDateTime": None,
-                "error": "GEMINI_API_KEY가 설정되지 않았습니다."
-            }
+# 동시에 진행할 Gemini 호출 수 / 호출당 타임아웃(초) / 429·5xx 재시도 횟수
+OCR_MAX_CONCURRENCY = int(os.getenv("OCR_MAX_CONCURRENCY", "4"))
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", "60"))
+OCR_MAX_RETRIES = int(os.getenv("OCR_MAX_RETRIES", "3"))
+OCR_RETRY_BASE_DELAY = float(os.getenv("OCR_RETRY_BASE_DELAY", "1.0"))
 
-        try:
-            # base64 헤더 제거
-            if "," in base64_image:
-                base64_image = base64_image.split(",")[1]
-
-            # 이미지 데이터 준비
-            image_data = base64.b64decode(base64_image)
+# 재시도 대상 HTTP 상태 코드 (rate limit, 일시적 서버 오류)
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
 
-            prompt = """이 영수증 이미지를 분석해서 상품 정보를 추출해주세요.
+_PROMPT = """이 영수증 이미지를 분석해서 상품 정보를 추출해주세요.
 
 영수증 형식:
 - 각 상품은 2줄로 구성됩니다
@@ -75,52 +60,244 @@ class OCRService:
 - 찾을 수 없는 정보는 null
 """
 
-            response = self.model.generate_content([
-                prompt,
+
+def _is_retryable(e: Exception) -> bool:
+    """429/5xx 또는 타임아웃이면 재시도 대상입니다.
+    google.api_core 예외는 HTTP 상태를 `code` 속성으로 노출합니다.
+    """
+    if isinstance(e, asyncio.TimeoutError):
+        return True
+    code = getattr(e, "code", None)
+    try:
+        return int(code) in _RETRYABLE_STATUS
+    except (TypeError, ValueError):
+        return False
+
+
+class OCRService:
+    def __init__(self):
+        api_key = os.getenv("GEMINI_API_KEY")
+        if api_key:
+            genai.configure(api_key=api_key)
+            self.model = genai.GenerativeModel(GEMINI_MODEL)
+        else:
+            self.model = None
+        self._semaphore = asyncio.Semaphore(OCR_MAX_CONCURRENCY)
+        # 프롬프트/모델/전처리 설정이 바뀌면 캐시 키도 바뀌도록 버전에 포함
+        self.cache = OCRCache(
+            version=f"{GEMINI_MODEL}\n{image_preprocess.settings_key()}\n{_PROMPT}"
+        )
+        # 전처리 전/후 누적 바이트 수
+        self.preprocess_stats = {"images": 0, "bytes_before": 0, "bytes_after": 0, "failures": 0}
+
+    def _error_result(self, error: str, raw_text: str = "") -> dict:
+        return {
+            "success": False,
+            "storeName": None,
+            "cardName": None,
+            "items": [],
+            "rawText": raw_text,
+            "purchaseDateTime": None,
+            "error": error
+        }
+
+    async def _generate(self, contents: list):
+        """Gemini 비동기 호출. 동시 호출 수를 제한하고, 429/5xx/타임아웃이면
+        지수 백오프 + full jitter로 재시도합니다."""
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    return await asyncio.wait_for(
+                        self.model.generate_content_async(contents),
+                        timeout=OCR_TIMEOUT_SECONDS,
+                    )
+            except Exception as e:
+                if attempt >= OCR_MAX_RETRIES or not _is_retryable(e):
+                    raise
+                delay = random.uniform(0, OCR_RETRY_BASE_DELAY * (2 ** attempt))
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _generate_stream(self, contents: list):
+        """Gemini 스트리밍 호출. 연결(첫 응답)까지는 타임아웃/재시도를 적용하고,
+        이후에는 청크마다 OCR_TIMEOUT_SECONDS 타임아웃(재시도 없음)을 둡니다.
+        스트림이 끝날 때까지 동시 호출 슬롯을 점유합니다."""
+        attempt = 0
+        async with self._semaphore:
+            while True:
+                try:
+                    response = await asyncio.wait_for(
+                        self.model.generate_content_async(contents, stream=True),
+                        timeout=OCR_TIMEOUT_SECONDS,
+                    )
+                    break
+                except Exception as e:
+                    if attempt >= OCR_MAX_RETRIES or not _is_retryable(e):
+                        raise
+                    delay = random.uniform(0, OCR_RETRY_BASE_DELAY * (2 ** attempt))
+                    attempt += 1
+                    await asyncio.sleep(delay)
+            # 청크 사이가 멈춘 스트림이 슬롯을 무한정 점유하지 않도록 청크마다 타임아웃
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=OCR_TIMEOUT_SECONDS)
+                except StopAsyncIteration:
+                    return
+                yield chunk.text
+
+    async def _preprocess(self, image_data: bytes) -> tuple[bytes, str]:
+        """전처리 후 (바이트, MIME 타입) 반환. 실패하면 원본을 그대로 사용합니다."""
+        try:
+            processed, mime_type, stats = await run_cpu(image_preprocess.preprocess_image, image_data)
+        except Exception:
+            self.preprocess_stats["failures"] += 1
+            return image_data, "image/jpeg"
+        self.preprocess_stats["images"] += 1
+        self.preprocess_stats["bytes_before"] += stats["bytes_before"]
+        self.preprocess_stats["bytes_after"] += stats["bytes_after"]
+        return processed, mime_type
+
+    def _success_result(self, result: dict) -> dict:
+        return {
+            "success": True,
+            "storeName": result.get("storeName", None),
+            "cardName": result.get("cardName", None),
+            "items": result.get("items", []),
+            "rawText": result.get("rawText", ""),
+            "purchaseDateTime": result.get("purchaseDateTime", None),
+            "error": None
+        }
+
+    def _parse_text(self, response_text: str) -> dict:
+        """Gemini 응답 텍스트(JSON 또는 ```json 블록)를 결과 dict로 변환합니다."""
+        response_text = response_text.strip()
+
+        # JSON 블록 추출 (```json ... ``` 형식 처리)
+        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_text)
+        if json_match:
+            response_text = json_match.group(1)
+
+        try:
+            result = json.loads(response_text)
+        except json.JSONDecodeError as e:
+            return self._error_result(f"JSON 파싱 오류: {str(e)}", response_text)
+
+        return self._success_result(result)
+
+    async def process_image(self, base64_image: str) -> dict:
+        """Base64 이미지를 분석하여 영수증 정보를 추출합니다."""
+        try:
+            # base64 헤더 제거
+            if "," in base64_image:
+                base64_image = base64_image.split(",")[1]
+
+            # 이미지 데이터 준비
+            image_data = base64.b64decode(base64_image)
+        except Exception as e:
+            return self._error_result(f"OCR 처리 오류: {str(e)}")
+
+        return await self.process_bytes(image_data)
+
+    async def process_bytes(self, image_data: bytes) -> dict:
+        """디코딩된 이미지 바이트를 분석하여 영수증 정보를 추출합니다."""
+
+        if not self.model:
+            return self._error_result("GEMINI_API_KEY가 설정되지 않았습니다.")
+
+        try:
+            # 같은 이미지를 다시 올린 경우 캐시된 결과 반환
+            cache_key = self.cache.key(image_data)
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            # 축소·재인코딩한 이미지로 Gemini 호출
+            model_image, mime_type = await self._preprocess(image_data)
+
+            response = await self._generate([
+                _PROMPT,
                 {
-                    "mime_type": "image/jpeg",
-                    "data": image_data
+                    "mime_type": mime_type,
+                    "data": model_image
                 }
             ])
 
-            # 응답 파싱
-            response_text = response.text.strip()
+            parsed = self._parse_text(response.text)
+            if parsed["success"]:
+                await self.cache.set(cache_key, parsed)
+            return parsed
 
-            # JSON 블록 추출 (```json ... ``` 형식 처리)
-            json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_text)
-            if json_match:
-                response_text = json_match.group(1)
+        except asyncio.TimeoutError:
+            return self._error_result(f"OCR 처리 오류: {OCR_TIMEOUT_SECONDS:.0f}초 내에 응답이 없습니다.")
+        except Exception as e:
+            return self._error_result(f"OCR 처리 오류: {str(e)}")
 
-            # JSON 파싱
-            result = json.loads(response_text)
+    async def stream_bytes(self, image_data: bytes):
+        """이미지를 분석하면서 완성된 필드/상품을 즉시 이벤트로 내보냅니다.
+        - {"event": "storeName" | "cardName" | "purchaseDateTime" | "rawText", "value": ...}
+        - {"event": "item", "value": {...}}
+        - 마지막: {"event": "result", "value": process_bytes와 같은 형식의 전체 결과}
+        점진 파싱이 실패하면 받은 텍스트 전체를 기존 방식(_parse_text)으로 다시 파싱합니다.
+        캐시 적중 시에도 같은 이벤트를 내보냅니다.
+        """
+        if not self.model:
+            yield {"event": "result", "value": self._error_result("GEMINI_API_KEY가 설정되지 않았습니다.")}
+            return
 
-            return {
-                "success": True,
-                "storeName": result.get("storeName", None),
-                "cardName": result.get("cardName", None),
-                "items": result.get("items", []),
-                "rawText": result.get("rawText", ""),
-                "purchaseDateTime": result.get("purchaseDateTime", None),
-                "error": None
-            }
+        cache_key = self.cache.key(image_data)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            # 실시간 경로와 같은 이벤트를 프롬프트의 필드 순서대로
+            for key in ("storeName", "cardName"):
+                yield {"event": key, "value": cached.get(key)}
+            for item in cached.get("items", []):
+                yield {"event": "item", "value": item}
+            for key in ("purchaseDateTime", "rawText"):
+                yield {"event": key, "value": cached.get(key)}
+            yield {"event": "result", "value": cached}
+            return
 
-        except json.JSONDecodeError as e:
-            return {
-                "success": False,
-                "storeName": None,
-                "cardName": None,
-                "items": [],
-                "rawText": response_text if 'response_text' in locals() else "",
-                "purchaseDateTime": None,
-                "error": f"JSON 파싱 오류: {str(e)}"
-            }
+        parser = ReceiptStreamParser()
+        # 파서가 실패한 뒤에만 채움 (실패 전까지 소비한 부분은 parser.replay()로 되살림)
+        chunks: list[str] = []
+        try:
+            model_image, mime_type = await self._preprocess(image_data)
+            async for text in self._generate_stream([
+                _PROMPT,
+                {
+                    "mime_type": mime_type,
+                    "data": model_image
+                }
+            ]):
+                if parser is None:
+                    chunks.append(text)
+                    continue
+                if parser.done:
+                    continue
+                try:
+                    events = parser.feed(text)
+                except StreamParseError:
+                    chunks.append(parser.replay())
+                    parser = None
+                    continue
+                for key, value in events:
+                    yield {"event": key, "value": value}
+
+            if parser is not None and parser.done:
+                parsed = self._success_result(parser.result)
+            elif parser is not None:
+                # 응답이 JSON 중간에서 끝남: 받은 만큼으로 기존 방식 파싱 (오류 결과가 됨)
+                parsed = self._parse_text(parser.replay())
+            else:
+                parsed = self._parse_text("".join(chunks))
+
+        except asyncio.TimeoutError:
+            parsed = self._error_result(f"OCR 처리 오류: {OCR_TIMEOUT_SECONDS:.0f}초 내에 응답이 없습니다.")
         except Exception as e:
-            return {
-                "success": False,
-                "storeName": None,
-                "cardName": None,
-                "items": [],
-                "rawText": "",
-                "purchaseDateTime": None,
-                "error": f"OCR 처리 오류: {str(e)}"
-            }
+            parsed = self._error_result(f"OCR 처리 오류: {str(e)}")
+
+        if parsed["success"]:
+            await self.cache.set(cache_key, parsed)
+        yield {"event": "result", "value": parsed}
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""raw_text에서 결제수단을 감지하는 단일 패스 검출기.
+
+결제수단별 키워드 표를 하나의 정규식으로 컴파일해 (소문자로 바꾼) 텍스트를 한 번만 훑는다.
+여러 키워드가 나오면 표에서 먼저 나온(우선순위가 높은) 결제수단을 반환한다.
+"""
+import re
+
+# (결제수단, 키워드) — 위에 있을수록 우선순위가 높다
+PAYMENT_KEYWORDS: list[tuple[str, list[str]]] = [
+    # 배달 앱
+    ("배민1(one)",  ["배민1", "배민 1", "baemin1", "baemin 1"]),
+    ("배달의민족",   ["배달의민족", "배민", "baemin"]),
+    ("요기요",      ["요기요", "yogiyo"]),
+    ("쿠팡이츠",    ["쿠팡이츠", "쿠팡 이츠", "coupang eats"]),
+    ("땡겨요",      ["땡겨요"]),
+    # 간편결제
+    ("카카오페이",   ["카카오페이", "kakaopay", "kakao pay"]),
+    ("네이버페이",   ["네이버페이", "naverpay", "naver pay"]),
+    ("삼성페이",    ["삼성페이", "samsung pay"]),
+    ("애플페이",    ["애플페이", "apple pay"]),
+    ("토스페이",    ["토스페이", "toss pay"]),
+    ("토스",       ["토스", "toss"]),
+    # 카드사
+    ("신한카드",    ["신한카드", "shinhan card"]),
+    ("KB국민카드",  ["kb국민", "국민카드", "kb카드"]),
+    ("삼성카드",    ["삼성카드", "samsung card"]),
+    ("현대카드",    ["현대카드", "hyundai card"]),
+    ("롯데카드",    ["롯데카드", "lotte card"]),
+    ("하나카드",    ["하나카드", "hana card"]),
+    ("우리카드",    ["우리카드", "woori card"]),
+    ("BC카드",     ["비씨카드", "bc카드", "bc card"]),
+    ("NH농협카드",  ["농협카드", "nh농협", "nh카드"]),
+    ("씨티카드",    ["씨티카드", "citi card"]),
+    # 현금
+    ("현금",       ["현금"]),
+]
+
+
+class PaymentDetector:
+    def __init__(self, table: list[tuple[str, list[str]]] = PAYMENT_KEYWORDS):
+        self._methods: dict[str, tuple[int, str]] = {}
+        for priority, (method, keywords) in enumerate(table):
+            for keyword in keywords:
+                self._methods.setdefault(keyword.lower(), (priority, method))
+
+        # 같은 위치에서는 긴 키워드가 먼저 매칭되도록 정렬 ("토스페이" > "토스").
+        # IGNORECASE는 re의 리터럴 접두 탐색을 끄므로(체인보다 느려짐) 텍스트를 한 번 소문자로 바꿔 매칭
+        alternation = "|".join(re.escape(k) for k in sorted(self._methods, key=len, reverse=True))
+        self._pattern = re.compile(alternation)
+
+    def detect(self, text: str) -> str | None:
+        if not text:
+            return None
+
+        text = text.lower()
+        best: tuple[int, str] | None = None
+        pos = 0
+        # 매칭 시작 다음 글자부터 다시 찾아 겹치는 키워드도 놓치지 않음
+        while (match := self._pattern.search(text, pos)) is not None:
+            candidate = self._methods[match.group()]
+            if best is None or candidate[0] < best[0]:
+                best = candidate
+                if best[0] == 0:
+                    break
+            pos = match.start() + 1
+        return best[1] if best else None
+
+
+detect_payment_method = PaymentDetector().detect
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""상품명 정규화.
+
+OCR 결과는 같은 상품도 '씬피넛버터샌드 80g' / '씬피넛버터샌드80g' / '씬피넛버터샌드(80G)'처럼
+공백, 단위 표기, 괄호가 달라진다. 정규화된 이름(또는 바코드)을 products 카탈로그의 키로 써서
+저장 시점에 items를 상품에 연결한다. (backend/scripts/products_catalog.sql 참고)
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# 숫자 사이 천 단위 콤마 (1,000ml → 1000ml)
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+_BRACKETS = re.compile(r"[()\[\]{}<>「」『』【】〔〕]")
+# 수량 + 단위: 80 g, 1.5L, 500 ML, 1킬로그램
+_UNIT = re.compile(r"(\d+(?:\.\d+)?)\s*(킬로그램|kg|그램|g|밀리리터|ml|리터|l)(?![a-z])")
+# 한글/영문/숫자와 숫자 사이의 소수점 외에는 모두 제거
+_NOISE = re.compile(r"[^0-9a-z가-힣.]+|(?<!\d)\.|\.(?!\d)")
+
+# 단위 → (기준 단위, 배수)
+_UNITS = {
+    "킬로그램": ("g", 1000), "kg": ("g", 1000), "그램": ("g", 1), "g": ("g", 1),
+    "리터": ("ml", 1000), "l": ("ml", 1000), "밀리리터": ("ml", 1), "ml": ("ml", 1),
+}
+
+# EAN-8/UPC-A/EAN-13/GTIN-14
+_BARCODE = re.compile(r"\d{8,14}")
+
+
+def _unit_sub(match: re.Match) -> str:
+    base, factor = _UNITS[match.group(2)]
+    value = float(match.group(1)) * factor
+    return f"{int(value) if value.is_integer() else round(value, 3)}{base}"
+
+
+@lru_cache(maxsize=8192)
+def normalize_product_name(name: str | None) -> str:
+    """비교용 상품명: 전각/호환 문자 통일(NFKC), 소문자, 괄호/공백/기호 제거, 단위 환산(kg→g, l→ml)"""
+    if not name:
+        return ""
+    text = unicodedata.normalize("NFKC", name).lower()
+    text = _THOUSANDS.sub("", text)
+    text = _BRACKETS.sub(" ", text)
+    text = _UNIT.sub(_unit_sub, text)
+    return _NOISE.sub("", text)
+
+
+def product_key(name: str | None, barcode: str | None = None) -> str | None:
+    """products 카탈로그 키: 유효한 바코드가 있으면 'b:<바코드>', 없으면 'n:<정규화된 이름>'"""
+    barcode = (barcode or "").strip()
+    if _BARCODE.fullmatch(barcode):
+        return f"b:{barcode}"
+    normalized = normalize_product_name(name)
+    return f"n:{normalized}" if normalized else None
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""영수증 내보내기 형식 (CSV / NDJSON / Parquet).
+
+DatabaseService.export_receipts_iter가 돌려주는 페이지(영수증 + items + discounts)를
+받는 즉시 해당 형식의 바이트 청크로 바꿔 내보낸다. 어떤 형식이든 한 페이지 분량만 버퍼에 둔다.
+- NDJSON: 영수증 한 장이 한 줄 (items/discounts 중첩)
+- CSV/Parquet: 평탄화한 행. row_type이 receipt(영수증 합계) → item → discount 순
+Parquet은 pyarrow가 설치된 경우에만 사용할 수 있다.
+"""
+import csv
+import io
+import json
+
+EXPORT_FORMATS = {
+    "csv":     ("text/csv; charset=utf-8", "csv"),
+    "ndjson":  ("application/x-ndjson; charset=utf-8", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+COLUMNS = [
+    "row_type", "receipt_id", "store_name", "card_name", "purchase_datetime", "purchase_date",
+    "receipt_total", "no", "name", "barcode", "unit_price", "quantity", "amount",
+]
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _rows(receipts: list[dict]):
+    """영수증 페이지를 COLUMNS 순서의 평탄화된 행으로 변환"""
+    for receipt in receipts:
+        base = [
+            receipt["id"], receipt.get("store_name"), receipt.get("card_name"),
+            receipt.get("purchase_datetime"), receipt.get("purchase_date"), receipt.get("total_amount"),
+        ]
+        yield ["receipt", *base, None, None, None, None, None, None]
+        for item in receipt.get("items") or []:
+            yield ["item", *base, item.get("no"), item.get("name"), item.get("barcode"),
+                   item.get("unit_price"), item.get("quantity"), item.get("amount")]
+        for discount in receipt.get("discounts") or []:
+            yield ["discount", *base, None, discount.get("name"), None, None, None, discount.get("amount")]
+
+
+async def to_ndjson(pages):
+    async for receipts in pages:
+        yield "".join(json.dumps(receipt, ensure_ascii=False) + "\n" for receipt in receipts).encode("utf-8")
+
+
+async def to_csv(pages):
+    # BOM: Excel에서 한글이 깨지지 않도록
+    yield ("\ufeff" + ",".join(COLUMNS) + "\r\n").encode("utf-8")
+    async for receipts in pages:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(_rows(receipts))
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """ParquetWriter 출력 대상. 쓴 바이트를 모아 두었다가 take()로 꺼낸다 (tell()은 누적 위치)."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+async def to_parquet(pages):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("row_type", pa.string()), ("receipt_id", pa.int64()), ("store_name", pa.string()),
+        ("card_name", pa.string()), ("purchase_datetime", pa.string()), ("purchase_date", pa.string()),
+        ("receipt_total", pa.int64()), ("no", pa.string()), ("name", pa.string()), ("barcode", pa.string()),
+        ("unit_price", pa.int64()), ("quantity", pa.int64()), ("amount", pa.int64()),
+    ])
+    sink = _ChunkSink()
+    # 페이지 하나 = row group 하나. 페이지마다 완성된 row group 바이트를 내보냄
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for receipts in pages:
+            columns = list(zip(*_rows(receipts)))
+            if columns:
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                    schema=schema,
+                ))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""통계 응답 캐시.
+
+통계는 영수증 저장보다 훨씬 자주 조회되므로, 엔드포인트 + 정규화된 기간/상점명을 키로
+결과를 메모리 LRU(크기/TTL 제한)에 보관한다. DatabaseService의 쓰기 작업이 성공하면
+invalidate()로 세대(generation)를 올려 전체를 비운다.
+이 알림은 같은 프로세스의 쓰기에만 오므로, 오프라인 임포터나 다른 uvicorn 워커의 쓰기는
+sync()가 STATS_CACHE_CHECK_SECONDS마다 DB 쪽 변경 카운터(DatabaseService.data_generation)를
+조회해 값이 바뀌었으면 비운다. 즉 다른 프로세스의 쓰기는 최대 STATS_CACHE_CHECK_SECONDS 늦게 반영된다.
+ETag는 응답 내용의 해시라서, 내용이 같으면 재시작/TTL 만료/다른 워커와 관계없이 같은 값이 되어
+PWA 재검증에 304로 응답할 수 있다.
+STATS_CACHE_SIZE 또는 STATS_CACHE_TTL_SECONDS가 0 이하이면 캐시를 쓰지 않는다 (ETag는 그대로 동작).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", "256"))
+STATS_CACHE_TTL_SECONDS = int(os.getenv("STATS_CACHE_TTL_SECONDS", "300"))
+# DB 변경 카운터 확인 간격 (0이면 매 요청마다 확인)
+STATS_CACHE_CHECK_SECONDS = float(os.getenv("STATS_CACHE_CHECK_SECONDS", "5"))
+
+
+def _normalize_date(date_str: str | None) -> str | None:
+    """YY-MM-DD / YYYY-MM-DD(...)를 YYYY-MM-DD로 통일 (같은 기간이 다른 키가 되지 않도록)"""
+    if not date_str:
+        return None
+    try:
+        if len(date_str) == 8:
+            return datetime.strptime(date_str, "%y-%m-%d").date().isoformat()
+        return datetime.strptime(date_str[:10], "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        return None
+
+
+class StatsCache:
+    def __init__(
+        self,
+        max_size: int = STATS_CACHE_SIZE,
+        ttl: int = STATS_CACHE_TTL_SECONDS,
+        check_interval: float = STATS_CACHE_CHECK_SECONDS,
+    ):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._check_interval = check_interval
+        self._next_check = 0.0
+        self._data_generation = None
+        self._enabled = max_size > 0 and ttl > 0
+        self._entries: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def key(self, endpoint: str, start_date: str = None, end_date: str = None, **params) -> tuple:
+        return (
+            endpoint,
+            _normalize_date(start_date),
+            _normalize_date(end_date),
+            tuple(sorted(params.items())),
+        )
+
+    def etag(self, result: dict) -> str:
+        """응답 내용에서 만든 ETag (계산마다 달라지는 timings_ms는 제외)"""
+        content = {k: v for k, v in result.items() if k != "timings_ms"}
+        body = json.dumps(content, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+        return f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+    def get(self, key: tuple) -> dict | None:
+        if not self._enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] < self._ttl:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def set(self, key: tuple, result: dict, generation: int) -> None:
+        """generation: 계산을 시작할 때의 세대. 계산 중 쓰기가 있었으면 저장하지 않음."""
+        if not self._enabled:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    async def sync(self, fetch_generation) -> None:
+        """다른 프로세스의 쓰기 감지. check_interval마다 fetch_generation()으로 DB 변경 카운터를 읽어
+        이전 값과 다르면 invalidate()합니다. None(조회 실패/미지원)이면 이전 값을 유지합니다.
+        """
+        if not self._enabled:
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        # 조회 중에 들어온 요청이 중복 조회하지 않도록 먼저 기록
+        self._next_check = now + self._check_interval
+        value = await fetch_generation()
+        if value is None:
+            return
+        if self._data_generation is not None and value != self._data_generation:
+            self.invalidate()
+        self._data_generation = value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits":       self._hits,
+                "misses":     self._misses,
+                "size":       len(self._entries),
+                "generation": self._generation,
+            }
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 from supabase import Client
 from datetime import datetime, timedelta
-from collections import defaultdict
+import asyncio
+import time
+from .executor import execute
 
 
 class StatsService:
@@ -19,15 +21,14 @@ class StatsService:
         except ValueError:
             return None
 
-    def _apply_date_filter(self, query, start_date: str, end_date: str):
-        """purchase_date 컬럼에 DB 레벨 날짜 필터 적용"""
+    def _date_params(self, start_date: str, end_date: str) -> dict:
+        """통계 RPC 함수의 기간 파라미터 (p_start 이상, p_end 미만)"""
         start = self._parse_date(start_date)
         end = self._parse_date(end_date)
-        if start:
-            query = query.gte("purchase_date", start.isoformat())
-        if end:
-            query = query.lt("purchase_date", (end + timedelta(days=1)).isoformat())
-        return query
+        return {
+            "p_start": start.isoformat() if start else None,
+            "p_end": (end + timedelta(days=1)).isoformat() if end else None,
+        }
 
     async def get_summary(self, start_date: str = None, end_date: str = None) -> dict:
         """기간별 요약 통계"""
@@ -35,13 +36,11 @@ class StatsService:
             return {"success": False, "error": "데이터베이스 연결 없음"}
 
         try:
-            query = self.client.table("receipts").select("total_amount")
-            query = self._apply_date_filter(query, start_date, end_date)
-            result = query.execute()
-            receipts = result.data
+            result = await execute(self.client.rpc("stats_summary", self._date_params(start_date, end_date)))
+            row = result.data[0] if result.data else {}
 
-            total_amount = sum(r.get("total_amount", 0) for r in receipts)
-            receipt_count = len(receipts)
+            total_amount = row.get("total_amount", 0)
+            receipt_count = row.get("receipt_count", 0)
             avg_amount = total_amount // receipt_count if receipt_count > 0 else 0
 
             return {
@@ -61,27 +60,8 @@ class StatsService:
             return {"success": False, "error": "데이터베이스 연결 없음"}
 
         try:
-            query = self.client.table("receipts").select("purchase_date, total_amount")
-            query = self._apply_date_filter(query, start_date, end_date)
-            result = query.execute()
-
-            monthly = defaultdict(lambda: {"total_amount": 0, "receipt_count": 0})
-
-            for r in result.data:
-                pd = r.get("purchase_date")
-                if not pd:
-                    continue
-                # purchase_date는 ISO 8601 (2026-02-14T...)
-                month_key = pd[:7].replace("-", ".")  # "2026.02"
-                monthly[month_key]["total_amount"] += r.get("total_amount", 0)
-                monthly[month_key]["receipt_count"] += 1
-
-            data = [
-                {"month": k, "total_amount": v["total_amount"], "receipt_count": v["receipt_count"]}
-                for k, v in sorted(monthly.items())
-            ]
-
-            return {"success": True, "data": data}
+            result = await execute(self.client.rpc("stats_monthly", self._date_params(start_date, end_date)))
+            return {"success": True, "data": result.data}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
@@ -91,23 +71,8 @@ class StatsService:
             return {"success": False, "error": "데이터베이스 연결 없음"}
 
         try:
-            query = self.client.table("receipts").select("store_name, total_amount")
-            query = self._apply_date_filter(query, start_date, end_date)
-            result = query.execute()
-
-            stores = defaultdict(lambda: {"total_amount": 0, "visit_count": 0})
-
-            for r in result.data:
-                store = r.get("store_name") or "기타"
-                stores[store]["total_amount"] += r.get("total_amount", 0)
-                stores[store]["visit_count"] += 1
-
-            data = [
-                {"store_name": k, "total_amount": v["total_amount"], "visit_count": v["visit_count"]}
-                for k, v in sorted(stores.items(), key=lambda x: x[1]["total_amount"], reverse=True)
-            ]
-
-            return {"success": True, "data": data}
+            result = await execute(self.client.rpc("stats_by_store", self._date_params(start_date, end_date)))
+            return {"success": True, "data": result.data}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
@@ -117,23 +82,8 @@ class StatsService:
             return {"success": False, "error": "데이터베이스 연결 없음"}
 
         try:
-            query = self.client.table("receipts").select("card_name, total_amount")
-            query = self._apply_date_filter(query, start_date, end_date)
-            result = query.execute()
-
-            cards = defaultdict(lambda: {"total_amount": 0, "usage_count": 0})
-
-            for r in result.data:
-                card = r.get("card_name") or "기타"
-                cards[card]["total_amount"] += r.get("total_amount", 0)
-                cards[card]["usage_count"] += 1
-
-            data = [
-                {"card_name": k, "total_amount": v["total_amount"], "usage_count": v["usage_count"]}
-                for k, v in sorted(cards.items(), key=lambda x: x[1]["total_amount"], reverse=True)
-            ]
-
-            return {"success": True, "data": data}
+            result = await execute(self.client.rpc("stats_by_card", self._date_params(start_date, end_date)))
+            return {"success": True, "data": result.data}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
@@ -143,97 +93,59 @@ class StatsService:
             return {"success": False, "error": "데이터베이스 연결 없음"}
 
         try:
-            query = self.client.table("receipts").select("card_name, total_amount").eq("store_name", store_name)
-            query = self._apply_date_filter(query, start_date, end_date)
-            result = query.execute()
-
-            cards = defaultdict(lambda: {"total_amount": 0, "usage_count": 0})
-
-            for r in result.data:
-                card = r.get("card_name") or "기타"
-                cards[card]["total_amount"] += r.get("total_amount", 0)
-                cards[card]["usage_count"] += 1
-
-            data = [
-                {"card_name": k, "total_amount": v["total_amount"], "usage_count": v["usage_count"]}
-                for k, v in sorted(cards.items(), key=lambda x: x[1]["total_amount"], reverse=True)
-            ]
-
-            return {"success": True, "data": data}
+            params = {**self._date_params(start_date, end_date), "p_store": store_name}
+            result = await execute(self.client.rpc("stats_by_card", params))
+            return {"success": True, "data": result.data}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
     async def get_frequent_items(self, start_date: str = None, end_date: str = None, limit: int = 10) -> dict:
-        """자주 구매하는 상품 통계"""
+        """자주 구매하는 상품 통계
+        상품별 수량/금액/평균 구매 주기를 stats_frequent_items RPC가 일별 상품 롤업(item_daily_rollup)과
+        LAG 윈도 함수로 DB에서 계산 (backend/scripts/frequent_items_function.sql, stats_rollups.sql 참고)
+        """
         if not self.client:
             return {"success": False, "error": "데이터베이스 연결 없음"}
 
         try:
-            # 날짜 필터로 영수증 ID + purchase_date만 조회
-            query = self.client.table("receipts").select("id, purchase_date")
-            query = self._apply_date_filter(query, start_date, end_date)
-            receipts_result = query.execute()
-
-            receipt_ids = [r["id"] for r in receipts_result.data]
-            if not receipt_ids:
-                return {"success": True, "data": []}
-
-            # 영수증 ID → purchase_date 매핑
-            receipt_dates = {
-                r["id"]: r.get("purchase_date")
-                for r in receipts_result.data
-            }
-
-            # 해당 영수증의 아이템 조회 (필요한 컬럼만)
-            items_result = self.client.table("items").select(
-                "name, quantity, amount, receipt_id"
-            ).in_("receipt_id", receipt_ids).execute()
-
-            # 상품별 집계
-            item_stats = defaultdict(lambda: {
-                "purchase_count": 0,
-                "total_amount": 0,
-                "purchase_dates": []
-            })
-
-            for item in items_result.data:
-                name = item.get("name", "").strip()
-                if not name:
-                    continue
-
-                item_stats[name]["purchase_count"] += item.get("quantity", 1)
-                item_stats[name]["total_amount"] += item.get("amount", 0)
-
-                receipt_id = item.get("receipt_id")
-                pd = receipt_dates.get(receipt_id)
-                if pd:
-                    try:
-                        dt = datetime.fromisoformat(pd[:19])  # TZ 부분 제거
-                        item_stats[name]["purchase_dates"].append(dt)
-                    except ValueError:
-                        pass
-
-            # 평균 구매 주기 계산
-            data = []
-            for name, stats in item_stats.items():
-                dates = sorted(stats["purchase_dates"])
-                avg_interval = None
-
-                if len(dates) >= 2:
-                    intervals = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
-                    intervals = [i for i in intervals if i > 0]
-                    if intervals:
-                        avg_interval = sum(intervals) // len(intervals)
-
-                data.append({
-                    "name": name,
-                    "purchase_count": stats["purchase_count"],
-                    "total_amount": stats["total_amount"],
-                    "avg_interval_days": avg_interval
-                })
-
-            data.sort(key=lambda x: x["purchase_count"], reverse=True)
-
-            return {"success": True, "data": data[:limit]}
+            params = {**self._date_params(start_date, end_date), "p_limit": limit}
+            result = await execute(self.client.rpc("stats_frequent_items", params))
+            return {"success": True, "data": result.data}
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+    async def get_dashboard(self, start_date: str = None, end_date: str = None, limit: int = 10) -> dict:
+        """대시보드 전체 패널을 한 번에 조회 (하위 쿼리 동시 실행, 섹션별 소요 시간 포함)"""
+        if not self.client:
+            return {"success": False, "error": "데이터베이스 연결 없음"}
+
+        sections = {
+            "summary": self.get_summary(start_date, end_date),
+            "monthly": self.get_monthly_stats(start_date, end_date),
+            "by_store": self.get_store_stats(start_date, end_date),
+            "by_card": self.get_card_stats(start_date, end_date),
+            "frequent_items": self.get_frequent_items(start_date, end_date, limit),
+        }
+
+        async def timed(coro):
+            started = time.perf_counter()
+            result = await coro
+            return result, round((time.perf_counter() - started) * 1000, 1)
+
+        results = await asyncio.gather(*(timed(c) for c in sections.values()))
+
+        data, timings, errors = {}, {}, {}
+        for name, (result, elapsed_ms) in zip(sections, results):
+            timings[name] = elapsed_ms
+            if result.get("success"):
+                data[name] = result["data"]
+            else:
+                data[name] = None
+                errors[name] = result.get("error")
+
+        return {
+            "success": not errors,
+            "data": data,
+            "timings_ms": timings,
+            "errors": errors,
+        }
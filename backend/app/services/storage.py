@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""저장소 선택.
+
+DB_BACKEND=supabase(기본): Supabase(PostgREST) — DatabaseService / StatsService
+DB_BACKEND=sqlite: 로컬 SQLite 파일(LOCAL_DB_PATH) — LocalDatabaseService / LocalStatsService
+"""
+import os
+from dotenv import load_dotenv
+from .db_service import DatabaseService
+from .local_db_service import LocalDatabaseService, LocalStatsService
+from .stats_service import StatsService
+
+load_dotenv()
+
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase")
+
+
+def create_db_services() -> tuple[DatabaseService, StatsService]:
+    """(db_service, stats_service)를 DB_BACKEND에 맞게 생성합니다."""
+    if DB_BACKEND == "sqlite":
+        db_service = LocalDatabaseService()
+        return db_service, LocalStatsService(db_service)
+    if DB_BACKEND != "supabase":
+        raise ValueError(f"지원하지 않는 DB_BACKEND입니다: {DB_BACKEND} (supabase, sqlite)")
+
+    db_service = DatabaseService()
+    return db_service, StatsService(db_service.client)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Gemini 스트리밍 응답의 점진적 JSON 파서.
+
+응답 전체를 기다렸다가 json.loads 하는 대신, 청크가 도착하는 대로
+최상위 필드(storeName, cardName, ...)와 items 배열의 각 상품을 완성되는 즉시 내보낸다.
+버퍼에는 아직 완성되지 않은 토큰만 남기므로 전체 텍스트를 두 번 들고 있지 않는다.
+파싱이 실패하면 replay()로 지금까지 소비한 부분을 같은 의미의 JSON 텍스트로 되살려
+호출한 쪽이 기존 방식(json.loads)으로 다시 파싱할 수 있다.
+"""
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+# 새 청크에 이 문자들이 있을 때만 값 디코딩을 다시 시도 (값이 끝날 수 있는 지점)
+_VALUE_TERMINATORS = set('"}],')
+
+
+class StreamParseError(ValueError):
+    pass
+
+
+class ReceiptStreamParser:
+    """feed()로 텍스트 청크를 넣으면 완성된 (이벤트, 값) 목록을 돌려줍니다.
+    이벤트: 최상위 키 이름(storeName 등) 또는 items 배열 원소마다 "item".
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._state = "start"      # start → key → colon → value/items → comma → done
+        self._key: str | None = None
+        self._retry = True
+        self._preamble = ""         # '{' 앞에서 버린 텍스트 (```json 펜스 등)
+        self._members: list[str] = []   # 완성된 최상위 키 (도착 순서)
+        self._item_comma = False    # items 안에서 ','를 소비하고 다음 원소를 기다리는 중
+        self.result: dict = {"items": []}
+        self.done = False
+
+    def replay(self) -> str:
+        """지금까지 소비한 텍스트와 같은 의미의 JSON 텍스트 + 아직 소비하지 않은 버퍼.
+        StreamParseError 이후 이 문자열에 남은 청크를 이어 붙이면 원래 응답과 같은 값으로 파싱된다.
+        """
+        if self._state == "start":
+            return self._preamble + self._buf
+        parts = [f"{json.dumps(key, ensure_ascii=False)}: {json.dumps(self.result[key], ensure_ascii=False)}"
+                 for key in self._members]
+        text = self._preamble + "{" + ", ".join(parts)
+        sep = ", " if parts else ""
+        if self._state == "key" and parts:
+            text += sep
+        elif self._state in ("colon", "value", "items"):
+            text += sep + json.dumps(self._key, ensure_ascii=False)
+            if self._state in ("value", "items"):
+                text += ": "
+            if self._state == "items":
+                text += "[" + ", ".join(json.dumps(item, ensure_ascii=False) for item in self.result["items"])
+                text += ", " if self._item_comma else ""
+        elif self.done:
+            text += "}"
+        return text + self._buf
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        self._buf += chunk
+        if not self._retry and not _VALUE_TERMINATORS.intersection(chunk):
+            return []
+        events: list[tuple[str, object]] = []
+        while self._step(events):
+            pass
+        return events
+
+    def _skip_ws(self) -> None:
+        self._buf = self._buf.lstrip(_WHITESPACE)
+
+    def _decode(self) -> tuple[object, bool]:
+        """버퍼 앞부분에서 JSON 값 하나를 디코딩합니다. 미완성이면 (None, False)."""
+        try:
+            value, end = _decoder.raw_decode(self._buf)
+        except json.JSONDecodeError:
+            self._retry = False
+            return None, False
+        # 숫자/리터럴은 뒤에 구분자가 와야 완성된 값으로 본다 ("10" + "00" 분할 방지)
+        if end == len(self._buf) and not isinstance(value, (str, dict, list)):
+            self._retry = False
+            return None, False
+        self._buf = self._buf[end:]
+        self._retry = True
+        return value, True
+
+    def _step(self, events: list) -> bool:
+        """상태 하나를 진행합니다. 더 진행할 데이터가 없으면 False."""
+        self._skip_ws()
+        if not self._buf or self.done:
+            return False
+
+        if self._state == "start":
+            # ```json 펜스 등 '{' 앞의 텍스트는 버림
+            idx = self._buf.find("{")
+            if idx < 0:
+                self._preamble += self._buf
+                self._buf = ""
+                return False
+            self._preamble += self._buf[:idx]
+            self._buf = self._buf[idx + 1:]
+            self._state = "key"
+            return True
+
+        if self._state in ("key", "comma"):
+            if self._buf[0] == "}":
+                self._buf = self._buf[1:]
+                self.done = True
+                return False
+            if self._state == "comma":
+                if self._buf[0] != ",":
+                    raise StreamParseError(f"',' 필요: {self._buf[:20]!r}")
+                self._buf = self._buf[1:]
+                self._state = "key"
+                return True
+            if self._buf[0] != '"':
+                raise StreamParseError(f"키 필요: {self._buf[:20]!r}")
+            key, ok = self._decode()
+            if not ok:
+                return False
+            self._key = key
+            self._state = "colon"
+            return True
+
+        if self._state == "colon":
+            if self._buf[0] != ":":
+                raise StreamParseError(f"':' 필요: {self._buf[:20]!r}")
+            self._buf = self._buf[1:]
+            self._state = "value"
+            return True
+
+        if self._state == "value":
+            if self._key == "items" and self._buf[0] == "[":
+                self._buf = self._buf[1:]
+                self._state = "items"
+                return True
+            value, ok = self._decode()
+            if not ok:
+                return False
+            self.result[self._key] = value
+            self._members.append(self._key)
+            events.append((self._key, value))
+            self._state = "comma"
+            return True
+
+        if self._state == "items":
+            if self._buf[0] == "]":
+                self._buf = self._buf[1:]
+                self._members.append("items")
+                self._item_comma = False
+                self._state = "comma"
+                return True
+            if self._buf[0] == ",":
+                self._buf = self._buf[1:]
+                self._item_comma = True
+                return True
+            item, ok = self._decode()
+            if not ok:
+                return False
+            self._item_comma = False
+            self.result["items"].append(item)
+            events.append(("item", item))
+            return True
+
+        return False
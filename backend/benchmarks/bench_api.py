@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""API 부하 테스트 / 회귀 검사.
+
+main.py의 라우트를 ASGI로 직접 호출해 (네트워크 없이) 라우트별 p50/p99 지연과 처리량을 잰다.
+- Supabase: FakeClient(--db-latency초 왕복), seed_rows()로 만든 1k/10k/100k건 합성 영수증
+- Gemini: StubGeminiModel(--ocr-latency초). 요청마다 다른 이미지를 보내 OCR 캐시를 거치지 않음
+- 통계 캐시는 끄고 측정 (매 요청이 DB 경로를 탄다). "(cached)" 라우트만 캐시를 켜고 적중/304 재검증을 잰다
+- 관리 루프(/api/admin/cleanup, migrate-discounts, link-products)는 규모와 관계없이
+  fakes.ADMIN_BACKLOG건의 레거시 데이터를 배치 RPC로 처리 (가짜 클라이언트는 데이터를 고치지 않으므로 매번 같은 양)
+--baseline 파일과 비교해 p50/p99가 허용 범위(--tolerance)를 넘게 느려지거나 처리량이 떨어지면 종료 코드 1.
+기준값은 측정한 머신에 따라 다르므로 같은 머신에서 --save-baseline으로 만든 파일과 비교한다.
+실행: `cd backend && python -m benchmarks.bench_api [--scales 1000 10000 100000] [--save-baseline]`
+"""
+import argparse
+import asyncio
+import base64
+import gc
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+# app.main이 import 시점에 읽는 설정: 작업 DB는 임시 파일, 작업 대기열은 측정 요청 수보다 크게
+_TMP = tempfile.mkdtemp(prefix="bench_api_")
+os.environ["OCR_JOBS_DB"] = os.path.join(_TMP, "ocr_jobs.db")
+os.environ["OCR_JOB_QUEUE_SIZE"] = "1000000"
+os.environ["OCR_CACHE_DB"] = ""
+os.environ["DB_BACKEND"] = "supabase"
+
+import httpx  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from app import main  # noqa: E402
+from app.services.stats_cache import StatsCache  # noqa: E402
+from .fakes import FakeClient, StubGeminiModel, seed_rows  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline_api.json")
+
+_RECEIPT = {
+    "storeName": "케이할인마트",
+    "cardName": "신한카드",
+    "purchaseDateTime": "25-02-02 14:30",
+    "rawText": "",
+    "items": [{"no": "001", "name": "서울우유 1L", "unitPrice": 2980, "quantity": 1, "amount": 2980}],
+}
+
+
+@dataclass
+class Route:
+    name: str
+    method: str
+    url: Callable[[int], str]
+    body: Callable[[int], dict] = lambda i: {}
+    expected_status: int = 200
+    stats_cache: bool = False   # True면 통계 응답 캐시를 켜고 측정
+
+
+class Images:
+    """요청마다 서로 다른 PNG (OCR 캐시 적중 방지). 미리 만들어 두어 측정에서 제외"""
+
+    def __init__(self, count: int):
+        self._images = []
+        for i in range(count):
+            buffer = io.BytesIO()
+            Image.new("RGB", (64, 96), (i % 256, (i // 256) % 256, (i // 65536) % 256)).save(buffer, "PNG")
+            self._images.append(buffer.getvalue())
+        self._next = 0
+
+    def take(self) -> bytes:
+        data = self._images[self._next % len(self._images)]
+        self._next += 1
+        return data
+
+
+def _routes(images: Images, state: dict, batch_images: int) -> list[Route]:
+    def upload(i):
+        return {"files": {"image": ("receipt.png", images.take(), "image/png")}}
+
+    return [
+        Route("GET /", "GET", lambda i: "/"),
+        Route("GET /health", "GET", lambda i: "/health"),
+        Route("GET /api/receipts", "GET", lambda i: "/api/receipts?limit=20"),
+        Route("GET /api/receipts?cursor", "GET", lambda i: f"/api/receipts?limit=20&cursor={state['cursor']}"),
+        Route("GET /api/receipts?start_date", "GET",
+              lambda i: "/api/receipts?limit=20&start_date=2025-01-01&end_date=2025-01-31"),
+        Route("GET /api/receipts?search", "GET", lambda i: "/api/receipts?limit=20&search=우유"),
+        Route("GET /api/receipts/{id}", "GET", lambda i: f"/api/receipts/{state['receipt_ids'][i % 100]}"),
+        Route("POST /api/receipts", "POST", lambda i: "/api/receipts", lambda i: {"json": _RECEIPT}),
+        Route("POST /api/receipts/bulk", "POST", lambda i: "/api/receipts/bulk", lambda i: {"json": [_RECEIPT] * 10}),
+        Route("POST /api/receipts/{id}/discounts", "POST", lambda i: "/api/receipts/1/discounts",
+              lambda i: {"json": {"name": "쿠폰할인", "amount": 500}}),
+        Route("DELETE /api/receipts/{id}", "DELETE", lambda i: f"/api/receipts/{state['receipt_ids'][i % 100]}"),
+        Route("GET /api/export?csv", "GET",
+              lambda i: "/api/export?format=csv&start_date=2025-01-01&end_date=2025-01-31"),
+        Route("GET /api/export?ndjson", "GET",
+              lambda i: "/api/export?format=ndjson&start_date=2025-01-01&end_date=2025-01-31"),
+        Route("GET /api/export?parquet", "GET",
+              lambda i: "/api/export?format=parquet&start_date=2025-01-01&end_date=2025-01-31"),
+        Route("GET /api/stats/summary", "GET", lambda i: "/api/stats/summary"),
+        Route("GET /api/stats/monthly", "GET", lambda i: "/api/stats/monthly"),
+        Route("GET /api/stats/by-store", "GET", lambda i: "/api/stats/by-store"),
+        Route("GET /api/stats/by-card", "GET", lambda i: "/api/stats/by-card"),
+        Route("GET /api/stats/frequent-items", "GET", lambda i: "/api/stats/frequent-items"),
+        Route("GET /api/stats/dashboard", "GET", lambda i: "/api/stats/dashboard"),
+        Route("GET /api/stats/store/{name}/cards", "GET", lambda i: "/api/stats/store/이마트/cards"),
+        Route("GET /api/stats/dashboard (cached)", "GET", lambda i: "/api/stats/dashboard", stats_cache=True),
+        Route("GET /api/stats/dashboard (cached, 304)", "GET", lambda i: "/api/stats/dashboard",
+              lambda i: {"headers": {"If-None-Match": state["dashboard_etag"]}},
+              expected_status=304, stats_cache=True),
+        Route("POST /api/admin/cleanup", "POST", lambda i: "/api/admin/cleanup"),
+        Route("POST /api/admin/cleanup?stream", "POST", lambda i: "/api/admin/cleanup?stream=true"),
+        Route("POST /api/admin/migrate-discounts", "POST", lambda i: "/api/admin/migrate-discounts"),
+        Route("POST /api/admin/migrate-discounts?dry_run", "POST",
+              lambda i: "/api/admin/migrate-discounts?dry_run=true"),
+        Route("POST /api/admin/link-products", "POST", lambda i: "/api/admin/link-products"),
+        Route("POST /api/admin/rollups/rebuild", "POST", lambda i: "/api/admin/rollups/rebuild"),
+        Route("GET /api/admin/rollups/verify", "GET", lambda i: "/api/admin/rollups/verify"),
+        Route("GET /api/admin/duplicates", "GET", lambda i: "/api/admin/duplicates"),
+        Route("POST /api/ocr", "POST", lambda i: "/api/ocr",
+              lambda i: {"json": {"image": base64.b64encode(images.take()).decode("ascii")}}),
+        Route("POST /api/ocr/upload", "POST", lambda i: "/api/ocr/upload", upload),
+        Route("POST /api/ocr/stream", "POST", lambda i: "/api/ocr/stream", upload),
+        Route("POST /api/ocr/batch", "POST", lambda i: "/api/ocr/batch", lambda i: {"files": [
+            ("images", (f"{n}.png", images.take(), "image/png")) for n in range(batch_images)
+        ]}),
+        Route("GET /api/ocr/jobs/{id}", "GET", lambda i: f"/api/ocr/jobs/{state['job_id']}"),
+        # 작업은 백그라운드에서 처리되므로 다른 OCR 라우트에 영향을 주지 않도록 마지막에 측정
+        Route("POST /api/ocr/jobs", "POST", lambda i: "/api/ocr/jobs", upload, expected_status=202),
+    ]
+
+
+def _failed(response: httpx.Response, route: Route) -> bool:
+    if response.status_code != route.expected_status:
+        return True
+    if response.headers.get("content-type", "").startswith("application/json"):
+        return response.json().get("success") is False
+    return False
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def _measure(client: httpx.AsyncClient, route: Route, requests: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        kwargs = route.body(i)
+        async with sem:
+            started = time.perf_counter()
+            response = await client.request(route.method, route.url(i), **kwargs)
+            latencies.append(time.perf_counter() - started)
+        if _failed(response, route):
+            errors += 1
+
+    # 워밍업 (첫 요청의 지연 import/연결 생성 등은 측정에서 제외)
+    await asyncio.gather(*(one(requests + i) for i in range(concurrency)))
+    latencies.clear()
+    errors = 0
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "rps":    round(requests / elapsed, 1),
+        "errors": errors,
+    }
+
+
+async def _prepare(client: httpx.AsyncClient, images: Images, rows: dict) -> dict:
+    """커서/상세 조회/작업 조회에 쓸 값을 미리 준비"""
+    first_page = (await client.get("/api/receipts?limit=20")).json()
+    dashboard = await client.get("/api/stats/dashboard")
+    job = (await client.post("/api/ocr/jobs", files={"image": ("r.png", images.take(), "image/png")})).json()
+    while (await client.get(f"/api/ocr/jobs/{job['job_id']}")).json()["status"] in ("queued", "running"):
+        await asyncio.sleep(0.01)
+    return {
+        "cursor": first_page["next_cursor"],
+        "receipt_ids": [r["id"] for r in rows["receipts"][::max(1, len(rows["receipts"]) // 100)]][:100],
+        "job_id": job["job_id"],
+        "dashboard_etag": dashboard.headers["ETag"],
+    }
+
+
+async def _run_scale(scale: int, args, images: Images) -> dict:
+    rows, presorted = seed_rows(scale)
+    fake = FakeClient(latency=args.db_latency, rows=rows, presorted=presorted)
+    # 가짜 인덱스는 첫 조회 때 만들어지므로 측정 전에 미리 생성
+    fake.lookup("receipts", "id", None)
+    fake.range("receipts", "purchase_date", [])
+    # 합성 데이터(100k건이면 수십만 객체)를 GC 추적 대상에서 빼서 측정 중 GC 일시 정지를 줄임
+    gc.collect()
+    gc.freeze()
+    main.db_service.client = fake
+    main.stats_service.client = fake
+    main.ocr_service.model = StubGeminiModel(latency=args.ocr_latency)
+
+    transport = httpx.ASGITransport(app=main.app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        state = await _prepare(client, images, rows)
+        for route in _routes(images, state, args.batch_images):
+            if args.routes and not any(o in route.name for o in args.routes):
+                continue
+            main.stats_cache = StatsCache() if route.stats_cache else StatsCache(max_size=0)
+            results[route.name] = await _measure(client, route, args.requests, args.concurrency)
+            r = results[route.name]
+            print(f"{scale:>7}  {route.name:<44} p50 {r['p50_ms']:>8.2f}ms  p99 {r['p99_ms']:>8.2f}ms"
+                  f"  {r['rps']:>8.1f} req/s  errors {r['errors']}")
+        # 마지막 라우트(작업 등록)로 쌓인 백그라운드 작업을 비우고 다음 규모로
+        while main.job_service._queue.qsize():
+            await asyncio.sleep(0.05)
+    return results
+
+
+def _worse(current: float, base: float, tolerance: float, min_delta: float) -> bool:
+    """비율(tolerance)과 절대값(min_delta ms) 기준을 모두 넘어야 회귀 (1ms 미만 라우트의 잡음 무시)"""
+    return current > base * (1 + tolerance) and current - base > min_delta
+
+
+def _regressions(results: dict, baseline: dict, tolerance: float, p99_tolerance: float,
+                 min_delta: float) -> list[str]:
+    problems = []
+    for scale, routes in results.items():
+        for name, current in routes.items():
+            base = baseline.get("results", {}).get(scale, {}).get(name)
+            if current["errors"]:
+                problems.append(f"{scale} {name}: 오류 {current['errors']}건")
+            if not base:
+                continue
+            if _worse(current["p50_ms"], base["p50_ms"], tolerance, min_delta):
+                problems.append(f"{scale} {name}: p50 {base['p50_ms']}ms → {current['p50_ms']}ms")
+            if _worse(current["p99_ms"], base["p99_ms"], p99_tolerance, min_delta):
+                problems.append(f"{scale} {name}: p99 {base['p99_ms']}ms → {current['p99_ms']}ms")
+            # 처리량은 요청당 시간(1000 / req/s ms)으로 비교
+            if _worse(1000 / current["rps"], 1000 / base["rps"], tolerance, min_delta):
+                problems.append(f"{scale} {name}: 처리량 {base['rps']} → {current['rps']} req/s")
+    return problems
+
+
+async def run(args) -> int:
+    # OCR 캐시는 규모를 바꿔도 유지되므로 전체 실행에서 이미지가 겹치지 않도록 한 번에 생성
+    # (OCR 라우트 4개는 요청당 1장, batch는 --batch-images장)
+    images = Images(len(args.scales) * (args.requests + args.concurrency) * (args.batch_images + 4) + 16)
+    # lifespan이 작업 서비스를 만들고 워커를 띄움 (ASGITransport는 lifespan을 실행하지 않음)
+    async with main.lifespan(main.app):
+        results = {str(scale): await _run_scale(scale, args, images) for scale in args.scales}
+
+    config = {k: getattr(args, k) for k in ("requests", "concurrency", "db_latency", "ocr_latency", "batch_images")}
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({"config": config, "results": results}, ensure_ascii=False, indent=2)
+                                 + "\n", encoding="utf-8")
+        print(f"기준값 저장: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"기준값 파일이 없습니다: {args.baseline} (--save-baseline으로 생성)")
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("config") != config:
+        print(f"경고: 측정 설정이 기준값과 다릅니다. 기준값 {baseline.get('config')}, 현재 {config}")
+    problems = _regressions(results, baseline, args.tolerance, args.p99_tolerance, args.min_delta_ms)
+    for problem in problems:
+        print(f"[regression] {problem}")
+    print("회귀 없음" if not problems else f"회귀 {len(problems)}건")
+    return 1 if problems else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000], help="합성 영수증 수")
+    parser.add_argument("--requests", type=int, default=200, help="라우트별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--db-latency", type=float, default=0.005, help="PostgREST 왕복 지연(초)")
+    parser.add_argument("--ocr-latency", type=float, default=0.05, help="Gemini 응답 지연(초)")
+    parser.add_argument("--batch-images", type=int, default=4, help="/api/ocr/batch 요청당 이미지 수")
+    parser.add_argument("--routes", nargs="*", default=[], help="이름에 이 문자열이 들어간 라우트만 측정")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="결과를 기준값으로 저장")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="p50/처리량 허용 악화 비율")
+    parser.add_argument("--p99-tolerance", type=float, default=0.5, help="p99 허용 악화 비율")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="이보다 작은 지연 증가는 회귀로 보지 않음")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
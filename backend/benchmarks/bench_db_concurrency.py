@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""DB 호출 동시성 벤치마크.
+
+동기 `.execute()`를 이벤트 루프에서 바로 호출할 때와 DB 스레드 풀로 넘길 때의
+처리량을 비교한다. 실행: `cd backend && python -m benchmarks.bench_db_concurrency`
+"""
+import argparse
+import asyncio
+import time
+
+from app.services.db_service import DatabaseService
+from app.services.stats_service import StatsService
+from .fakes import FakeClient
+
+
+async def _blocking_summary(client):
+    # 변경 전 방식: 이벤트 루프 안에서 동기 호출
+    return client.table("receipts").select("total_amount").execute()
+
+
+async def _run(label: str, coro_factory, requests: int, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            await coro_factory()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} {requests} req / {elapsed:.2f}s = {requests / elapsed:,.1f} req/s")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="PostgREST 왕복 지연(초)")
+    args = parser.parse_args()
+
+    client = FakeClient(latency=args.latency, rows={
+        "receipts": [{"total_amount": 1000}],
+        "stats_summary": [{"total_amount": 1000, "receipt_count": 1}],
+    })
+    db = DatabaseService()
+    db.client = client
+    stats = StatsService(client)
+
+    await _run("blocking", lambda: _blocking_summary(client), args.requests, args.concurrency)
+    await _run("executor", lambda: stats.get_summary(), args.requests, args.concurrency)
+    await _run("receipts", lambda: db.get_receipts(limit=20), args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
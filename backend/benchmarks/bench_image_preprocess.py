@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""이미지 전처리 정확도/지연 벤치마크.
+
+샘플 영수증 디렉터리의 각 이미지에 대해 전처리 전/후 바이트 수와 전처리 시간을 측정한다.
+`--ocr`를 주면(GEMINI_API_KEY 필요) 원본과 전처리본을 각각 Gemini에 보내
+응답 시간과 인식된 상품 줄(name, amount) 일치율을 비교한다.
+실행: `cd backend && python -m benchmarks.bench_image_preprocess <샘플 디렉터리> [--ocr]`
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from app.services import image_preprocess
+from app.services.ocr_service import OCRService, _PROMPT
+
+_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".heic"}
+
+
+def _item_lines(result) -> set:
+    return {(i.get("name"), i.get("amount")) for i in result.get("items", [])}
+
+
+async def _ocr(service: OCRService, data: bytes, mime_type: str) -> tuple[dict, float]:
+    started = time.perf_counter()
+    response = await service._generate([_PROMPT, {"mime_type": mime_type, "data": data}])
+    elapsed = time.perf_counter() - started
+    return service._parse_text(response.text), elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("samples", type=Path)
+    parser.add_argument("--ocr", action="store_true", help="Gemini로 정확도/지연까지 비교")
+    args = parser.parse_args()
+
+    paths = sorted(p for p in args.samples.iterdir() if p.suffix.lower() in _EXTENSIONS)
+    service = OCRService() if args.ocr else None
+    total_before = total_after = 0
+
+    for path in paths:
+        raw = path.read_bytes()
+        started = time.perf_counter()
+        processed, mime_type, stats = image_preprocess.preprocess_image(raw)
+        prep_ms = (time.perf_counter() - started) * 1000
+        total_before += stats["bytes_before"]
+        total_after += stats["bytes_after"]
+        line = (
+            f"{path.name:<32} {stats['bytes_before'] / 1024:8.0f}KB → {stats['bytes_after'] / 1024:6.0f}KB "
+            f"{prep_ms:6.0f}ms"
+        )
+
+        if service:
+            original, t_orig = await _ocr(service, raw, "image/jpeg")
+            reduced, t_prep = await _ocr(service, processed, mime_type)
+            expected = _item_lines(original)
+            matched = len(expected & _item_lines(reduced))
+            line += f"  ocr {t_orig:5.1f}s → {t_prep:5.1f}s  items {matched}/{len(expected)}"
+
+        print(line)
+
+    if paths:
+        print(f"total {total_before / 1024:.0f}KB → {total_after / 1024:.0f}KB "
+              f"({total_after / total_before:.0%})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""결제수단 감지 마이크로 벤치마크.
+
+기존 `in` 체인(키워드마다 raw_text 전체를 다시 훑음)과 컴파일된 단일 패스 검출기를
+합성 raw_text(키워드 없음 / 앞쪽 / 뒤쪽)에 대해 비교하고, 두 결과가 같은지 확인한다.
+실행: `cd backend && python -m benchmarks.bench_payment_detector [--n 20000]`
+"""
+import argparse
+import random
+import timeit
+
+from app.services.payment_detector import detect_payment_method
+
+
+def legacy_detect(raw_text: str) -> str | None:
+    """변경 전 DatabaseService._detect_payment_method"""
+    if not raw_text:
+        return None
+
+    text_lower = raw_text.lower()
+
+    if "배민1" in raw_text or "배민 1" in raw_text or "baemin1" in text_lower or "baemin 1" in text_lower:
+        return "배민1(one)"
+    if "배달의민족" in raw_text or "배민" in raw_text or "baemin" in text_lower:
+        return "배달의민족"
+    if "요기요" in raw_text or "yogiyo" in text_lower:
+        return "요기요"
+    if "쿠팡이츠" in raw_text or "쿠팡 이츠" in raw_text or "coupang eats" in text_lower:
+        return "쿠팡이츠"
+    if "땡겨요" in raw_text:
+        return "땡겨요"
+    if "카카오페이" in raw_text or "kakaopay" in text_lower or "kakao pay" in text_lower:
+        return "카카오페이"
+    if "네이버페이" in raw_text or "naverpay" in text_lower or "naver pay" in text_lower:
+        return "네이버페이"
+    if "삼성페이" in raw_text or "samsung pay" in text_lower:
+        return "삼성페이"
+    if "애플페이" in raw_text or "apple pay" in text_lower:
+        return "애플페이"
+    if "토스페이" in raw_text or "toss pay" in text_lower:
+        return "토스페이"
+    if "토스" in raw_text or "toss" in text_lower:
+        return "토스"
+    if "현금" in raw_text:
+        return "현금"
+
+    return None
+
+
+_LINES = ["서울우유 1L 2,980", "CJ 햇반 210g 1,200", "농심 신라면 5입 4,150", "부가세 과세물품", "합계 금액"]
+
+
+def _receipt(rng: random.Random, lines: int, keyword: str | None, position: str) -> str:
+    body = [rng.choice(_LINES) for _ in range(lines)]
+    if keyword:
+        body.insert(0 if position == "head" else len(body), f"결제수단 {keyword}")
+    return "\n".join(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20000, help="케이스별 반복 횟수")
+    parser.add_argument("--lines", type=int, default=40, help="영수증 한 장의 줄 수")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    cases = {
+        "키워드 없음": _receipt(rng, args.lines, None, "tail"),
+        "배민1 (앞쪽)": _receipt(rng, args.lines, "배민1", "head"),
+        "현금 (뒤쪽)": _receipt(rng, args.lines, "현금", "tail"),
+        "TOSS PAY (대문자)": _receipt(rng, args.lines, "TOSS PAY", "tail"),
+    }
+
+    print(f"{'case':<20} {'legacy µs':>10} {'compiled µs':>12} {'speedup':>8}")
+    for name, text in cases.items():
+        assert legacy_detect(text) == detect_payment_method(text), name
+        legacy = timeit.timeit(lambda: legacy_detect(text), number=args.n) / args.n * 1e6
+        compiled = timeit.timeit(lambda: detect_payment_method(text), number=args.n) / args.n * 1e6
+        print(f"{name:<20} {legacy:10.2f} {compiled:12.2f} {legacy / compiled:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
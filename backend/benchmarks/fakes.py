@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*-
+"""벤치마크용 가짜 Supabase 클라이언트 / Gemini 모델.
+
+PostgREST 쿼리 빌더와 같은 체이닝 인터페이스를 흉내 내고,
+`.execute()`에서 지정한 지연(latency)만큼 블로킹한 뒤 결과를 돌려준다.
+- rows[테이블 또는 RPC 이름]: 리스트면 eq/gt/gte/lt/lte/is_/in_/or_/order/limit/select를 실제로 적용,
+  호출 가능한 값이면 RPC 파라미터로 호출한 결과, 그 밖의 값은 그대로 반환
+- presorted[테이블]: 데이터가 이미 그 순서(첫 컬럼은 DESC, NULL 먼저)로 정렬돼 있으면 같은 order() 요청에서
+  정렬을 건너뛰고 limit만큼 찾으면 멈춘다. eq()는 해시 인덱스, 첫 정렬 컬럼의 범위 조건은 이진 탐색으로 후보를 좁힌다
+  (100k 규모에서도 가짜 클라이언트의 전체 스캔 비용이 측정을 가리지 않도록 — 실제 DB의 인덱스에 해당)
+- insert/update/delete는 데이터를 바꾸지 않는다 (반복 측정 결과가 같도록)
+seed_rows()는 1k/10k/100k 규모의 합성 영수증/상품 데이터와 통계·관리 RPC 결과를 만든다.
+"""
+import asyncio
+import json
+import random
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import islice
+
+_OPS = {
+    "eq":  lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt":  lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt":  lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+def _compare(op: str, column: str, value):
+    def predicate(row):
+        actual = row.get(column)
+        return actual is not None and _OPS[op](actual, value)
+    return predicate
+
+
+def _split_top_level(expr: str) -> list[str]:
+    """PostgREST 논리 표현식을 최상위 콤마 기준으로 분리 (괄호/따옴표 안은 무시)"""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(expr):
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and ch == "," and depth == 0:
+            parts.append(expr[start:i])
+            start = i + 1
+    parts.append(expr[start:])
+    return parts
+
+
+def _parse_value(value: str):
+    value = value.strip('"')
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _parse_condition(expr: str):
+    """or_()의 조건 하나: and(...)/or(...) 또는 col.op.value / col.not.is.null"""
+    for group, combine in (("and(", all), ("or(", any)):
+        if expr.startswith(group):
+            terms = [_parse_condition(t) for t in _split_top_level(expr[len(group):-1])]
+            return lambda row, terms=terms, combine=combine: combine(t(row) for t in terms)
+
+    column, rest = expr.split(".", 1)
+    negate = rest.startswith("not.")
+    if negate:
+        rest = rest[4:]
+    op, value = rest.split(".", 1)
+    if op == "is":
+        predicate = lambda row: row.get(column) is None  # noqa: E731
+    else:
+        predicate = _compare(op, column, _parse_value(value))
+    return (lambda row: not predicate(row)) if negate else predicate
+
+
+def _simple_eq(expr: str) -> tuple[str, object] | None:
+    """col.eq.value / col.is.null이면 (col, value). 그 밖의 조건은 None"""
+    parts = expr.split(".", 2)
+    if len(parts) != 3 or parts[0] in ("and(", "or("):
+        return None
+    column, op, value = parts
+    if op == "is" and value == "null":
+        return column, None
+    if op == "eq":
+        return column, _parse_value(value)
+    return None
+
+
+def _select_columns(columns: str) -> list[str] | None:
+    """select("a, b, items(x, y)") → ["a", "b", "items"]. "*"이면 None"""
+    names = [part.strip().split("(", 1)[0] for part in _split_top_level(columns)]
+    return None if "*" in names else names
+
+
+def _sort_key(column: str):
+    # (NULL 여부, 값): PostgreSQL처럼 ASC는 NULL 마지막, DESC(reverse)는 NULL 먼저
+    return lambda row: (row.get(column) is None, row.get(column) if row.get(column) is not None else "")
+
+
+class FakeQuery:
+    def __init__(self, client, table: str, params: dict | None = None):
+        self.client = client
+        self.table_name = table
+        self.params = params or {}
+        self._filters = []
+        self._eq: list[tuple[str, object]] = []
+        self._any_eq: list[tuple[str, object]] | None = None
+        self._ranges: list[tuple[str, str, object]] = []
+        self._order: list[tuple[str, bool]] = []
+        self._limit = None
+        self._columns = None
+        self._written = None
+
+    def __getattr__(self, name):
+        # ilike/range/... 그 밖의 메서드는 결과에 영향 없이 체이닝
+        return lambda *args, **kwargs: self
+
+    def select(self, columns: str = "*", **kwargs):
+        self._columns = _select_columns(columns)
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(_compare("eq", column, value))
+        self._eq.append((column, value))
+        return self
+
+    def neq(self, column, value):
+        self._filters.append(_compare("neq", column, value))
+        return self
+
+    def gt(self, column, value):
+        self._filters.append(_compare("gt", column, value))
+        self._ranges.append(("gt", column, value))
+        return self
+
+    def gte(self, column, value):
+        self._filters.append(_compare("gte", column, value))
+        self._ranges.append(("gte", column, value))
+        return self
+
+    def lt(self, column, value):
+        self._filters.append(_compare("lt", column, value))
+        self._ranges.append(("lt", column, value))
+        return self
+
+    def lte(self, column, value):
+        self._filters.append(_compare("lte", column, value))
+        self._ranges.append(("lte", column, value))
+        return self
+
+    def is_(self, column, value):
+        self._filters.append(lambda row: row.get(column) is None)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def or_(self, expr: str):
+        parts = _split_top_level(expr)
+        terms = [_parse_condition(t) for t in parts]
+        self._filters.append(lambda row: any(t(row) for t in terms))
+        # 한 컬럼의 eq/is.null만 OR로 묶은 조건은 해시 인덱스로 후보를 좁힘 (예: card_name.is.null,card_name.eq.)
+        simple = [_simple_eq(part) for part in parts]
+        if all(simple) and len({column for column, _ in simple}) == 1:
+            self._any_eq = simple
+        return self
+
+    def order(self, column, desc: bool = False, **kwargs):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, n: int, **kwargs):
+        self._limit = n
+        return self
+
+    def insert(self, row, **kwargs):
+        self._written = row if isinstance(row, list) else [row]
+        return self
+
+    def update(self, values, **kwargs):
+        self._written = []
+        return self
+
+    def upsert(self, row, **kwargs):
+        return self.insert(row)
+
+    def _candidates(self, data: list) -> list:
+        """인덱스로 좁힌 후보 행 (원래 순서 유지). 조건 자체는 _rows에서 다시 모두 적용"""
+        if self._eq:
+            return self.client.lookup(self.table_name, *self._eq[0])
+        if self._any_eq:
+            return [row for column, value in self._any_eq for row in self.client.lookup(self.table_name, column, value)]
+        presorted = self.client.presorted.get(self.table_name)
+        if presorted:
+            column = presorted[0][0]
+            bounds = [(op, value) for op, c, value in self._ranges if c == column]
+            if bounds:
+                return self.client.range(self.table_name, column, bounds)
+        return data
+
+    def _rows(self, data: list) -> list:
+        rows = self._candidates(data)
+        if self._order and self._order != self.client.presorted.get(self.table_name):
+            rows = list(rows)
+            for column, desc in reversed(self._order):
+                rows.sort(key=_sort_key(column), reverse=desc)
+        if self._filters:
+            rows = (row for row in rows if all(f(row) for f in self._filters))
+        rows = list(islice(rows, self._limit)) if self._limit is not None else list(rows)
+        if self._columns:
+            rows = [{c: row.get(c) for c in self._columns} for row in rows]
+        return rows
+
+    def execute(self):
+        time.sleep(self.client.latency)
+        if self._written is not None:
+            return FakeResult(self._written)
+        data = self.client.rows.get(self.table_name, [])
+        if callable(data):
+            return FakeResult(data(self.params))
+        if isinstance(data, list) and data and isinstance(data[0], dict):
+            return FakeResult(self._rows(data))
+        return FakeResult(data)
+
+
+class FakeClient:
+    def __init__(self, latency: float = 0.05, rows: dict | None = None,
+                 presorted: dict[str, list[tuple[str, bool]]] | None = None):
+        self.latency = latency
+        self.rows = rows or {}
+        self.presorted = presorted or {}
+        self._indexes = {}
+
+    def lookup(self, table: str, column: str, value) -> list:
+        """column = value인 행 (해시 인덱스, 처음 조회할 때 생성)"""
+        key = (table, column)
+        if key not in self._indexes:
+            index = defaultdict(list)
+            for row in self.rows[table]:
+                index[row.get(column)].append(row)
+            self._indexes[key] = index
+        return self._indexes[key].get(value, [])
+
+    def range(self, table: str, column: str, bounds: list[tuple[str, object]]) -> list:
+        """presorted 첫 컬럼(DESC, NULL 먼저)의 범위 조건을 만족하는 연속 구간 (이진 탐색)"""
+        key = (table, column, "range")
+        rows = self.rows[table]
+        if key not in self._indexes:
+            nulls = sum(1 for row in rows if row.get(column) is None)
+            self._indexes[key] = (nulls, [row[column] for row in reversed(rows[nulls:])])
+        nulls, ascending = self._indexes[key]
+        lo, hi = 0, len(ascending)
+        for op, value in bounds:
+            if op == "gte":
+                lo = max(lo, bisect_left(ascending, value))
+            elif op == "gt":
+                lo = max(lo, bisect_right(ascending, value))
+            elif op == "lt":
+                hi = min(hi, bisect_left(ascending, value))
+            else:
+                hi = min(hi, bisect_right(ascending, value))
+        end = nulls + len(ascending)
+        return rows[end - hi:end - lo] if lo < hi else []
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, fn: str, params: dict | None = None) -> FakeQuery:
+        return FakeQuery(self, fn, params)
+
+
+# ── 합성 데이터 ──────────────────────────────────────────────────────────────
+_STORES = ["케이할인마트", "이마트", "홈플러스", "롯데마트", "GS25"]
+_CARDS = ["신한카드", "롯데카드", "하나카드", "현금", "카카오페이"]
+_PRODUCTS = ["서울우유 1L", "씬피넛버터샌드 80g", "신라면 5입", "바나나", "계란 30구",
+             "두부 300g", "콜라 1.5L", "삼겹살 500g", "양파 1.5kg", "햇반 210g"]
+
+# receipts 목록/내보내기 쿼리의 기본 정렬 (DatabaseService와 같은 keyset 순서)
+RECEIPTS_ORDER = [("purchase_date", True), ("id", True)]
+
+# 관리 루프(정리/할인 이전/상품 연결)가 처리할 레거시 데이터 건수.
+# 가짜 클라이언트는 데이터를 고치지 않으므로 요청마다 같은 양을 처리하고, 규모와 관계없이 일정하게 둔다
+ADMIN_BACKLOG = 2000
+
+
+def _batches(total: int, after: int, limit: int) -> tuple[int, int]:
+    """id 1..total 중 after 다음부터 limit건: (처리 건수, 마지막 id)"""
+    scanned = max(0, min(limit, total - after))
+    return scanned, after + scanned
+
+
+def _cleanup_item_numbers(params: dict) -> list[dict]:
+    scanned, last = _batches(ADMIN_BACKLOG, params["p_after_receipt_id"], params["p_limit"])
+    return [{"receipts_scanned": scanned, "items_fixed": scanned, "last_receipt_id": last}] if scanned else []
+
+
+def _migrate_discount_items(params: dict) -> list[dict]:
+    scanned, last = _batches(ADMIN_BACKLOG, params["p_after_id"], params["p_limit"])
+    if not scanned:
+        return []
+    # 할인 줄은 20건 중 1건꼴
+    return [{"scanned": scanned, "migrated": scanned // 20, "duplicates": 0, "last_id": last}]
+
+
+def seed_rows(n_receipts: int, items_per_receipt: int = 5, seed: int = 0) -> tuple[dict, dict]:
+    """(rows, presorted): n_receipts건의 영수증(상품/할인 포함)과 통계 RPC 결과"""
+    rng = random.Random(seed)
+    start = datetime(2021, 1, 1)
+    receipts = []
+    summary_total = 0
+    monthly = defaultdict(lambda: [0, 0])
+    by_store = defaultdict(lambda: [0, 0])
+    by_card = defaultdict(lambda: [0, 0])
+    by_item = defaultdict(lambda: [0, 0])
+
+    for receipt_id in range(1, n_receipts + 1):
+        purchased = start + timedelta(minutes=rng.randrange(5 * 365 * 24 * 60))
+        items = []
+        for no in range(1, items_per_receipt + 1):
+            name = rng.choice(_PRODUCTS)
+            quantity = rng.randint(1, 3)
+            unit_price = rng.randrange(1000, 20000, 10)
+            items.append({"id": receipt_id * 100 + no, "no": f"{no:03d}", "name": name, "barcode": None,
+                          "unit_price": unit_price, "quantity": quantity, "amount": unit_price * quantity})
+            by_item[name][0] += quantity
+            by_item[name][1] += unit_price * quantity
+        total = sum(i["amount"] for i in items)
+        store, card = rng.choice(_STORES), rng.choice(_CARDS)
+        # 레거시 영수증 일부는 결제수단이 비어 있음 (/api/admin/cleanup이 raw_text에서 추론)
+        legacy = receipt_id <= ADMIN_BACKLOG and receipt_id % 4 == 1
+        receipts.append({
+            "id": receipt_id,
+            "store_name": store,
+            "card_name": None if legacy else card,
+            "purchase_datetime": purchased.strftime("%y-%m-%d %H:%M"),
+            "purchase_date": purchased.isoformat(),
+            "raw_text": f"{card} 승인" if legacy else "",
+            "total_amount": total,
+            "created_at": purchased.isoformat(),
+            "items": items,
+            "discounts": [{"id": receipt_id, "name": "할인", "amount": 500, "item_id": None}] if receipt_id % 4 == 0
+                         else [],
+        })
+        summary_total += total
+        for bucket, key in ((monthly, purchased.strftime("%Y.%m")), (by_store, store), (by_card, card)):
+            bucket[key][0] += total
+            bucket[key][1] += 1
+
+    receipts.sort(key=lambda r: (r["purchase_date"], r["id"]), reverse=True)
+    next_id = iter(range(n_receipts + 1, 10 ** 9))
+
+    rows = {
+        "receipts": receipts,
+        "stats_summary": [{"total_amount": summary_total, "receipt_count": n_receipts}],
+        "stats_monthly": [{"month": m, "total_amount": t, "receipt_count": c} for m, (t, c) in sorted(monthly.items())],
+        "stats_by_store": [{"store_name": s, "total_amount": t, "visit_count": c} for s, (t, c) in by_store.items()],
+        "stats_by_card": [{"card_name": s, "total_amount": t, "usage_count": c} for s, (t, c) in by_card.items()],
+        "stats_frequent_items": [
+            {"name": name, "purchase_count": count, "total_amount": amount, "avg_interval_days": 7}
+            for name, (count, amount) in sorted(by_item.items(), key=lambda kv: -kv[1][0])
+        ],
+        "search_receipts": lambda params: [
+            {**{k: r[k] for k in ("id", "store_name", "card_name", "purchase_datetime", "purchase_date",
+                                  "total_amount", "created_at")}, "rank": 1.0}
+            for r in receipts[:params.get("p_limit", 20)]
+        ],
+        # 가짜 클라이언트는 데이터를 바꾸지 않으므로 변경 카운터도 고정
+        "stats_data_generation": 1,
+        "save_receipt": lambda params: {"receipt_id": next(next_id), "duplicate": False},
+        "save_receipts_bulk": lambda params: [
+            {"receipt_id": next(next_id), "duplicate": False} for _ in params["p_receipts"]
+        ],
+        "find_duplicate_receipts": [],
+        "cleanup_item_numbers": _cleanup_item_numbers,
+        "migrate_discount_items": _migrate_discount_items,
+        # 상품이 연결되지 않은 레거시 items (id 오름차순). link_item_products는 받은 건수만큼 연결
+        "items": [{"id": item_id, "name": rng.choice(_PRODUCTS), "barcode": None, "product_id": None}
+                  for item_id in range(1, ADMIN_BACKLOG + 1)],
+        "link_item_products": lambda params: len(params["p_items"]),
+        "verify_stats_rollups": [],
+        "rebuild_stats_rollups": [{"receipt_rows": len(monthly), "item_rows": len(by_item)}],
+    }
+    return rows, {"receipts": RECEIPTS_ORDER}
+
+
+# ── 가짜 Gemini 모델 ─────────────────────────────────────────────────────────
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _Stream:
+    def __init__(self, chunks: list[str], delay: float):
+        self._chunks = chunks
+        self._delay = delay
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(self._delay)
+            yield _Chunk(chunk)
+
+
+class StubGeminiModel:
+    """genai.GenerativeModel 대역. latency초 뒤 고정된 영수증 JSON을 돌려준다 (stream=True면 청크로 나눠서)."""
+
+    def __init__(self, latency: float = 0.5, items: int = 10, chunks: int = 8):
+        self.latency = latency
+        self.chunks = chunks
+        self.text = json.dumps({
+            "storeName": "케이할인마트",
+            "cardName": "신한카드",
+            "items": [
+                {"no": f"{i:03d}", "name": _PRODUCTS[i % len(_PRODUCTS)], "barcode": None,
+                 "unitPrice": 1000 * i, "quantity": 1, "amount": 1000 * i}
+                for i in range(1, items + 1)
+            ],
+            "purchaseDateTime": "25-02-02 14:30",
+            "rawText": "케이할인마트\n신한카드",
+        }, ensure_ascii=False)
+
+    async def generate_content_async(self, contents, stream: bool = False, **kwargs):
+        if not stream:
+            await asyncio.sleep(self.latency)
+            return _Chunk(self.text)
+        size = -(-len(self.text) // self.chunks)
+        pieces = [self.text[i:i + size] for i in range(0, len(self.text), size)]
+        return _Stream(pieces, self.latency / len(pieces))
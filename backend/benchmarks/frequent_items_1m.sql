@@ -0,0 +1,60 @@
+-- ================================================================
+-- 자주 구매하는 상품 벤치마크 (합성 영수증 100k건 / 상품 1M건)
+--   스크래치 DB에서 실행: psql "$DATABASE_URL" -f benchmarks/frequent_items_1m.sql
+--   전체를 트랜잭션으로 감싸고 마지막에 ROLLBACK 하므로 데이터가 남지 않는다.
+--   scripts/optimize_db.sql, stats_functions.sql, products_catalog.sql, stats_rollups.sql,
+--   frequent_items_function.sql 적용 후 실행할 것.
+-- ================================================================
+\timing on
+BEGIN;
+
+WITH r AS (
+    INSERT INTO receipts (store_name, card_name, purchase_date, raw_text, total_amount)
+    SELECT '케이할인마트', '신한카드',
+           TIMESTAMPTZ '2021-01-01' + (g % 1825) * INTERVAL '1 day' + (g % 720) * INTERVAL '1 minute',
+           '', 10000
+    FROM generate_series(1, 100000) AS g
+    RETURNING id
+)
+INSERT INTO items (receipt_id, no, name, unit_price, quantity, amount)
+SELECT r.id, LPAD(n::TEXT, 3, '0'),
+       '상품 ' || ((r.id * 7 + n * 13) % 2000),
+       1000, 1 + n % 3, 1000 * (1 + n % 3)
+FROM r
+CROSS JOIN generate_series(1, 10) AS n;
+
+-- 절반은 카탈로그에 연결 (나머지는 상품명 키로 집계되는 경로)
+INSERT INTO products (product_key, normalized_name, display_name)
+SELECT DISTINCT 'n:' || REPLACE(name, ' ', ''), REPLACE(name, ' ', ''), name
+FROM items
+WHERE name LIKE '상품 %'
+ON CONFLICT (product_key) DO NOTHING;
+
+UPDATE items i
+SET product_id = p.id
+FROM products p
+WHERE p.product_key = 'n:' || REPLACE(i.name, ' ', '')
+  AND i.id % 2 = 0;
+
+ANALYZE items;
+ANALYZE receipts;
+ANALYZE products;
+
+-- 변경 전: 기간 내 영수증 id를 모두 받아 in_() 목록으로 items 전체를 가져옴 (전송 행 수 = 상품 행 수)
+--          이후 Python에서 행마다 datetime.fromisoformat + 상품별 정렬/간격 계산
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT id, purchase_date FROM receipts
+WHERE purchase_date >= '2022-01-01' AND purchase_date < '2026-01-01';
+
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT i.name, i.quantity, i.amount, i.receipt_id
+FROM items i
+WHERE i.receipt_id IN (
+    SELECT id FROM receipts WHERE purchase_date >= '2022-01-01' AND purchase_date < '2026-01-01'
+);
+
+-- 변경 후: 일별 상품 롤업 + LAG() 윈도 함수로 DB에서 집계 (전송 행 수 = p_limit)
+EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM stats_frequent_items('2022-01-01', '2026-01-01', 10);
+EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM stats_frequent_items(NULL, NULL, 10);
+
+ROLLBACK;
@@ -0,0 +1,63 @@
+-- ================================================================
+-- 상품명 검색 벤치마크 (합성 영수증 100k건 / 상품 1M건)
+--   스크래치 DB에서 실행: psql "$DATABASE_URL" -f benchmarks/item_search_bench.sql
+--   전체를 트랜잭션으로 감싸고 마지막에 ROLLBACK 하므로 데이터/인덱스 변경이 남지 않는다.
+--   scripts/products_catalog.sql, scripts/item_search.sql 적용 후 실행할 것.
+--   4글자 검색어("피넛버터")는 트라이그램 인덱스 경로, 2글자 검색어("우유")는 트라이그램이 뽑히지 않아
+--   인덱스가 도움이 되지 않으므로 상품 카탈로그 경로를 따로 잰다.
+-- ================================================================
+\timing on
+BEGIN;
+
+WITH r AS (
+    INSERT INTO receipts (store_name, card_name, purchase_date, raw_text, total_amount)
+    SELECT '케이할인마트', '신한카드', TIMESTAMPTZ '2021-01-01' + (g % 1825) * INTERVAL '1 day', '', 10000
+    FROM generate_series(1, 100000) AS g
+    RETURNING id
+)
+INSERT INTO items (receipt_id, no, name, unit_price, quantity, amount)
+SELECT r.id, LPAD(n::TEXT, 3, '0'),
+       (ARRAY['서울우유 1L', '씬피넛버터샌드 80g', '신라면 5입', '바나나', '계란 30구',
+              '두부 300g', '콜라 1.5L', '삼겹살 500g', '양파 1.5kg', '햇반 210g'])[1 + (r.id + n) % 10]
+           || ' ' || (r.id % 97),
+       1000, 1, 1000
+FROM r
+CROSS JOIN generate_series(1, 10) AS n;
+
+-- 상품 카탈로그 연결 (link_products와 같은 결과: 정규화된 이름별 products 행 + items.product_id)
+INSERT INTO products (product_key, normalized_name, display_name)
+SELECT DISTINCT ON (k.normalized_name) 'n:' || k.normalized_name, k.normalized_name, k.name
+FROM (
+    SELECT name, LOWER(REGEXP_REPLACE(name, '[^0-9A-Za-z가-힣.]+', '', 'g')) AS normalized_name
+    FROM items
+) k
+ORDER BY k.normalized_name
+ON CONFLICT (product_key) DO NOTHING;
+
+UPDATE items i
+SET product_id = p.id
+FROM products p
+WHERE p.product_key = 'n:' || LOWER(REGEXP_REPLACE(i.name, '[^0-9A-Za-z가-힣.]+', '', 'g'));
+
+ANALYZE items;
+ANALYZE receipts;
+ANALYZE products;
+
+-- 변경 전: 인덱스 없는 ILIKE (순차 스캔) → 매칭 receipt_id 전체 반환
+DROP INDEX IF EXISTS idx_items_name_trgm;
+EXPLAIN (ANALYZE, BUFFERS) SELECT receipt_id FROM items WHERE name ILIKE '%피넛버터%';
+
+-- 변경 후: 트라이그램 인덱스 + 서버 조인/정렬/페이지네이션
+CREATE INDEX idx_items_name_trgm ON items USING GIN (name gin_trgm_ops);
+ANALYZE items;
+EXPLAIN (ANALYZE, BUFFERS) SELECT receipt_id FROM items WHERE name ILIKE '%피넛버터%';
+EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM search_receipts('피넛버터', p_limit => 20);
+
+-- 2글자 검색어: 트라이그램이 없어 GIN 인덱스로는 items 전체를 훑는 것과 같음
+EXPLAIN (ANALYZE, BUFFERS) SELECT receipt_id FROM items WHERE name ILIKE '%우유%';
+-- 카탈로그 경로: products에서 상품을 찾고 idx_items_product_id로 items 조회
+EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM search_receipts('우유', p_limit => 20);
+-- 뒤 페이지도 매칭 전체를 집계하므로 첫 페이지와 비용이 같음
+EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM search_receipts('우유', p_limit => 20, p_after_rank => 0.1, p_after_id => 50000);
+
+ROLLBACK;
@@ -0,0 +1,37 @@
+-- ================================================================
+-- 통계 집계 벤치마크 (합성 영수증 100k건)
+--   스크래치 DB에서 실행: psql "$DATABASE_URL" -f benchmarks/stats_100k.sql
+--   전체를 트랜잭션으로 감싸고 마지막에 ROLLBACK 하므로 데이터가 남지 않는다.
+--   scripts/optimize_db.sql, scripts/stats_functions.sql 적용 후 실행할 것.
+-- ================================================================
+\timing on
+BEGIN;
+
+INSERT INTO receipts (store_name, card_name, purchase_datetime, purchase_date, raw_text, total_amount)
+SELECT (ARRAY['케이할인마트', '이마트', '홈플러스', '롯데마트', 'GS25'])[1 + g % 5],
+       (ARRAY['신한카드', '롯데카드', '하나카드', '현금', NULL])[1 + (g / 7) % 5],
+       NULL,
+       TIMESTAMPTZ '2021-01-01' + (g % 1825) * INTERVAL '1 day' + (g % 720) * INTERVAL '1 minute',
+       '',
+       1000 + (g * 37) % 90000
+FROM generate_series(1, 100000) AS g;
+
+ANALYZE receipts;
+
+-- 변경 전: 기간 내 모든 행을 가져와 Python에서 집계 (전송 행 수 = 영수증 수)
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT purchase_date, total_amount FROM receipts
+WHERE purchase_date >= '2022-01-01' AND purchase_date < '2026-01-01';
+
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT store_name, total_amount FROM receipts
+WHERE purchase_date >= '2022-01-01' AND purchase_date < '2026-01-01';
+
+-- 변경 후: DB 집계 (전송 행 수 = 그룹 수)
+EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM stats_summary('2022-01-01', '2026-01-01');
+EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM stats_monthly('2022-01-01', '2026-01-01');
+EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM stats_by_store('2022-01-01', '2026-01-01');
+EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM stats_by_card('2022-01-01', '2026-01-01');
+EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM stats_by_card('2022-01-01', '2026-01-01', '이마트');
+
+ROLLBACK;
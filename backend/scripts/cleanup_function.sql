@@ -0,0 +1,42 @@
+-- ================================================================
+-- 관리자 데이터 정리(/api/admin/cleanup)용 배치 RPC
+--   기존: 번호(no)가 빠진 상품마다 UPDATE 1회 + items 전체를 한 번에 조회
+--   변경: 영수증 p_limit개 단위로 ROW_NUMBER() 윈도 함수로 번호를 계산해 한 번에 UPDATE
+--   반환된 last_receipt_id를 다음 호출의 p_after_receipt_id로 넘기면 이어서 진행 (재개 가능)
+-- ================================================================
+CREATE OR REPLACE FUNCTION cleanup_item_numbers(
+    p_after_receipt_id BIGINT  DEFAULT 0,
+    p_limit            INTEGER DEFAULT 500
+)
+RETURNS TABLE (receipts_scanned BIGINT, items_fixed BIGINT, last_receipt_id BIGINT)
+LANGUAGE sql
+AS $$
+    WITH chunk AS (
+        SELECT DISTINCT i.receipt_id
+        FROM items i
+        WHERE i.receipt_id > p_after_receipt_id
+        ORDER BY i.receipt_id
+        LIMIT p_limit
+    ),
+    numbered AS (
+        -- 영수증 내 id 순서대로 001, 002, ... (1000번 이상은 자릿수 그대로)
+        SELECT ranked.id, ranked.no,
+               LPAD(ranked.rn::TEXT, GREATEST(3, LENGTH(ranked.rn::TEXT)), '0') AS new_no
+        FROM (
+            SELECT i.id, i.no, ROW_NUMBER() OVER (PARTITION BY i.receipt_id ORDER BY i.id) AS rn
+            FROM items i
+            JOIN chunk c ON c.receipt_id = i.receipt_id
+        ) ranked
+    ),
+    updated AS (
+        UPDATE items i
+        SET no = n.new_no
+        FROM numbered n
+        WHERE i.id = n.id
+          AND (n.no IS NULL OR BTRIM(n.no) = '')
+        RETURNING i.id
+    )
+    SELECT (SELECT COUNT(*) FROM chunk),
+           (SELECT COUNT(*) FROM updated),
+           (SELECT MAX(receipt_id) FROM chunk);
+$$;
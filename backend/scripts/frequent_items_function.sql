@@ -0,0 +1,39 @@
+-- ================================================================
+-- 자주 구매하는 상품 RPC 함수
+--   기존: 기간 내 영수증 id 전체를 in_() 목록으로 보내 items를 모두 가져온 뒤
+--         Python에서 상품별 datetime 리스트를 만들어 정렬/간격 계산
+--   변경: 일별 × 상품 롤업(item_daily_rollup, stats_rollups.sql)을 읽고 LAG() 윈도 함수로
+--         직전 구매일과의 간격을 구해 상품별 수량/금액/평균 구매 주기를 집계, 상위 p_limit개만 반환
+--         → 조회 비용이 O(상품 구매 건수)가 아니라 O(상품 × 구매한 날 수)
+--   상품 키: products 카탈로그에 연결된 상품은 product_id, 아니면 공백 제거한 상품명 (롤업의 item_key)
+--   구매 주기: 구매한 날(UTC 날짜) 사이의 일수 평균. 같은 날 재구매는 하루로 묶임
+--   호출: client.rpc("stats_frequent_items", {"p_start": ..., "p_end": ..., "p_limit": 10})
+--   products_catalog.sql, stats_rollups.sql 이후에 실행
+-- ================================================================
+
+CREATE OR REPLACE FUNCTION stats_frequent_items(
+    p_start TIMESTAMPTZ DEFAULT NULL,
+    p_end   TIMESTAMPTZ DEFAULT NULL,
+    p_limit INTEGER     DEFAULT 10
+)
+RETURNS TABLE (name TEXT, purchase_count BIGINT, total_amount BIGINT, avg_interval_days INTEGER)
+LANGUAGE sql STABLE
+AS $$
+    WITH days AS (
+        SELECT r.item_key, r.product_id, r.name, r.purchase_count, r.total_amount,
+               r.day - LAG(r.day) OVER (PARTITION BY r.item_key ORDER BY r.day) AS gap_days
+        FROM item_daily_rollup r
+        WHERE (r.purchase_count <> 0 OR r.total_amount <> 0)
+          AND (p_start IS NULL OR r.day >= _rollup_day(p_start))
+          AND (p_end   IS NULL OR r.day <  _rollup_day(p_end))
+    )
+    SELECT COALESCE(MIN(pr.display_name), MIN(d.name)),
+           SUM(d.purchase_count)::BIGINT AS purchase_count,
+           SUM(d.total_amount)::BIGINT,
+           (SUM(d.gap_days) / NULLIF(COUNT(d.gap_days), 0))::INTEGER
+    FROM days d
+    LEFT JOIN products pr ON pr.id = d.product_id
+    GROUP BY d.item_key
+    ORDER BY purchase_count DESC
+    LIMIT p_limit;
+$$;
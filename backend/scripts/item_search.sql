@@ -0,0 +1,100 @@
+-- ================================================================
+-- 상품명 검색 인덱스 + 검색 RPC
+--   items.name ILIKE '%검색어%'는 인덱스를 못 타서 items 전체를 훑고,
+--   매칭된 receipt_id 전체를 IN (...) 목록으로 되돌려 보내 URL 길이 제한에 걸릴 수 있다.
+--   pg_trgm GIN 인덱스로 ILIKE를 인덱스 검색으로 바꾸고,
+--   items → receipts 조인/필터/정렬/페이지네이션을 함수 하나에서 처리한다.
+--   트라이그램은 3글자 이상이어야 뽑히므로 "우유", "두부", "라면" 같은 1~2글자 검색어는
+--   GIN 인덱스가 도움이 되지 않는다(인덱스 전체 또는 items 전체를 훑음). 이런 검색어는
+--   상품 카탈로그(products, 수천 건)에서 먼저 상품을 찾고 idx_items_product_id로 items를 가져온 뒤,
+--   아직 상품에 연결되지 않은 items만(idx_items_unlinked) 직접 훑는다.
+--   어느 경로든 마지막에 items.name ILIKE로 다시 걸러 결과는 같다. 다만 짧은 경로는 정규화된 이름
+--   (normalized_name: 소문자, 공백/기호 제거, kg→g·l→ml 환산)이나 대표 이름(display_name)으로 후보를
+--   고르므로, 단위 환산으로 표기가 바뀌는 검색어(예: "1L")는 대표 이름에 같은 표기가 있어야 찾는다.
+--   성능 메모: rank는 영수증별 최대 유사도라 매칭된 items 전체를 집계한 뒤에 (rank, id) 커서를 적용한다.
+--   따라서 뒤 페이지도 첫 페이지와 비용이 같다(매칭 건수에 비례). 매칭이 많은 검색어는 기간/상호명
+--   필터로 범위를 좁혀 쓴다.
+--   products_catalog.sql 이후에 실행 (products, items.product_id, idx_items_unlinked 필요)
+-- ================================================================
+
+-- 1. pg_trgm 확장 + GIN 트라이그램 인덱스
+-- ----------------------------------------------------------------
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_items_name_trgm
+    ON items USING GIN (name gin_trgm_ops);
+
+-- 2. 검색 RPC
+--    rank: 매칭된 상품명 중 검색어와의 최대 유사도 (높은 순)
+--    페이지네이션: (rank, id) keyset — 이전 페이지 마지막 행의 값을 p_after_rank/p_after_id로 전달
+--    검색어 길이에 따라 한쪽 경로만 실행된다 (p_query에만 의존하는 조건은 One-Time Filter로 평가)
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION search_receipts(
+    p_query      TEXT,
+    p_start      TIMESTAMPTZ DEFAULT NULL,
+    p_end        TIMESTAMPTZ DEFAULT NULL,
+    p_store      TEXT        DEFAULT NULL,
+    p_card       TEXT        DEFAULT NULL,
+    p_limit      INTEGER     DEFAULT 20,
+    p_after_rank REAL        DEFAULT NULL,
+    p_after_id   BIGINT      DEFAULT NULL
+)
+RETURNS TABLE (
+    id                BIGINT,
+    store_name        TEXT,
+    card_name         TEXT,
+    purchase_datetime TEXT,
+    purchase_date     TIMESTAMPTZ,
+    total_amount      BIGINT,
+    created_at        TIMESTAMPTZ,
+    rank              REAL,
+    matched_items     TEXT[]
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH q AS (
+        -- LIKE 와일드카드(%, _)는 일반 문자로 취급
+        SELECT REPLACE(REPLACE(REPLACE(p_query, '\', '\\'), '%', '\%'), '_', '\_') AS escaped
+    ),
+    candidate AS (
+        -- 3글자 이상: 트라이그램 인덱스
+        SELECT i.receipt_id, i.name
+        FROM q, items i
+        WHERE CHAR_LENGTH(p_query) >= 3
+          AND i.name ILIKE '%' || q.escaped || '%'
+        UNION ALL
+        -- 1~2글자: 카탈로그에서 상품을 찾고 연결된 items
+        SELECT i.receipt_id, i.name
+        FROM q
+        JOIN products p ON p.normalized_name LIKE '%' || LOWER(q.escaped) || '%'
+                        OR p.display_name ILIKE '%' || q.escaped || '%'
+        JOIN items i ON i.product_id = p.id
+        WHERE CHAR_LENGTH(p_query) < 3
+        UNION ALL
+        -- 1~2글자: 상품에 연결되지 않은 items (link_products 실행 후에는 소수)
+        SELECT i.receipt_id, i.name
+        FROM q, items i
+        WHERE CHAR_LENGTH(p_query) < 3
+          AND i.product_id IS NULL
+    ),
+    matched AS (
+        SELECT c.receipt_id,
+               MAX(similarity(c.name, p_query)) AS rank,
+               ARRAY_AGG(DISTINCT c.name)       AS matched_items
+        FROM candidate c, q
+        WHERE c.name ILIKE '%' || q.escaped || '%'
+        GROUP BY c.receipt_id
+    )
+    SELECT r.id::BIGINT, r.store_name::TEXT, r.card_name::TEXT, r.purchase_datetime::TEXT,
+           r.purchase_date, r.total_amount::BIGINT, r.created_at,
+           m.rank::REAL, m.matched_items
+    FROM matched m
+    JOIN receipts r ON r.id = m.receipt_id
+    WHERE (p_start IS NULL OR r.purchase_date >= p_start)
+      AND (p_end   IS NULL OR r.purchase_date <  p_end)
+      AND (p_store IS NULL OR r.store_name = p_store)
+      AND (p_card  IS NULL OR r.card_name  = p_card)
+      AND (p_after_id IS NULL OR (m.rank::REAL, r.id) < (p_after_rank, p_after_id))
+    ORDER BY m.rank DESC, r.id DESC
+    LIMIT p_limit;
+$$;
@@ -0,0 +1,75 @@
+-- ================================================================
+-- 할인 항목 이전 (items → discounts) 집합 기반 RPC
+--   기존: 할인 항목 1건마다 존재 확인 + INSERT + DELETE = 3번의 HTTP 왕복
+--   변경: items를 id 순으로 p_limit건씩 잘라 한 번의 RPC에서 판별/이전/삭제
+--   호출: client.rpc("migrate_discount_items", {"p_after_id": 0, "p_limit": 5000, "p_dry_run": false})
+--   반환된 last_id를 다음 호출의 p_after_id로 넘기면 이어서 진행 (중단 후 재개 가능)
+--   영수증 fingerprint(receipt_fingerprint.sql)는 할인 줄을 빼고 계산하므로 이전해도 바뀌지 않는다
+-- ================================================================
+
+-- 1. 멱등성 키: 어떤 items 행에서 이전된 할인인지 기록
+--    같은 배치를 다시 실행해도 ON CONFLICT로 중복 INSERT가 생기지 않는다.
+-- ----------------------------------------------------------------
+ALTER TABLE discounts
+    ADD COLUMN IF NOT EXISTS source_item_id BIGINT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_discounts_source_item_id
+    ON discounts(source_item_id);
+
+-- 2. 배치 이전 함수
+--    할인 판별은 DatabaseService._is_discount_item과 동일:
+--    amount < 0 또는 상품명(대문자)에 할인/DC/DISCOUNT/쿠폰/COUPON 포함
+--    같은 영수증에 같은 이름의 할인이 이미 있으면(이전 방식으로 저장된 것) 건너뛰고 상품도 유지
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION migrate_discount_items(
+    p_after_id BIGINT  DEFAULT 0,
+    p_limit    INTEGER DEFAULT 5000,
+    p_dry_run  BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (scanned BIGINT, candidates BIGINT, migrated BIGINT, duplicates BIGINT, last_id BIGINT)
+LANGUAGE sql
+AS $$
+    WITH batch AS (
+        SELECT i.id, i.receipt_id, i.name, i.amount
+        FROM items i
+        WHERE i.id > p_after_id
+        ORDER BY i.id
+        LIMIT p_limit
+    ),
+    candidate AS (
+        SELECT b.*
+        FROM batch b
+        WHERE COALESCE(b.amount, 0) < 0
+           OR UPPER(COALESCE(b.name, '')) ~ '(할인|DC|DISCOUNT|쿠폰|COUPON)'
+    ),
+    eligible AS (
+        SELECT c.*
+        FROM candidate c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM discounts d
+            WHERE d.receipt_id = c.receipt_id
+              AND d.name = COALESCE(c.name, '')
+              AND d.source_item_id IS DISTINCT FROM c.id
+        )
+    ),
+    inserted AS (
+        INSERT INTO discounts (receipt_id, name, amount, source_item_id)
+        SELECT e.receipt_id, COALESCE(e.name, '할인'), ABS(COALESCE(e.amount, 0)), e.id
+        FROM eligible e
+        WHERE NOT p_dry_run
+        ON CONFLICT (source_item_id) DO NOTHING
+        RETURNING source_item_id
+    ),
+    deleted AS (
+        DELETE FROM items i
+        USING eligible e
+        WHERE i.id = e.id
+          AND NOT p_dry_run
+        RETURNING i.id
+    )
+    SELECT (SELECT COUNT(*) FROM batch),
+           (SELECT COUNT(*) FROM candidate),
+           (SELECT COUNT(*) FROM eligible),
+           (SELECT COUNT(*) FROM candidate) - (SELECT COUNT(*) FROM eligible),
+           (SELECT MAX(id) FROM batch);
+$$;
@@ -0,0 +1,117 @@
+-- ================================================================
+-- 상품 카탈로그 (products) + items.product_id 연결
+--   items.name 문자열을 매번 Python에서 묶는 대신, 바코드 또는 정규화된 이름
+--   (app/services/product_normalizer.py)을 키로 products 행을 하나 두고
+--   저장 시점에 items.product_id로 연결한다. 빈도/가격 이력 조회는 product_id 인덱스로 처리.
+--   정규화는 Python에서 하고 payload의 items[].product_key / normalized_name으로 전달한다.
+--   save_receipt_function.sql 이후에 실행 (save_receipt를 재정의)
+-- ================================================================
+
+-- 1. 카탈로그 테이블
+--    product_key: 'b:<바코드>' 또는 'n:<정규화된 이름>'
+--    display_name: 처음 저장된 원래 상품명 (화면 표시용)
+-- ----------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS products (
+    id              BIGSERIAL PRIMARY KEY,
+    product_key     TEXT NOT NULL UNIQUE,
+    barcode         TEXT,
+    normalized_name TEXT NOT NULL,
+    display_name    TEXT NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_products_normalized_name ON products(normalized_name);
+
+ALTER TABLE items
+    ADD COLUMN IF NOT EXISTS product_id BIGINT REFERENCES products(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_items_product_id ON items(product_id, receipt_id);
+
+-- 2. 상품 upsert 헬퍼
+--    p_items: [{product_key, barcode, normalized_name, name}, ...]
+--    없는 키만 INSERT하고 (product_key, id) 매핑을 돌려준다.
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION upsert_products(p_items JSONB)
+RETURNS TABLE (product_key TEXT, product_id BIGINT)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    INSERT INTO products (product_key, barcode, normalized_name, display_name)
+    SELECT DISTINCT ON (i.product_key)
+           i.product_key, i.barcode, i.normalized_name, BTRIM(i.name)
+    FROM jsonb_to_recordset(COALESCE(p_items, '[]'::JSONB))
+        AS i(product_key TEXT, barcode TEXT, normalized_name TEXT, name TEXT)
+    WHERE i.product_key IS NOT NULL
+    ORDER BY i.product_key
+    ON CONFLICT (product_key) DO NOTHING;
+
+    RETURN QUERY
+    SELECT p.product_key, p.id
+    FROM products p
+    WHERE p.product_key IN (
+        SELECT DISTINCT i.product_key
+        FROM jsonb_to_recordset(COALESCE(p_items, '[]'::JSONB)) AS i(product_key TEXT)
+    );
+END;
+$$;
+
+-- 3. save_receipt 재정의: items 저장 시 product_id까지 채움
+--    (receipts/discounts 부분은 save_receipt_function.sql과 동일)
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION save_receipt(p_receipt JSONB)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_receipt_id BIGINT;
+BEGIN
+    INSERT INTO receipts (store_name, card_name, purchase_datetime, purchase_date, raw_text, total_amount)
+    VALUES (
+        p_receipt->>'store_name',
+        p_receipt->>'card_name',
+        p_receipt->>'purchase_datetime',
+        (p_receipt->>'purchase_date')::TIMESTAMPTZ,
+        COALESCE(p_receipt->>'raw_text', ''),
+        COALESCE((p_receipt->>'total_amount')::INTEGER, 0)
+    )
+    RETURNING id INTO v_receipt_id;
+
+    INSERT INTO items (receipt_id, no, name, barcode, unit_price, quantity, amount, product_id)
+    SELECT v_receipt_id, i.no, i.name, i.barcode, i.unit_price, i.quantity, i.amount, p.product_id
+    FROM jsonb_to_recordset(COALESCE(p_receipt->'items', '[]'::JSONB))
+        AS i(no TEXT, name TEXT, barcode TEXT, unit_price INTEGER, quantity INTEGER, amount INTEGER,
+             product_key TEXT)
+    LEFT JOIN upsert_products(p_receipt->'items') p ON p.product_key = i.product_key;
+
+    INSERT INTO discounts (receipt_id, name, amount)
+    SELECT v_receipt_id, d.name, d.amount
+    FROM jsonb_to_recordset(COALESCE(p_receipt->'discounts', '[]'::JSONB))
+        AS d(name TEXT, amount INTEGER);
+
+    RETURN v_receipt_id;
+END;
+$$;
+
+-- 4. 기존 items 연결 (백필)
+--    정규화는 Python에서 하므로, DatabaseService.link_products가 product_id가 없는 items를
+--    id 순으로 읽어 [{id, product_key, barcode, normalized_name, name}]로 넘긴다.
+--    연결된 행 수를 반환.
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION link_item_products(p_items JSONB)
+RETURNS BIGINT
+LANGUAGE sql
+AS $$
+    WITH linked AS (
+        UPDATE items it
+        SET product_id = p.product_id
+        FROM jsonb_to_recordset(p_items) AS i(id BIGINT, product_key TEXT)
+        JOIN upsert_products(p_items) p ON p.product_key = i.product_key
+        WHERE it.id = i.id
+          AND it.product_id IS NULL
+        RETURNING it.id
+    )
+    SELECT COUNT(*) FROM linked;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_items_unlinked ON items(id) WHERE product_id IS NULL;
@@ -0,0 +1,197 @@
+-- ================================================================
+-- 영수증 중복 저장 방지 (fingerprint)
+--   같은 영수증이 두 번 저장되면 모든 통계 합계가 부풀려진다.
+--   상호명 + 구매 시각(분) + 합계 + 상품 목록 해시로 fingerprint를 만들어
+--   receipts.fingerprint(UNIQUE 인덱스)에 저장하고, save_receipt는 INSERT ... ON CONFLICT로
+--   한 번의 인덱스 조회만으로 중복을 판별한다. 중복이면 새로 저장하지 않고 기존 영수증 id를 돌려준다.
+--   구매 시각이 없는 영수증은 구분할 근거가 부족하므로 fingerprint를 두지 않는다(NULL, 검사 안 함).
+--   상품 목록 해시는 할인 줄을 뺀 상품으로 계산한다. 저장 시(payload의 items)에는 할인이 이미
+--   discounts로 분리돼 있고, 기존 데이터의 할인 줄은 migrate_discount_items가 나중에 items에서 옮기므로,
+--   할인 줄을 포함하면 이전 전후로 저장된 컬럼과 receipt_fingerprints 뷰의 값이 어긋난다.
+--   이 스크립트를 다시 실행하면 예전 방식(할인 줄 포함)으로 채운 fingerprint도 다시 계산한다.
+--   save_receipt_function.sql, products_catalog.sql 이후에 실행
+--   (save_receipt / save_receipts_bulk의 반환형이 JSONB로 바뀌므로 DROP 후 재생성)
+-- ================================================================
+
+-- 1. fingerprint 계산 함수
+--    상품명은 공백 제거 + 소문자로 비교 (OCR 공백 차이 무시)
+-- ----------------------------------------------------------------
+-- 할인 줄 판별: DatabaseService._is_discount_item, migrate_discount_items와 같은 기준
+CREATE OR REPLACE FUNCTION _is_discount_item(p_name TEXT, p_amount INTEGER)
+RETURNS BOOLEAN
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT COALESCE(p_amount, 0) < 0 OR UPPER(COALESCE(p_name, '')) ~ '(할인|DC|DISCOUNT|쿠폰|COUPON)';
+$$;
+
+CREATE OR REPLACE FUNCTION _fingerprint_item(p_name TEXT, p_quantity INTEGER, p_amount INTEGER)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT concat_ws(':', LOWER(REGEXP_REPLACE(COALESCE(p_name, ''), '\s+', '', 'g')),
+                     COALESCE(p_quantity, 0), COALESCE(p_amount, 0));
+$$;
+
+-- save_receipt 입력(payload의 items 배열)용 상품 목록 해시
+CREATE OR REPLACE FUNCTION receipt_items_digest(p_items JSONB)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT md5(string_agg(_fingerprint_item(i.name, i.quantity, i.amount), '|'
+                          ORDER BY _fingerprint_item(i.name, i.quantity, i.amount)))
+    FROM jsonb_to_recordset(COALESCE(p_items, '[]'::JSONB)) AS i(name TEXT, quantity INTEGER, amount INTEGER)
+    WHERE NOT _is_discount_item(i.name, i.amount);
+$$;
+
+CREATE OR REPLACE FUNCTION receipt_fingerprint(
+    p_store TEXT, p_purchase_date TIMESTAMPTZ, p_total BIGINT, p_items_digest TEXT
+)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT CASE WHEN p_purchase_date IS NULL THEN NULL ELSE
+        md5(concat_ws('|',
+                      LOWER(BTRIM(COALESCE(p_store, ''))),
+                      FLOOR(EXTRACT(EPOCH FROM p_purchase_date) / 60)::BIGINT,
+                      COALESCE(p_total, 0),
+                      p_items_digest))
+    END;
+$$;
+
+-- 저장된 영수증 전체의 fingerprint (상품 해시는 할인 줄을 뺀 items를 한 번에 GROUP BY)
+CREATE OR REPLACE VIEW receipt_fingerprints AS
+    SELECT r.id, r.store_name, r.purchase_date, r.total_amount,
+           receipt_fingerprint(r.store_name, r.purchase_date, r.total_amount, d.digest) AS fingerprint
+    FROM receipts r
+    LEFT JOIN (
+        SELECT i.receipt_id,
+               md5(string_agg(_fingerprint_item(i.name, i.quantity, i.amount), '|'
+                              ORDER BY _fingerprint_item(i.name, i.quantity, i.amount))) AS digest
+        FROM items i
+        WHERE NOT _is_discount_item(i.name, i.amount)
+        GROUP BY i.receipt_id
+    ) d ON d.receipt_id = r.id;
+
+-- 2. 컬럼 + 기존 데이터 채우기
+--    이미 중복된 영수증은 가장 먼저 저장된 것(id 최소)에만 fingerprint를 두고
+--    나머지는 NULL로 남긴다 → UNIQUE 인덱스 생성 가능, find_duplicate_receipts로 조회
+--    뷰와 다른 값(예전 계산 방식)은 먼저 비우고, 같은 값을 이미 가진 영수증이 있으면 그대로 둔다
+-- ----------------------------------------------------------------
+ALTER TABLE receipts
+    ADD COLUMN IF NOT EXISTS fingerprint TEXT;
+
+UPDATE receipts r
+SET fingerprint = NULL
+FROM receipt_fingerprints f
+WHERE r.id = f.id
+  AND r.fingerprint IS NOT NULL
+  AND r.fingerprint IS DISTINCT FROM f.fingerprint;
+
+UPDATE receipts r
+SET fingerprint = f.fingerprint
+FROM (
+    SELECT id, fingerprint, ROW_NUMBER() OVER (PARTITION BY fingerprint ORDER BY id) AS rn
+    FROM receipt_fingerprints
+    WHERE fingerprint IS NOT NULL
+) f
+WHERE r.id = f.id
+  AND f.rn = 1
+  AND r.fingerprint IS DISTINCT FROM f.fingerprint
+  AND NOT EXISTS (SELECT 1 FROM receipts o WHERE o.fingerprint = f.fingerprint);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_receipts_fingerprint ON receipts(fingerprint);
+
+-- 3. save_receipt / save_receipts_bulk 재정의
+--    반환: {"receipt_id": id, "duplicate": true|false}
+--    (items/discounts 저장은 products_catalog.sql과 동일)
+-- ----------------------------------------------------------------
+DROP FUNCTION IF EXISTS save_receipts_bulk(JSONB);
+DROP FUNCTION IF EXISTS save_receipt(JSONB);
+
+CREATE FUNCTION save_receipt(p_receipt JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_receipt_id    BIGINT;
+    v_purchase_date TIMESTAMPTZ := (p_receipt->>'purchase_date')::TIMESTAMPTZ;
+    v_total         INTEGER     := COALESCE((p_receipt->>'total_amount')::INTEGER, 0);
+    v_fingerprint   TEXT;
+BEGIN
+    v_fingerprint := receipt_fingerprint(p_receipt->>'store_name', v_purchase_date, v_total,
+                                         receipt_items_digest(p_receipt->'items'));
+
+    INSERT INTO receipts (store_name, card_name, purchase_datetime, purchase_date, raw_text, total_amount,
+                          fingerprint)
+    VALUES (
+        p_receipt->>'store_name',
+        p_receipt->>'card_name',
+        p_receipt->>'purchase_datetime',
+        v_purchase_date,
+        COALESCE(p_receipt->>'raw_text', ''),
+        v_total,
+        v_fingerprint
+    )
+    ON CONFLICT (fingerprint) DO NOTHING
+    RETURNING id INTO v_receipt_id;
+
+    IF v_receipt_id IS NULL THEN
+        SELECT id INTO v_receipt_id FROM receipts WHERE fingerprint = v_fingerprint;
+        RETURN jsonb_build_object('receipt_id', v_receipt_id, 'duplicate', TRUE);
+    END IF;
+
+    INSERT INTO items (receipt_id, no, name, barcode, unit_price, quantity, amount, product_id)
+    SELECT v_receipt_id, i.no, i.name, i.barcode, i.unit_price, i.quantity, i.amount, p.product_id
+    FROM jsonb_to_recordset(COALESCE(p_receipt->'items', '[]'::JSONB))
+        AS i(no TEXT, name TEXT, barcode TEXT, unit_price INTEGER, quantity INTEGER, amount INTEGER,
+             product_key TEXT)
+    LEFT JOIN upsert_products(p_receipt->'items') p ON p.product_key = i.product_key;
+
+    INSERT INTO discounts (receipt_id, name, amount)
+    SELECT v_receipt_id, d.name, d.amount
+    FROM jsonb_to_recordset(COALESCE(p_receipt->'discounts', '[]'::JSONB))
+        AS d(name TEXT, amount INTEGER);
+
+    RETURN jsonb_build_object('receipt_id', v_receipt_id, 'duplicate', FALSE);
+END;
+$$;
+
+-- 입력 순서대로 [{"receipt_id", "duplicate"}, ...] 반환. 배치 안의 중복도 먼저 저장된 것을 가리킴
+CREATE FUNCTION save_receipts_bulk(p_receipts JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_results JSONB := '[]'::JSONB;
+    v_receipt JSONB;
+BEGIN
+    FOR v_receipt IN SELECT value FROM jsonb_array_elements(p_receipts) LOOP
+        v_results := v_results || jsonb_build_array(save_receipt(v_receipt));
+    END LOOP;
+    RETURN v_results;
+END;
+$$;
+
+-- 4. 기존 중복 일괄 조회
+--    fingerprint가 같은 영수증 묶음을 중복 건수가 많은 순으로 반환 (receipt_ids[1]이 원본)
+--    중복 영수증은 컬럼이 NULL이므로 뷰로 묶는다. 뷰와 저장 시 계산은 같은 상품 해시를 쓰므로
+--    여기서 찾는 묶음은 save_receipt가 중복으로 판별하는 기준과 같다
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION find_duplicate_receipts(p_limit INTEGER DEFAULT 100)
+RETURNS TABLE (fingerprint TEXT, receipt_ids BIGINT[], store_name TEXT, purchase_date TIMESTAMPTZ,
+               total_amount BIGINT, duplicate_count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT f.fingerprint,
+           ARRAY_AGG(f.id ORDER BY f.id),
+           MIN(f.store_name),
+           MIN(f.purchase_date),
+           MIN(f.total_amount)::BIGINT,
+           COUNT(*) - 1 AS duplicate_count
+    FROM receipt_fingerprints f
+    WHERE f.fingerprint IS NOT NULL
+    GROUP BY f.fingerprint
+    HAVING COUNT(*) > 1
+    ORDER BY duplicate_count DESC, MIN(f.id)
+    LIMIT p_limit;
+$$;
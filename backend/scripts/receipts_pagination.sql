@@ -0,0 +1,10 @@
+-- ================================================================
+-- 영수증 목록 keyset 페이지네이션용 복합 인덱스
+--   GET /api/receipts?cursor=... 는
+--   ORDER BY purchase_date DESC, id DESC  (DESC 기본값: NULL 먼저)
+--   WHERE (purchase_date, id) < (커서) 로 조회하므로
+--   같은 정렬의 복합 인덱스를 타면 N번째 페이지도 첫 페이지와 같은 비용이다.
+--   (기존 idx_receipts_purchase_date는 id 동률 정렬을 위해 추가 정렬이 필요)
+-- ================================================================
+CREATE INDEX IF NOT EXISTS idx_receipts_purchase_date_id
+    ON receipts(purchase_date DESC, id DESC);
@@ -0,0 +1,60 @@
+-- ================================================================
+-- 영수증 저장 RPC 함수
+--   receipts → items → discounts 3번의 HTTP 왕복을 1번의 RPC로 줄이고,
+--   함수 하나가 한 트랜잭션으로 실행되므로 중간 실패 시 전체가 롤백된다.
+--   호출: client.rpc("save_receipt", {"p_receipt": {...}})
+-- ================================================================
+
+-- 1. 단건 저장
+--    p_receipt: {store_name, card_name, purchase_datetime, purchase_date,
+--                raw_text, total_amount, items: [...], discounts: [...]}
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION save_receipt(p_receipt JSONB)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_receipt_id BIGINT;
+BEGIN
+    INSERT INTO receipts (store_name, card_name, purchase_datetime, purchase_date, raw_text, total_amount)
+    VALUES (
+        p_receipt->>'store_name',
+        p_receipt->>'card_name',
+        p_receipt->>'purchase_datetime',
+        (p_receipt->>'purchase_date')::TIMESTAMPTZ,
+        COALESCE(p_receipt->>'raw_text', ''),
+        COALESCE((p_receipt->>'total_amount')::INTEGER, 0)
+    )
+    RETURNING id INTO v_receipt_id;
+
+    INSERT INTO items (receipt_id, no, name, barcode, unit_price, quantity, amount)
+    SELECT v_receipt_id, i.no, i.name, i.barcode, i.unit_price, i.quantity, i.amount
+    FROM jsonb_to_recordset(COALESCE(p_receipt->'items', '[]'::JSONB))
+        AS i(no TEXT, name TEXT, barcode TEXT, unit_price INTEGER, quantity INTEGER, amount INTEGER);
+
+    INSERT INTO discounts (receipt_id, name, amount)
+    SELECT v_receipt_id, d.name, d.amount
+    FROM jsonb_to_recordset(COALESCE(p_receipt->'discounts', '[]'::JSONB))
+        AS d(name TEXT, amount INTEGER);
+
+    RETURN v_receipt_id;
+END;
+$$;
+
+-- 2. 일괄 저장 (여러 OCR 결과를 한 번의 RPC로)
+--    하나라도 실패하면 전체 롤백. 저장된 receipt id 배열을 입력 순서대로 반환.
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION save_receipts_bulk(p_receipts JSONB)
+RETURNS BIGINT[]
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_ids     BIGINT[] := '{}';
+    v_receipt JSONB;
+BEGIN
+    FOR v_receipt IN SELECT value FROM jsonb_array_elements(p_receipts) LOOP
+        v_ids := v_ids || save_receipt(v_receipt);
+    END LOOP;
+    RETURN v_ids;
+END;
+$$;
@@ -0,0 +1,78 @@
+-- ================================================================
+-- 대시보드 통계 RPC 함수
+--   영수증 행을 전부 가져와 Python에서 집계하던 방식 대신
+--   DB에서 SUM/COUNT/GROUP BY 후 집계 결과 행만 반환한다.
+--   (PostgREST 기본 row 제한으로 결과가 잘리는 문제도 함께 해결)
+--   p_start 이상, p_end 미만 (NULL이면 제한 없음)
+-- ================================================================
+
+-- 1. 요약
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION stats_summary(p_start TIMESTAMPTZ DEFAULT NULL, p_end TIMESTAMPTZ DEFAULT NULL)
+RETURNS TABLE (total_amount BIGINT, receipt_count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT COALESCE(SUM(r.total_amount), 0)::BIGINT, COUNT(*)
+    FROM receipts r
+    WHERE (p_start IS NULL OR r.purchase_date >= p_start)
+      AND (p_end   IS NULL OR r.purchase_date <  p_end);
+$$;
+
+-- 2. 월별 ("YYYY.MM", purchase_date 저장값 기준)
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION stats_monthly(p_start TIMESTAMPTZ DEFAULT NULL, p_end TIMESTAMPTZ DEFAULT NULL)
+RETURNS TABLE (month TEXT, total_amount BIGINT, receipt_count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT TO_CHAR(DATE_TRUNC('month', r.purchase_date AT TIME ZONE 'UTC'), 'YYYY.MM') AS month,
+           COALESCE(SUM(r.total_amount), 0)::BIGINT,
+           COUNT(*)
+    FROM receipts r
+    WHERE r.purchase_date IS NOT NULL
+      AND (p_start IS NULL OR r.purchase_date >= p_start)
+      AND (p_end   IS NULL OR r.purchase_date <  p_end)
+    GROUP BY 1
+    ORDER BY 1;
+$$;
+
+-- 3. 상점별 (지출 많은 순)
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION stats_by_store(p_start TIMESTAMPTZ DEFAULT NULL, p_end TIMESTAMPTZ DEFAULT NULL)
+RETURNS TABLE (store_name TEXT, total_amount BIGINT, visit_count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT COALESCE(NULLIF(r.store_name, ''), '기타') AS store_name,
+           COALESCE(SUM(r.total_amount), 0)::BIGINT AS total_amount,
+           COUNT(*)
+    FROM receipts r
+    WHERE (p_start IS NULL OR r.purchase_date >= p_start)
+      AND (p_end   IS NULL OR r.purchase_date <  p_end)
+    GROUP BY 1
+    ORDER BY total_amount DESC;
+$$;
+
+-- 4. 카드별 (p_store 지정 시 해당 상점만)
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION stats_by_card(
+    p_start TIMESTAMPTZ DEFAULT NULL,
+    p_end   TIMESTAMPTZ DEFAULT NULL,
+    p_store TEXT        DEFAULT NULL
+)
+RETURNS TABLE (card_name TEXT, total_amount BIGINT, usage_count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT COALESCE(NULLIF(r.card_name, ''), '기타') AS card_name,
+           COALESCE(SUM(r.total_amount), 0)::BIGINT AS total_amount,
+           COUNT(*)
+    FROM receipts r
+    WHERE (p_start IS NULL OR r.purchase_date >= p_start)
+      AND (p_end   IS NULL OR r.purchase_date <  p_end)
+      AND (p_store IS NULL OR r.store_name = p_store)
+    GROUP BY 1
+    ORDER BY total_amount DESC;
+$$;
+
+-- 5. 상점별/카드별 집계용 복합 인덱스 (기간 필터 + 집계 컬럼 커버)
+-- ----------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_receipts_purchase_date_cover
+    ON receipts(purchase_date) INCLUDE (store_name, card_name, total_amount);
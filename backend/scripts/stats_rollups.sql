@@ -0,0 +1,424 @@
+-- ================================================================
+-- 통계 롤업 테이블 (트리거로 증분 유지)
+--   대시보드 조회 때마다 receipts 전체를 다시 집계하지 않도록
+--   일별 × 상점 × 카드, 일별 × 상품 합계를 미리 유지한다.
+--   상품 키는 stats_frequent_items와 같은 기준: 카탈로그에 연결된 상품은 'p:<product_id>',
+--   아니면 'n:<공백 제거한 상품명>' (link_item_products로 나중에 연결돼도 items UPDATE 트리거로 옮겨짐)
+--   stats_functions.sql의 stats_* 함수를 롤업 조회 버전으로 교체하고(상품 롤업은
+--   frequent_items_function.sql의 stats_frequent_items가 조회)
+--   StatsService 호출부는 그대로이고 조회 비용은 O(영수증 수) → O(일 수).
+--   save_receipt / delete_receipt / add_discount / 관리자 정리 작업 모두
+--   테이블 트리거를 거치므로 별도 애플리케이션 코드 없이 반영된다.
+--   stats_data_generation()은 다른 프로세스(임포터, 다른 워커)의 쓰기를 API 캐시가 감지하는 데 쓴다.
+--   실행 순서: optimize_db.sql → stats_functions.sql → products_catalog.sql → 이 파일
+--             → frequent_items_function.sql
+-- ================================================================
+
+-- 1. 롤업 테이블
+--    day: purchase_date의 UTC 날짜 (월별 통계 키와 동일 기준), 날짜 없는 영수증은 NULL
+-- ----------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS receipt_daily_rollup (
+    day             DATE,
+    store_name      TEXT    NOT NULL,
+    card_name       TEXT    NOT NULL,
+    total_amount    BIGINT  NOT NULL DEFAULT 0,
+    receipt_count   BIGINT  NOT NULL DEFAULT 0,
+    discount_amount BIGINT  NOT NULL DEFAULT 0,
+    CONSTRAINT uq_receipt_daily_rollup UNIQUE NULLS NOT DISTINCT (day, store_name, card_name)
+);
+
+-- 데이터 변경 세대 (단일 행, 6. 참고)
+CREATE TABLE IF NOT EXISTS stats_generation (
+    id    BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    value BIGINT  NOT NULL DEFAULT 0
+);
+INSERT INTO stats_generation DEFAULT VALUES ON CONFLICT DO NOTHING;
+
+-- 상품 롤업은 키가 상품명 → 상품 키로 바뀌었으므로 새로 만들고 아래 4.의 재구축으로 채운다
+-- name: 처음 집계된 상품명 (카탈로그에 없는 상품의 표시용)
+DROP TABLE IF EXISTS item_daily_rollup;
+CREATE TABLE item_daily_rollup (
+    day             DATE,
+    item_key        TEXT    NOT NULL,
+    product_id      BIGINT,
+    name            TEXT    NOT NULL,
+    purchase_count  BIGINT  NOT NULL DEFAULT 0,
+    total_amount    BIGINT  NOT NULL DEFAULT 0,
+    CONSTRAINT uq_item_daily_rollup UNIQUE NULLS NOT DISTINCT (day, item_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_item_daily_rollup_day ON item_daily_rollup(day, item_key);
+
+-- 2. 롤업 증감 헬퍼
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION _rollup_day(p_purchase_date TIMESTAMPTZ)
+RETURNS DATE
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT (p_purchase_date AT TIME ZONE 'UTC')::DATE;
+$$;
+
+CREATE OR REPLACE FUNCTION _rollup_receipt_add(
+    p_day DATE, p_store TEXT, p_card TEXT,
+    p_total BIGINT, p_count BIGINT, p_discount BIGINT
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO receipt_daily_rollup AS r (day, store_name, card_name, total_amount, receipt_count, discount_amount)
+    VALUES (p_day, COALESCE(NULLIF(p_store, ''), '기타'), COALESCE(NULLIF(p_card, ''), '기타'),
+            p_total, p_count, p_discount)
+    ON CONFLICT ON CONSTRAINT uq_receipt_daily_rollup DO UPDATE
+    SET total_amount    = r.total_amount    + EXCLUDED.total_amount,
+        receipt_count   = r.receipt_count   + EXCLUDED.receipt_count,
+        discount_amount = r.discount_amount + EXCLUDED.discount_amount;
+$$;
+
+CREATE OR REPLACE FUNCTION _rollup_item_key(p_product_id BIGINT, p_name TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT COALESCE('p:' || p_product_id, 'n:' || BTRIM(p_name));
+$$;
+
+DROP FUNCTION IF EXISTS _rollup_item_add(DATE, TEXT, BIGINT, BIGINT);
+
+CREATE OR REPLACE FUNCTION _rollup_item_add(
+    p_day DATE, p_product_id BIGINT, p_name TEXT, p_quantity BIGINT, p_amount BIGINT
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO item_daily_rollup AS r (day, item_key, product_id, name, purchase_count, total_amount)
+    SELECT p_day, _rollup_item_key(p_product_id, p_name), p_product_id, BTRIM(p_name), p_quantity, p_amount
+    WHERE COALESCE(BTRIM(p_name), '') <> ''
+    ON CONFLICT ON CONSTRAINT uq_item_daily_rollup DO UPDATE
+    SET purchase_count = r.purchase_count + EXCLUDED.purchase_count,
+        total_amount   = r.total_amount   + EXCLUDED.total_amount;
+$$;
+
+-- 영수증 한 장의 전체 기여분(영수증 + 상품 + 할인)을 p_sign(+1/-1)으로 반영
+CREATE OR REPLACE FUNCTION _rollup_receipt_apply(p_receipt receipts, p_sign INTEGER)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_day      DATE := _rollup_day(p_receipt.purchase_date);
+    v_discount BIGINT;
+BEGIN
+    SELECT COALESCE(SUM(amount), 0) INTO v_discount FROM discounts WHERE receipt_id = p_receipt.id;
+
+    PERFORM _rollup_receipt_add(v_day, p_receipt.store_name, p_receipt.card_name,
+                                p_sign * COALESCE(p_receipt.total_amount, 0), p_sign, p_sign * v_discount);
+
+    PERFORM _rollup_item_add(v_day, i.product_id, i.name, p_sign * COALESCE(i.quantity, 1), p_sign * COALESCE(i.amount, 0))
+    FROM items i
+    WHERE i.receipt_id = p_receipt.id;
+END;
+$$;
+
+-- 3. 트리거
+--    영수증 삭제 시 상품/할인은 CASCADE로 함께 지워지므로, 영수증 BEFORE DELETE에서
+--    전체 기여분을 빼고 상품/할인 트리거는 영수증이 이미 없으면 건너뛴다.
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION trg_receipts_rollup()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM _rollup_receipt_apply(NEW, 1);
+        RETURN NEW;
+    ELSIF TG_OP = 'UPDATE' THEN
+        IF (OLD.purchase_date, OLD.store_name, OLD.card_name, OLD.total_amount)
+           IS DISTINCT FROM (NEW.purchase_date, NEW.store_name, NEW.card_name, NEW.total_amount) THEN
+            PERFORM _rollup_receipt_apply(OLD, -1);
+            PERFORM _rollup_receipt_apply(NEW, 1);
+        END IF;
+        RETURN NEW;
+    ELSE
+        PERFORM _rollup_receipt_apply(OLD, -1);
+        RETURN OLD;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_items_rollup()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_receipt receipts;
+BEGIN
+    -- 번호 정리(cleanup_item_numbers) 등 집계와 무관한 UPDATE는 건너뜀
+    IF TG_OP = 'UPDATE'
+       AND (OLD.receipt_id, OLD.product_id, OLD.name, OLD.quantity, OLD.amount)
+           IS NOT DISTINCT FROM (NEW.receipt_id, NEW.product_id, NEW.name, NEW.quantity, NEW.amount) THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT * INTO v_receipt FROM receipts WHERE id = OLD.receipt_id;
+        IF FOUND THEN
+            PERFORM _rollup_item_add(_rollup_day(v_receipt.purchase_date), OLD.product_id, OLD.name,
+                                     -COALESCE(OLD.quantity, 1), -COALESCE(OLD.amount, 0));
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT * INTO v_receipt FROM receipts WHERE id = NEW.receipt_id;
+        IF FOUND THEN
+            PERFORM _rollup_item_add(_rollup_day(v_receipt.purchase_date), NEW.product_id, NEW.name,
+                                     COALESCE(NEW.quantity, 1), COALESCE(NEW.amount, 0));
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_discounts_rollup()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_receipt receipts;
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT * INTO v_receipt FROM receipts WHERE id = OLD.receipt_id;
+        IF FOUND THEN
+            PERFORM _rollup_receipt_add(_rollup_day(v_receipt.purchase_date), v_receipt.store_name,
+                                        v_receipt.card_name, 0, 0, -COALESCE(OLD.amount, 0));
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT * INTO v_receipt FROM receipts WHERE id = NEW.receipt_id;
+        IF FOUND THEN
+            PERFORM _rollup_receipt_add(_rollup_day(v_receipt.purchase_date), v_receipt.store_name,
+                                        v_receipt.card_name, 0, 0, COALESCE(NEW.amount, 0));
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS receipts_rollup_ins_upd ON receipts;
+CREATE TRIGGER receipts_rollup_ins_upd
+    AFTER INSERT OR UPDATE ON receipts
+    FOR EACH ROW EXECUTE FUNCTION trg_receipts_rollup();
+
+DROP TRIGGER IF EXISTS receipts_rollup_del ON receipts;
+CREATE TRIGGER receipts_rollup_del
+    BEFORE DELETE ON receipts
+    FOR EACH ROW EXECUTE FUNCTION trg_receipts_rollup();
+
+DROP TRIGGER IF EXISTS items_rollup ON items;
+CREATE TRIGGER items_rollup
+    AFTER INSERT OR UPDATE OR DELETE ON items
+    FOR EACH ROW EXECUTE FUNCTION trg_items_rollup();
+
+DROP TRIGGER IF EXISTS discounts_rollup ON discounts;
+CREATE TRIGGER discounts_rollup
+    AFTER INSERT OR UPDATE OR DELETE ON discounts
+    FOR EACH ROW EXECUTE FUNCTION trg_discounts_rollup();
+
+-- 4. 재구축 / 검증 (관리자 API: /api/admin/rollups/rebuild, /api/admin/rollups/verify)
+-- ----------------------------------------------------------------
+CREATE OR REPLACE VIEW stats_rollups_expected AS
+    SELECT 'receipt' AS kind,
+           _rollup_day(r.purchase_date) AS day,
+           COALESCE(NULLIF(r.store_name, ''), '기타') || ' / ' || COALESCE(NULLIF(r.card_name, ''), '기타') AS key,
+           SUM(COALESCE(r.total_amount, 0))::BIGINT AS total_amount,
+           COUNT(*)::BIGINT AS count,
+           COALESCE(SUM(d.discount_amount), 0)::BIGINT AS discount_amount
+    FROM receipts r
+    LEFT JOIN (SELECT receipt_id, SUM(amount) AS discount_amount FROM discounts GROUP BY receipt_id) d
+        ON d.receipt_id = r.id
+    GROUP BY 1, 2, 3
+    UNION ALL
+    SELECT 'item',
+           _rollup_day(r.purchase_date),
+           _rollup_item_key(i.product_id, i.name),
+           SUM(COALESCE(i.amount, 0))::BIGINT,
+           SUM(COALESCE(i.quantity, 1))::BIGINT,
+           0
+    FROM items i
+    JOIN receipts r ON r.id = i.receipt_id
+    WHERE COALESCE(BTRIM(i.name), '') <> ''
+    GROUP BY 1, 2, 3;
+
+CREATE OR REPLACE VIEW stats_rollups_actual AS
+    SELECT 'receipt' AS kind, day, store_name || ' / ' || card_name AS key,
+           total_amount, receipt_count AS count, discount_amount
+    FROM receipt_daily_rollup
+    WHERE receipt_count <> 0 OR total_amount <> 0 OR discount_amount <> 0
+    UNION ALL
+    SELECT 'item', day, item_key, total_amount, purchase_count, 0
+    FROM item_daily_rollup
+    WHERE purchase_count <> 0 OR total_amount <> 0;
+
+-- 롤업과 원본 재집계가 다른 행(drift)을 반환
+CREATE OR REPLACE FUNCTION verify_stats_rollups()
+RETURNS TABLE (kind TEXT, day DATE, key TEXT,
+               expected_total BIGINT, actual_total BIGINT,
+               expected_count BIGINT, actual_count BIGINT,
+               expected_discount BIGINT, actual_discount BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT COALESCE(e.kind, a.kind), COALESCE(e.day, a.day), COALESCE(e.key, a.key),
+           e.total_amount, a.total_amount,
+           e.count, a.count,
+           e.discount_amount, a.discount_amount
+    FROM stats_rollups_expected e
+    FULL OUTER JOIN stats_rollups_actual a
+        ON a.kind = e.kind AND a.day IS NOT DISTINCT FROM e.day AND a.key = e.key
+    WHERE (e.total_amount, e.count, e.discount_amount)
+          IS DISTINCT FROM (a.total_amount, a.count, a.discount_amount);
+$$;
+
+-- 롤업 전체 재계산 (원본 테이블 기준). 재계산된 (영수증 롤업 행 수, 상품 롤업 행 수) 반환
+CREATE OR REPLACE FUNCTION rebuild_stats_rollups()
+RETURNS TABLE (receipt_rows BIGINT, item_rows BIGINT)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    LOCK TABLE receipt_daily_rollup, item_daily_rollup IN EXCLUSIVE MODE;
+    DELETE FROM receipt_daily_rollup;
+    DELETE FROM item_daily_rollup;
+
+    INSERT INTO receipt_daily_rollup (day, store_name, card_name, total_amount, receipt_count, discount_amount)
+    SELECT _rollup_day(r.purchase_date),
+           COALESCE(NULLIF(r.store_name, ''), '기타'),
+           COALESCE(NULLIF(r.card_name, ''), '기타'),
+           SUM(COALESCE(r.total_amount, 0)),
+           COUNT(*),
+           COALESCE(SUM(d.discount_amount), 0)
+    FROM receipts r
+    LEFT JOIN (SELECT receipt_id, SUM(amount) AS discount_amount FROM discounts GROUP BY receipt_id) d
+        ON d.receipt_id = r.id
+    GROUP BY 1, 2, 3;
+
+    INSERT INTO item_daily_rollup (day, item_key, product_id, name, purchase_count, total_amount)
+    SELECT _rollup_day(r.purchase_date), _rollup_item_key(i.product_id, i.name),
+           MIN(i.product_id), MIN(BTRIM(i.name)),
+           SUM(COALESCE(i.quantity, 1)), SUM(COALESCE(i.amount, 0))
+    FROM items i
+    JOIN receipts r ON r.id = i.receipt_id
+    WHERE COALESCE(BTRIM(i.name), '') <> ''
+    GROUP BY 1, 2;
+
+    -- 원본 테이블은 그대로지만 drift가 고쳐지면 통계 응답이 달라지므로 세대를 직접 올린다
+    UPDATE stats_generation SET value = value + 1;
+
+    RETURN QUERY SELECT (SELECT COUNT(*) FROM receipt_daily_rollup), (SELECT COUNT(*) FROM item_daily_rollup);
+END;
+$$;
+
+SELECT * FROM rebuild_stats_rollups();
+
+-- 5. stats_* 함수를 롤업 조회 버전으로 교체 (시그니처 동일)
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION stats_summary(p_start TIMESTAMPTZ DEFAULT NULL, p_end TIMESTAMPTZ DEFAULT NULL)
+RETURNS TABLE (total_amount BIGINT, receipt_count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT COALESCE(SUM(r.total_amount), 0)::BIGINT, COALESCE(SUM(r.receipt_count), 0)::BIGINT
+    FROM receipt_daily_rollup r
+    WHERE (p_start IS NULL OR r.day >= _rollup_day(p_start))
+      AND (p_end   IS NULL OR r.day <  _rollup_day(p_end));
+$$;
+
+CREATE OR REPLACE FUNCTION stats_monthly(p_start TIMESTAMPTZ DEFAULT NULL, p_end TIMESTAMPTZ DEFAULT NULL)
+RETURNS TABLE (month TEXT, total_amount BIGINT, receipt_count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT TO_CHAR(r.day, 'YYYY.MM') AS month,
+           SUM(r.total_amount)::BIGINT,
+           SUM(r.receipt_count)::BIGINT
+    FROM receipt_daily_rollup r
+    WHERE r.day IS NOT NULL
+      AND (p_start IS NULL OR r.day >= _rollup_day(p_start))
+      AND (p_end   IS NULL OR r.day <  _rollup_day(p_end))
+    GROUP BY 1
+    HAVING SUM(r.receipt_count) > 0
+    ORDER BY 1;
+$$;
+
+CREATE OR REPLACE FUNCTION stats_by_store(p_start TIMESTAMPTZ DEFAULT NULL, p_end TIMESTAMPTZ DEFAULT NULL)
+RETURNS TABLE (store_name TEXT, total_amount BIGINT, visit_count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT r.store_name,
+           SUM(r.total_amount)::BIGINT AS total_amount,
+           SUM(r.receipt_count)::BIGINT
+    FROM receipt_daily_rollup r
+    WHERE (p_start IS NULL OR r.day >= _rollup_day(p_start))
+      AND (p_end   IS NULL OR r.day <  _rollup_day(p_end))
+    GROUP BY 1
+    HAVING SUM(r.receipt_count) > 0
+    ORDER BY total_amount DESC;
+$$;
+
+CREATE OR REPLACE FUNCTION stats_by_card(
+    p_start TIMESTAMPTZ DEFAULT NULL,
+    p_end   TIMESTAMPTZ DEFAULT NULL,
+    p_store TEXT        DEFAULT NULL
+)
+RETURNS TABLE (card_name TEXT, total_amount BIGINT, usage_count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT r.card_name,
+           SUM(r.total_amount)::BIGINT AS total_amount,
+           SUM(r.receipt_count)::BIGINT
+    FROM receipt_daily_rollup r
+    WHERE (p_start IS NULL OR r.day >= _rollup_day(p_start))
+      AND (p_end   IS NULL OR r.day <  _rollup_day(p_end))
+      AND (p_store IS NULL OR r.store_name = p_store)
+    GROUP BY 1
+    HAVING SUM(r.receipt_count) > 0
+    ORDER BY total_amount DESC;
+$$;
+
+-- 6. 데이터 변경 세대 (API 프로세스 간 통계 캐시 무효화)
+--    API 프로세스의 StatsCache는 자기 프로세스의 쓰기만 알 수 있으므로, 오프라인 임포터
+--    (tools/import_receipts.py)나 다른 uvicorn 워커의 쓰기는 이 카운터로 감지한다.
+--    원본 테이블이 바뀐 문장마다 1 증가 (문장 단위 트리거라 일괄 저장도 1회)하고,
+--    각 워커는 STATS_CACHE_CHECK_SECONDS마다 stats_data_generation()을 조회해 값이 바뀌었으면
+--    캐시를 비운다. 트랜잭션 안에서 갱신되므로 커밋 전의 변경으로 캐시가 비워지지는 않는다.
+--    단일 행이라 동시 쓰기 트랜잭션은 이 행에서 커밋 순서대로 줄을 서지만, 영수증 저장 빈도에서는
+--    문제되지 않는다. (stats_generation 테이블은 rebuild_stats_rollups가 쓰므로 1.에서 만든다)
+-- ----------------------------------------------------------------
+CREATE OR REPLACE FUNCTION _bump_stats_generation()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE stats_generation SET value = value + 1;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS receipts_stats_generation ON receipts;
+CREATE TRIGGER receipts_stats_generation
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON receipts
+    FOR EACH STATEMENT EXECUTE FUNCTION _bump_stats_generation();
+
+DROP TRIGGER IF EXISTS items_stats_generation ON items;
+CREATE TRIGGER items_stats_generation
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON items
+    FOR EACH STATEMENT EXECUTE FUNCTION _bump_stats_generation();
+
+DROP TRIGGER IF EXISTS discounts_stats_generation ON discounts;
+CREATE TRIGGER discounts_stats_generation
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON discounts
+    FOR EACH STATEMENT EXECUTE FUNCTION _bump_stats_generation();
+
+-- 상품명(display_name) 변경도 자주 구매한 상품 응답에 보이므로 함께 센다
+DROP TRIGGER IF EXISTS products_stats_generation ON products;
+CREATE TRIGGER products_stats_generation
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON products
+    FOR EACH STATEMENT EXECUTE FUNCTION _bump_stats_generation();
+
+CREATE OR REPLACE FUNCTION stats_data_generation()
+RETURNS BIGINT
+LANGUAGE sql STABLE
+AS $$
+    SELECT value FROM stats_generation;
+$$;
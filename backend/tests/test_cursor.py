@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""영수증 목록 keyset 커서 검증 테스트."""
+import base64
+import json
+
+import pytest
+
+from app.services.db_service import DatabaseService, InvalidCursorError
+
+
+def _encode(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii")
+
+
+def test_round_trip():
+    db = DatabaseService()
+    cursor = db._encode_cursor("2025-02-02T14:30:00+00:00", 42)
+    assert db._decode_cursor(cursor) == ("2025-02-02T14:30:00+00:00", 42)
+    assert db._decode_cursor(db._encode_cursor(None, 7)) == (None, 7)
+    assert db._decode_cursor(db._encode_cursor(0.25, 3), sort_type="rank") == (0.25, 3)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    _encode('2025-01-01",id.gt.0'),
+    _encode(['2025-01-01",id.gt.0', 1]),
+    _encode(["2025-01-01,purchase_date.not.is.null", 1]),
+    _encode(["2025-01-01", "1"]),
+    _encode(["2025-01-01", True]),
+    _encode([{"a": 1}, 1]),
+    _encode(["2025-01-01", 1, 2]),
+])
+def test_rejects_malformed_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        DatabaseService()._decode_cursor(cursor)
+
+
+def test_rank_cursor_requires_number():
+    with pytest.raises(InvalidCursorError):
+        DatabaseService()._decode_cursor(_encode(["0.5", 1]), sort_type="rank")
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""tools.import_receipts 테스트 (가짜 OCR/DB 서비스 사용)."""
+import asyncio
+import json
+
+from tools.import_receipts import Checkpoint, Importer
+
+_OK = {"success": True, "items": [{"name": "우유", "quantity": 1, "unitPrice": 1000, "totalPrice": 1000}]}
+
+
+class FakeOCR:
+    async def process_bytes(self, data: bytes) -> dict:
+        return {"success": False, "error": "인식 실패"} if data == b"bad" else dict(_OK)
+
+
+class FakeDB:
+    def __init__(self):
+        self.saved = []
+
+    async def save_receipts(self, results: list[dict]) -> dict:
+        ids = list(range(len(self.saved) + 1, len(self.saved) + len(results) + 1))
+        self.saved.extend(results)
+        return {"success": True, "receipt_ids": ids}
+
+
+def _statuses(checkpoint: Checkpoint) -> dict[str, str]:
+    return dict(checkpoint._db.execute("SELECT source, status FROM imported"))
+
+
+def _run(path, tmp_path, batch_size=10):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.db"))
+    db = FakeDB()
+    counts = asyncio.run(Importer(FakeOCR(), db, checkpoint, 2, batch_size).run(path))
+    return counts, db, checkpoint
+
+
+def test_malformed_ndjson_line_is_recorded_as_failed(tmp_path):
+    source = tmp_path / "receipts.ndjson"
+    source.write_text(
+        json.dumps(_OK) + "\n"
+        "{not json\n"
+        + json.dumps({"success": False, "error": "x"}) + "\n"
+        + json.dumps({"success": True}) + "\n",
+        encoding="utf-8",
+    )
+    counts, db, checkpoint = _run(source, tmp_path)
+
+    assert counts["saved"] == 1 and counts["failed"] == 3
+    assert len(db.saved) == 1
+    assert _statuses(checkpoint) == {
+        "receipts.ndjson:1": "saved",
+        "receipts.ndjson:2": "failed",
+        "receipts.ndjson:3": "failed",
+        "receipts.ndjson:4": "failed",
+    }
+
+
+def test_directory_with_bad_json_and_failed_image(tmp_path):
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "a.json").write_text(json.dumps(_OK), encoding="utf-8")
+    (tmp_path / "in" / "b.json").write_text("[1,", encoding="utf-8")
+    (tmp_path / "in" / "c.jpg").write_bytes(b"good")
+    (tmp_path / "in" / "d.jpg").write_bytes(b"bad")
+    (tmp_path / "in" / "e.heic").write_bytes(b"ignored")
+    counts, db, checkpoint = _run(tmp_path / "in", tmp_path)
+
+    assert counts["saved"] == 2 and counts["failed"] == 2
+    assert _statuses(checkpoint) == {"a.json": "saved", "b.json": "failed", "c.jpg": "saved", "d.jpg": "failed"}
+
+
+def test_pending_results_are_flushed_when_input_fails(tmp_path, monkeypatch):
+    from tools import import_receipts
+
+    def sources(path):
+        yield "ok", "json", json.dumps(_OK)
+        raise OSError("읽기 실패")
+
+    monkeypatch.setattr(import_receipts, "_sources", sources)
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.db"))
+    db = FakeDB()
+    importer = Importer(FakeOCR(), db, checkpoint, 1, 10)
+    try:
+        asyncio.run(importer.run(tmp_path))
+    except OSError:
+        pass
+    else:
+        raise AssertionError("OSError가 전파되어야 합니다")
+
+    assert len(db.saved) == 1
+    assert _statuses(checkpoint) == {"ok": "saved"}
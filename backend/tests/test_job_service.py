@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""OCRJobService callback_url 검사 테스트."""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services import job_service as job_module
+from app.services.job_service import InvalidCallbackURLError, OCRJobService, validate_callback_url
+
+
+@pytest.mark.parametrize("url", [
+    "http://8.8.8.8/hook",                      # https만 허용
+    "http://[::1",                              # httpx.InvalidURL
+    "https://127.0.0.1/hook",
+    "https://localhost:8000/hook",
+    "https://10.0.0.5/hook",
+    "https://192.168.0.10/hook",
+    "https://169.254.169.254/latest/meta-data",
+    "https://[::1]/hook",
+    "https://[::ffff:127.0.0.1]/hook",
+    "https://0.0.0.0/hook",
+])
+def test_rejects_internal_or_invalid_urls(url):
+    with pytest.raises(InvalidCallbackURLError):
+        asyncio.run(validate_callback_url(url))
+
+
+def test_accepts_public_https_address():
+    asyncio.run(validate_callback_url("https://8.8.8.8/hook"))
+
+
+def test_allow_list(monkeypatch):
+    monkeypatch.setattr(job_module, "OCR_CALLBACK_ALLOWED_HOSTS", {"hooks.example.com"})
+    asyncio.run(validate_callback_url("https://hooks.example.com/ocr"))
+    with pytest.raises(InvalidCallbackURLError):
+        asyncio.run(validate_callback_url("https://8.8.8.8/hook"))
+
+
+class _OCR:
+    async def process_bytes(self, image_data):
+        return {"success": True, "items": [], "error": None}
+
+
+def test_callback_failure_keeps_job_done(tmp_path):
+    """등록 후 저장된 callback_url이 잘못돼도(재시작 복구 등) 완료된 작업이 failed로 바뀌지 않음"""
+    service = OCRJobService(_OCR(), db_service=None, db_path=str(tmp_path / "jobs.db"))
+    service._insert("job", b"\x00", False, "http://[::1")
+
+    async def run():
+        await service._run("job")
+        return await service.get("job")
+
+    assert asyncio.run(run())["status"] == "done"
+    # 끝난 작업의 이미지 파일은 지움
+    assert not service._image_path("job").exists()
+
+
+def test_purge_removes_expired_jobs_and_orphan_images(tmp_path):
+    service = OCRJobService(_OCR(), db_service=None, db_path=str(tmp_path / "jobs.db"))
+    service._insert("old", b"\x00", False, None)
+    service._insert("queued", b"\x00", False, None)
+    service._finish("old", "done", "{}", None, None)
+    service._write("UPDATE ocr_jobs SET updated_at = ? WHERE id = 'old'", (time.time() - 100,))
+    (service._image_dir / "orphan").write_bytes(b"\x00")
+
+    assert service._purge(retention=50) == 1
+    assert [row[0] for row in service._read("SELECT id FROM ocr_jobs", ())] == ["queued"]
+    assert sorted(p.name for p in service._image_dir.iterdir()) == ["queued"]
+
+
+def test_submit_and_restart_recovery(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_module, "OCR_JOB_WORKERS", 1)
+    db_path = str(tmp_path / "jobs.db")
+
+    async def submit():
+        service = OCRJobService(_OCR(), db_service=None, db_path=db_path)
+        job_id = await service.submit(b"\x01")
+        await service.stop()
+        return job_id
+
+    async def recover(job_id):
+        service = OCRJobService(_OCR(), db_service=None, db_path=db_path)
+        await service.start()
+        await service._queue.join()
+        job = await service.get(job_id)
+        await service.stop()
+        return job
+
+    job_id = asyncio.run(submit())
+    assert asyncio.run(recover(job_id))["status"] == "done"
+
+
+def test_importing_main_does_not_create_job_db(tmp_path):
+    """작업 DB는 lifespan에서 열리므로 import만으로는 현재 디렉터리에 파일이 생기지 않음"""
+    backend = Path(__file__).resolve().parents[1]
+    subprocess.run([sys.executable, "-c", "import app.main"], cwd=tmp_path, check=True,
+                   env={**os.environ, "PYTHONPATH": str(backend), "OCR_JOBS_DB": "ocr_jobs.db"})
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""LocalDatabaseService / LocalStatsService(SQLite 백엔드) 테스트."""
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.services.local_db_service import LocalDatabaseService, LocalStatsService
+
+
+@pytest.fixture
+def db(tmp_path):
+    service = LocalDatabaseService(str(tmp_path / "receipts.db"))
+    for i, name in enumerate(["100% 오렌지주스", "1000 오렌지주스", "a_b 세제", "axb 세제"]):
+        result = asyncio.run(service.save_receipt({
+            "storeName": f"가게{i}",
+            "cardName": "신한카드",
+            "purchaseDateTime": f"2024-01-0{i + 1} 10:00",
+            "rawText": "",
+            "items": [{"no": "1", "name": name, "unitPrice": 1000, "quantity": 1, "amount": 1000}],
+        }))
+        assert result["success"], result
+    return service
+
+
+@pytest.mark.parametrize("search,expected", [
+    ("100%", 1),    # %가 와일드카드로 쓰이면 1000 오렌지주스도 걸림
+    ("a_b", 1),     # _가 와일드카드로 쓰이면 axb 세제도 걸림
+    ("세제", 2),
+])
+def test_search_treats_like_wildcards_literally(db, search, expected):
+    result = asyncio.run(db.get_receipts(search=search))
+    assert result["success"]
+    assert len(result["receipts"]) == expected
+
+
+def test_cleanup_iter_yields_error_event(db):
+    async def collect():
+        return [event async for event in db.cleanup_data_iter(100)]
+
+    events = asyncio.run(collect())
+    assert len(events) == 1
+    assert events[0]["phase"] == "error"
+
+
+def test_stats_service_uses_its_own_db_handle(db):
+    stats = LocalStatsService(db)
+    assert stats.db is db
+    dashboard = asyncio.run(stats.get_dashboard())
+    assert dashboard["success"], dashboard
+    assert dashboard["data"]["summary"]["receipt_count"] == 4
+
+
+def test_data_generation_changes_on_other_connection_commit(db, tmp_path):
+    before = asyncio.run(db.data_generation())
+    assert before == asyncio.run(db.data_generation())
+
+    # 임포터/다른 워커처럼 별도 연결에서 커밋
+    other = sqlite3.connect(str(tmp_path / "receipts.db"))
+    with other:
+        other.execute("UPDATE receipts SET store_name = '다른가게' WHERE id = 1")
+    other.close()
+
+    assert asyncio.run(db.data_generation()) != before
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""OCRCache 테스트 (메모리 LRU + SQLite 디스크 캐시)."""
+import asyncio
+import threading
+
+from app.services import ocr_cache as cache_module
+from app.services.ocr_cache import OCRCache
+
+_RESULT = {"success": True, "items": [{"name": "우유", "amount": 1000}]}
+
+
+def test_get_returns_copy():
+    cache = OCRCache("v1", db_path="")
+
+    async def run():
+        await cache.set("k", _RESULT)
+        first = await cache.get("k")
+        first["items"].append({"name": "변조"})
+        return await cache.get("k")
+
+    assert asyncio.run(run()) == _RESULT
+
+
+def test_set_stores_copy():
+    cache = OCRCache("v1", db_path="")
+    result = {"success": True, "items": []}
+
+    async def run():
+        await cache.set("k", result)
+        result["items"].append({"name": "변조"})
+        return await cache.get("k")
+
+    assert asyncio.run(run())["items"] == []
+
+
+def test_disk_tier_survives_restart_and_runs_off_loop(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "cache.db")
+    threads = []
+    disk_get = OCRCache._disk_get
+
+    def recording_disk_get(self, key, now):
+        threads.append(threading.current_thread().name)
+        return disk_get(self, key, now)
+
+    monkeypatch.setattr(OCRCache, "_disk_get", recording_disk_get)
+
+    asyncio.run(OCRCache("v1", db_path=db_path).set("k", _RESULT))
+    restarted = OCRCache("v1", db_path=db_path)
+    assert asyncio.run(restarted.get("k")) == _RESULT
+    assert restarted.stats()["disk_hits"] == 1
+    assert threads and all(name.startswith("ocr-cache") for name in threads)
+
+
+def test_set_sweeps_expired_disk_rows(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "cache.db")
+    cache = OCRCache("v1", ttl=60, db_path=db_path)
+    cache._db.execute("INSERT INTO ocr_cache (key, stored_at, result) VALUES ('old', 0, '{}')")
+    cache._db.commit()
+    monkeypatch.setattr(cache_module, "_SWEEP_INTERVAL", 0)
+
+    asyncio.run(cache.set("new", _RESULT))
+    keys = [key for (key,) in cache._db.execute("SELECT key FROM ocr_cache")]
+    assert keys == ["new"]
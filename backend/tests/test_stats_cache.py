@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""StatsCache 테스트."""
+import asyncio
+
+from app.services.stats_cache import StatsCache
+
+
+def test_zero_ttl_disables_cache():
+    cache = StatsCache(ttl=0)
+    key = cache.key("summary")
+    cache.set(key, {"success": True, "data": 1}, cache.generation)
+
+    assert cache.get(key) is None
+    assert cache.etag({"success": True, "data": 1})
+
+
+def test_etag_depends_only_on_content():
+    result = {"success": True, "data": {"summary": 1}, "timings_ms": {"summary": 3.2}}
+    other_worker = StatsCache()
+    other_worker.invalidate()
+
+    assert StatsCache().etag(result) == other_worker.etag({**result, "timings_ms": {"summary": 9.9}})
+    assert StatsCache().etag(result) != StatsCache().etag({**result, "data": {"summary": 2}})
+
+
+def test_sync_invalidates_when_db_generation_changes():
+    values = iter([1, 1, None, 2])
+
+    async def fetch():
+        return next(values)
+
+    cache = StatsCache(check_interval=0)
+    key = cache.key("summary")
+
+    async def run():
+        await cache.sync(fetch)  # 첫 관측: 기준값만 기록
+        cache.set(key, {"success": True}, cache.generation)
+        await cache.sync(fetch)  # 같은 값
+        assert cache.get(key) == {"success": True}
+        await cache.sync(fetch)  # 조회 실패는 무시
+        assert cache.get(key) == {"success": True}
+        await cache.sync(fetch)  # 다른 프로세스의 쓰기
+        assert cache.get(key) is None
+
+    asyncio.run(run())
+
+
+def test_sync_is_throttled_by_check_interval():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return 1
+
+    cache = StatsCache(check_interval=60)
+
+    async def run():
+        for _ in range(3):
+            await cache.sync(fetch)
+
+    asyncio.run(run())
+    assert len(calls) == 1
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""ReceiptStreamParser / OCRService.stream_bytes 테스트.
+
+기록해 둔 Gemini 응답을 임의 위치에서 잘라 청크로 넣어도
+한 번에 json.loads 한 결과와 같은지 확인한다. 실행: `cd backend && python -m pytest tests`
+"""
+import asyncio
+import json
+import random
+
+import pytest
+
+from app.services import ocr_service as ocr_module
+from app.services.ocr_service import OCRService
+from app.services.stream_parser import ReceiptStreamParser, StreamParseError
+
+# gemini-flash-latest 스트리밍 응답 (청크를 이어 붙인 원문)
+RECORDED_RESPONSES = [
+    '```json\n{\n  "storeName": "케이할인마트",\n  "cardName": "신한카드",\n  "items": [\n'
+    '    {\n      "no": "001",\n      "name": "서울우유 1L",\n      "barcode": "8801115114154",\n'
+    '      "unitPrice": 2980,\n      "quantity": 1,\n      "amount": 2980\n    },\n'
+    '    {\n      "no": "002",\n      "name": "씬피넛버터샌드 \\"대용량\\"",\n      "barcode": null,\n'
+    '      "unitPrice": 10000,\n      "quantity": 2,\n      "amount": 20000\n    }\n  ],\n'
+    '  "purchaseDateTime": "25-02-02 14:30",\n'
+    '  "rawText": "케이할인마트\\n001 서울우유 1L\\n8801115114154 2,980 1 2,980\\n합계 22,980"\n}\n```',
+    '{"storeName":"이마트","cardName":"현금","items":[],"purchaseDateTime":null,"rawText":""}',
+    '{\n  "storeName": null,\n  "cardName": "롯데카드",\n  "items": [{"no": "001", "name": "바나나", '
+    '"barcode": null, "unitPrice": 3990, "quantity": 1, "amount": 3990}],\n'
+    '  "purchaseDateTime": "24-12-31 23:59",\n  "rawText": "바나나 3,990"\n}',
+]
+
+# 점진 파서는 실패하지만 기존 _parse_text(```json 블록 추출)로는 읽히는 응답
+PROSE_WRAPPED = (
+    '영수증을 분석했습니다 {요약}.\n```json\n'
+    '{"storeName": "홈플러스", "cardName": "하나카드", "items": [{"no": "001", "name": "두부", '
+    '"barcode": null, "unitPrice": 1500, "quantity": 1, "amount": 1500}], '
+    '"purchaseDateTime": "25-01-05 10:00", "rawText": "두부 1,500"}\n```'
+)
+# 어느 방식으로도 읽을 수 없는 응답 (items 안에서 잘림)
+TRUNCATED = '{"storeName": "GS25", "cardName": "카카오페이", "items": [{"no": "001", "name": "콜라"'
+
+
+def _expected(text: str) -> dict:
+    return json.loads(text.strip().removeprefix("```json").removesuffix("```"))
+
+
+def _split(text: str, rng: random.Random) -> list[str]:
+    cuts = sorted(rng.sample(range(1, len(text)), rng.randint(1, min(40, len(text) - 1))))
+    return [text[a:b] for a, b in zip([0, *cuts], [*cuts, len(text)])]
+
+
+@pytest.mark.parametrize("text", RECORDED_RESPONSES)
+@pytest.mark.parametrize("seed", range(30))
+def test_feed_at_random_split_points(text, seed):
+    parser = ReceiptStreamParser()
+    events = []
+    for chunk in _split(text, random.Random(seed)):
+        events += parser.feed(chunk)
+
+    expected = _expected(text)
+    assert parser.done
+    assert parser.result == expected
+    assert [v for k, v in events if k == "item"] == expected["items"]
+    assert {k: v for k, v in events if k != "item"} == {k: v for k, v in expected.items() if k != "items"}
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_replay_restores_consumed_text(seed):
+    """StreamParseError 시점의 replay() + 남은 청크 = 원래 응답과 같은 값"""
+    parser = ReceiptStreamParser()
+    chunks = _split(PROSE_WRAPPED, random.Random(seed))
+    for i, chunk in enumerate(chunks):
+        try:
+            parser.feed(chunk)
+        except StreamParseError:
+            text = parser.replay() + "".join(chunks[i + 1:])
+            break
+    else:
+        pytest.fail("StreamParseError가 발생하지 않음")
+
+    assert OCRService()._parse_text(text) == OCRService()._parse_text(PROSE_WRAPPED)
+
+
+@pytest.mark.parametrize("text", RECORDED_RESPONSES)
+@pytest.mark.parametrize("seed", range(10))
+def test_replay_midstream_is_equivalent(text, seed):
+    """정상 응답 도중 어느 지점에서든 replay() + 나머지가 같은 JSON으로 파싱됨"""
+    chunks = _split(text, random.Random(seed))
+    for stop in range(len(chunks)):
+        parser = ReceiptStreamParser()
+        for chunk in chunks[:stop]:
+            parser.feed(chunk)
+        rest = "".join(chunks[stop:])
+        assert _expected(parser.replay() + rest) == _expected(text)
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class _RecordedModel:
+    """기록된 응답을 청크로 나눠 돌려주는 Gemini 모델 대역. stall_after번째 청크 다음에 멈춤"""
+
+    def __init__(self, chunks, stall_after=None):
+        self.chunks = chunks
+        self.stall_after = stall_after
+        self.calls = 0
+
+    async def generate_content_async(self, contents, stream=False):
+        self.calls += 1
+
+        async def iterate():
+            for i, chunk in enumerate(self.chunks):
+                if i == self.stall_after:
+                    await asyncio.sleep(10)
+                yield _Chunk(chunk)
+        return iterate()
+
+
+def _stream(service, image=b"receipt"):
+    async def collect():
+        return [event async for event in service.stream_bytes(image)]
+    return asyncio.run(collect())
+
+
+def _service(model) -> OCRService:
+    service = OCRService()
+    service.model = model
+    return service
+
+
+def test_stream_bytes_falls_back_to_parse_text():
+    service = _service(_RecordedModel(_split(PROSE_WRAPPED, random.Random(0))))
+    result = _stream(service)[-1]
+
+    assert result["event"] == "result"
+    assert result["value"] == service._parse_text(PROSE_WRAPPED)
+    assert result["value"]["success"]
+
+
+def test_stream_bytes_malformed_json_returns_parse_error():
+    service = _service(_RecordedModel(_split(TRUNCATED, random.Random(0))))
+    result = _stream(service)[-1]["value"]
+
+    assert not result["success"]
+    assert result["error"].startswith("JSON 파싱 오류")
+
+
+def test_cache_hit_emits_same_events_as_live_stream():
+    model = _RecordedModel(_split(RECORDED_RESPONSES[0], random.Random(0)))
+    service = _service(model)
+    live = _stream(service)
+    cached = _stream(service)
+
+    assert model.calls == 1
+    assert cached == live
+
+
+def test_stalled_stream_times_out(monkeypatch):
+    monkeypatch.setattr(ocr_module, "OCR_TIMEOUT_SECONDS", 0.05)
+    service = _service(_RecordedModel(_split(RECORDED_RESPONSES[0], random.Random(0)), stall_after=2))
+    result = _stream(service)[-1]["value"]
+
+    assert not result["success"]
+    assert "응답이 없습니다" in result["error"]
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""업로드 크기 제한 테스트 (Content-Length 없는 chunked 본문 포함)."""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+
+_BOUNDARY = "testboundary"
+
+
+def _multipart(field: str, files: list[bytes]) -> bytes:
+    body = b""
+    for i, data in enumerate(files):
+        body += (
+            f"--{_BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="r{i}.jpg"\r\n'
+            "Content-Type: image/jpeg\r\n\r\n"
+        ).encode() + data + b"\r\n"
+    return body + f"--{_BOUNDARY}--\r\n".encode()
+
+
+def _chunked(body: bytes, size: int = 1024):
+    """Content-Length 없이 전송되도록 제너레이터로 본문을 나눕니다."""
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 4096)
+    monkeypatch.setattr(main, "MAX_BATCH_IMAGES", 2)
+    return TestClient(main.app)
+
+
+def _call_asgi(body: bytes, path: str, content_type: str):
+    """Content-Length 없이 청크 단위로 본문을 보내고 (상태 코드, 보낸 바이트 수)를 반환합니다."""
+    chunks = list(_chunked(body))
+    state = {"sent": 0, "status": None}
+
+    async def receive():
+        if chunks:
+            chunk = chunks.pop(0)
+            state["sent"] += len(chunk)
+            return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            state["status"] = message["status"]
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"content-type", content_type.encode())],
+    }
+    asyncio.run(main.app(scope, receive, send))
+    return state["status"], state["sent"]
+
+
+@pytest.mark.parametrize("path,field", [("/api/ocr/upload", "image"), ("/api/ocr/batch", "images")])
+def test_chunked_multipart_over_limit_is_rejected_while_parsing(client, path, field):
+    body = _multipart(field, [b"x" * 64 * 1024])
+    status, sent = _call_asgi(body, path, f"multipart/form-data; boundary={_BOUNDARY}")
+    assert status == 413
+    # 한도를 넘은 직후 중단되어 나머지 본문은 읽지 않음
+    assert sent < len(body)
+
+
+def test_chunked_image_body_over_limit_is_rejected(client):
+    response = client.post(
+        "/api/ocr/upload", content=_chunked(b"x" * 8192),
+        headers={"Content-Type": "image/jpeg"},
+    )
+    assert response.status_code == 413
+
+
+def test_content_length_over_limit_is_rejected(client):
+    response = client.post(
+        "/api/ocr/upload", content=b"x" * 8192,
+        headers={"Content-Type": "image/jpeg"},
+    )
+    assert response.status_code == 413
+
+
+def test_chunked_batch_over_total_limit_is_rejected(client):
+    body = _multipart("images", [b"x" * 3000, b"x" * 3000, b"x" * 3000])
+    response = client.post(
+        "/api/ocr/batch", content=_chunked(body),
+        headers={"Content-Type": f"multipart/form-data; boundary={_BOUNDARY}"},
+    )
+    assert response.status_code == 413
+
+
+def test_batch_single_image_over_limit_is_rejected(client):
+    body = _multipart("images", [b"x" * 5000])
+    response = client.post(
+        "/api/ocr/batch", content=_chunked(body),
+        headers={"Content-Type": f"multipart/form-data; boundary={_BOUNDARY}"},
+    )
+    assert response.status_code == 413
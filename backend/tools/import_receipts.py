@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""과거 영수증 일괄 가져오기 (오프라인 백필).
+
+디렉터리(이미지 + OCR 결과 .json) 또는 NDJSON 파일(한 줄에 OCR 결과 하나)을 읽어
+- 이미지는 OCRService로 동시 최대 --concurrency건씩 인식하고
+- 내용 해시(이미지 바이트 / 정규화한 JSON의 SHA-256)로 중복을 건너뛰며
+- 성공한 결과를 --batch-size건씩 DatabaseService.save_receipts(save_receipts_bulk RPC)로 저장한다.
+진행 상황은 체크포인트 SQLite 파일에 해시별로 기록하므로, 중단 후 같은 명령을 다시 실행하면
+저장된 항목은 건너뛰고 실패/미처리 항목만 이어서 처리한다.
+실행: `cd backend && python -m tools.import_receipts <디렉터리 | 파일.ndjson> [--concurrency 4] [--batch-size 50]`
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from app.services.db_service import DatabaseService
+from app.services.storage import create_db_services
+from app.services.ocr_service import OCR_MAX_CONCURRENCY, OCRService
+
+# HEIC는 Pillow가 디코딩하지 못하므로 제외 (미리 JPEG로 변환해 가져올 것)
+_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+class Checkpoint:
+    """해시별 가져오기 상태 (saved | failed)"""
+
+    def __init__(self, path: str):
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS imported ("
+            " hash TEXT PRIMARY KEY,"
+            " source TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " receipt_id INTEGER,"
+            " error TEXT,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def saved(self) -> set[str]:
+        return {h for (h,) in self._db.execute("SELECT hash FROM imported WHERE status = 'saved'")}
+
+    def record(self, rows: list[tuple[str, str, str, int | None, str | None]]) -> None:
+        """rows: (hash, source, status, receipt_id, error)"""
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO imported (hash, source, status, receipt_id, error, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [(*row, now) for row in rows],
+        )
+        self._db.commit()
+
+
+def _json_hash(record: dict) -> str:
+    return hashlib.sha256(json.dumps(record, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _check_result(result) -> str | None:
+    """저장할 수 없는 OCR 결과면 실패 사유를 돌려줍니다."""
+    if not isinstance(result, dict):
+        return "OCR 결과가 객체가 아닙니다."
+    if not result.get("success"):
+        return result.get("error") or "인식 실패"
+    if not isinstance(result.get("items"), list):
+        return "items가 없습니다."
+    return None
+
+
+def _sources(path: Path):
+    """(출처 이름, 'image' | 'json', 이미지 경로 / .json 경로 / NDJSON 한 줄)을 차례로 돌려줍니다.
+    JSON 파싱은 워커에서 하므로 잘못된 줄이나 파일은 해당 항목만 실패로 기록됩니다.
+    """
+    if path.is_file():
+        with path.open(encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if line.strip():
+                    yield f"{path.name}:{line_no}", "json", line
+        return
+
+    for file in sorted(p for p in path.rglob("*") if p.is_file()):
+        suffix = file.suffix.lower()
+        if suffix in _IMAGE_EXTENSIONS:
+            yield str(file.relative_to(path)), "image", file
+        elif suffix == ".json":
+            yield str(file.relative_to(path)), "json", file
+
+
+class Importer:
+    def __init__(self, ocr_service: OCRService, db_service: DatabaseService, checkpoint: Checkpoint,
+                 concurrency: int, batch_size: int):
+        self.ocr_service = ocr_service
+        self.db_service = db_service
+        self.checkpoint = checkpoint
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+
+        self._done = checkpoint.saved()
+        self._seen: set[str] = set()
+        self._pending: list[tuple[str, str, dict]] = []   # (hash, source, OCR 결과)
+        self._flush_lock = asyncio.Lock()
+        self.counts = {"saved": 0, "skipped": 0, "duplicates": 0, "failed": 0}
+        self._started = time.perf_counter()
+
+    def _claim(self, digest: str) -> bool:
+        """이미 저장됐거나 이번 실행에서 이미 본 해시면 False"""
+        if digest in self._done:
+            self.counts["skipped"] += 1
+            return False
+        if digest in self._seen:
+            self.counts["duplicates"] += 1
+            return False
+        self._seen.add(digest)
+        return True
+
+    async def _read(self, kind: str, payload):
+        """image는 (해시, 바이트), json은 (해시, 결과)
+        JSON 파싱에 실패하면 결과 대신 ValueError를 원문 해시와 함께 돌려줍니다.
+        """
+        if kind == "image":
+            data = await asyncio.to_thread(payload.read_bytes)
+            return hashlib.sha256(data).hexdigest(), data
+        text = await asyncio.to_thread(payload.read_text, encoding="utf-8") if isinstance(payload, Path) else payload
+        try:
+            record = json.loads(text)
+        except ValueError as e:
+            return hashlib.sha256(text.encode("utf-8")).hexdigest(), e
+        return _json_hash(record), record
+
+    def _fail(self, digest: str | None, source: str, error: str) -> None:
+        self.counts["failed"] += 1
+        if digest:
+            self.checkpoint.record([(digest, source, "failed", None, error)])
+        print(f"[fail] {source}: {error}")
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            entry = await queue.get()
+            try:
+                if entry is None:
+                    return
+                source, kind, payload = entry
+                digest = None
+                digest, data = await self._read(kind, payload)
+                if isinstance(data, ValueError):
+                    self._fail(digest, source, f"JSON 파싱 실패: {data}")
+                    continue
+                if not self._claim(digest):
+                    continue
+
+                result = await self.ocr_service.process_bytes(data) if kind == "image" else data
+                error = _check_result(result)
+                if error:
+                    self._fail(digest, source, error)
+                    continue
+
+                self._pending.append((digest, source, result))
+                if len(self._pending) >= self.batch_size:
+                    await self._flush()
+            except Exception as e:
+                self._fail(digest, source, str(e))
+            finally:
+                queue.task_done()
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            if not batch:
+                return
+
+            saved = await self.db_service.save_receipts([result for _, _, result in batch])
+            if saved.get("success"):
+                ids = saved.get("receipt_ids", [])
+                self.checkpoint.record([
+                    (digest, source, "saved", receipt_id, None)
+                    for (digest, source, _), receipt_id in zip(batch, ids)
+                ])
+                self._done.update(digest for digest, _, _ in batch)
+                self.counts["saved"] += len(batch)
+            else:
+                # 배치 전체가 롤백되므로 모두 실패로 기록 (다음 실행에서 재시도)
+                self.checkpoint.record([(digest, source, "failed", None, saved.get("error"))
+                                        for digest, source, _ in batch])
+                self.counts["failed"] += len(batch)
+                print(f"[fail] 배치 {len(batch)}건 저장 실패: {saved.get('error')}")
+            self._report()
+
+    def _report(self) -> None:
+        elapsed = time.perf_counter() - self._started
+        c = self.counts
+        print(
+            f"저장 {c['saved']}건, 건너뜀 {c['skipped']}건, 중복 {c['duplicates']}건, 실패 {c['failed']}건"
+            f" — {elapsed:.1f}s, {c['saved'] / elapsed if elapsed else 0:.2f} receipts/s"
+        )
+
+    async def run(self, path: Path) -> dict:
+        # 대기열 크기를 제한해 이미지가 한꺼번에 메모리에 올라오지 않도록 함
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+
+        try:
+            try:
+                for entry in _sources(path):
+                    await queue.put(entry)
+            finally:
+                # 입력 읽기가 실패해도 이미 대기열에 넣은 항목은 끝까지 처리
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+        finally:
+            # 워커가 모아 둔 결과를 저장하고 체크포인트에 남김
+            while self._pending:
+                await self._flush()
+            self._report()
+        return self.counts
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", type=Path, help="이미지/.json 디렉터리 또는 OCR 결과 NDJSON 파일")
+    parser.add_argument("--concurrency", type=int, default=OCR_MAX_CONCURRENCY, help="동시 OCR 처리 수")
+    parser.add_argument("--batch-size", type=int, default=50, help="save_receipts_bulk 한 번에 저장할 건수")
+    parser.add_argument("--checkpoint", default="import_checkpoint.db", help="진행 상황 SQLite 파일")
+    args = parser.parse_args()
+
+    db_service, _ = create_db_services()
+    if not db_service.is_connected():
+        raise SystemExit("SUPABASE_URL / SUPABASE_KEY가 설정되지 않았습니다.")
+
+    importer = Importer(OCRService(), db_service, Checkpoint(args.checkpoint), args.concurrency, args.batch_size)
+    counts = await importer.run(args.source)
+    if counts["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
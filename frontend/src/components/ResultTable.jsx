@@ -78,7 +78,10 @@ export default function ResultTable({ data, onReset, onSave }) {
         purchaseDateTime: purchaseDateTime || null
       };
       console.log('저장할 데이터:', saveData);
-      await onSave(saveData);
+      const response = await onSave(saveData);
+      if (response?.duplicate) {
+        alert(response.message || '이미 저장된 영수증입니다.');
+      }
       setSaveStatus('saved');
     } catch (error) {
       console.error('저장 실패:', error.message);
@@ -3,7 +3,7 @@ import DatePicker from 'react-datepicker';
 import { ko } from 'date-fns/locale';
 import { format, subMonths, startOfMonth, endOfMonth, startOfYear } from 'date-fns';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
-import { getStats, getMonthlyStats, getStoreStats, getFrequentItems, getStoreCardStats } from '../services/api';
+import { getDashboardStats, getStoreCardStats } from '../services/api';
 import 'react-datepicker/dist/react-datepicker.css';
 import './Dashboard.css';
 
@@ -48,17 +48,13 @@ function Dashboard() {
         const start = formatDateParam(startDate);
         const end = formatDateParam(endDate);
 
-        const [summaryRes, monthlyRes, storeRes, itemsRes] = await Promise.all([
-          getStats(start, end, controller.signal),
-          getMonthlyStats(start, end, controller.signal),
-          getStoreStats(start, end, controller.signal),
-          getFrequentItems(start, end, 10, controller.signal),
-        ]);
+        // 패널 4개를 한 번의 요청으로 조회 (섹션별 실패는 null)
+        const { data } = await getDashboardStats(start, end, 10, controller.signal);
 
-        if (summaryRes.success) setSummary(summaryRes.data);
-        if (monthlyRes.success) setMonthlyData(monthlyRes.data);
-        if (storeRes.success) setStoreData(storeRes.data);
-        if (itemsRes.success) setFrequentItems(itemsRes.data);
+        if (data?.summary) setSummary(data.summary);
+        if (data?.monthly) setMonthlyData(data.monthly);
+        if (data?.by_store) setStoreData(data.by_store);
+        if (data?.frequent_items) setFrequentItems(data.frequent_items);
       } catch (err) {
         if (err.name !== 'AbortError') {
           console.error('Failed to fetch dashboard data:', err);
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import DatePicker from 'react-datepicker';
 import { ko } from 'date-fns/locale';
 import { format, startOfMonth, endOfMonth, subMonths, startOfYear } from 'date-fns';
@@ -35,6 +35,10 @@ const formatDateTime = (dateStr) => {
 function ReceiptList() {
   const [receipts, setReceipts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // 진행 중인 "더 보기" 요청: 필터가 바뀌면 취소해 이전 조건의 행/커서가 새 목록에 섞이지 않도록 함
+  const loadMoreController = useRef(null);
   const [selectedReceipt, setSelectedReceipt] = useState(null);
   const [detailData, setDetailData] = useState(null);
   const [detailLoading, setDetailLoading] = useState(false);
@@ -56,24 +60,30 @@ function ReceiptList() {
   const [stores, setStores] = useState([]);
   const [cards, setCards] = useState([]);
 
+  const buildParams = () => {
+    const params = { limit: 100 };
+    if (startDate) params.start_date = format(startDate, 'yy-MM-dd');
+    if (endDate) params.end_date = format(endDate, 'yy-MM-dd');
+    if (storeFilter) params.store_name = storeFilter;
+    if (cardFilter) params.card_name = cardFilter;
+    if (debouncedSearch) params.search = debouncedSearch;
+    return params;
+  };
+
   // AbortController로 이전 요청 취소 → 빠른 필터 변경 시 오래된 응답이 표시되지 않음
   useEffect(() => {
     const controller = new AbortController();
+    loadMoreController.current?.abort();
+    setLoadingMore(false);
 
     const load = async () => {
       setLoading(true);
       try {
-        const params = { limit: 100 };
-        if (startDate) params.start_date = format(startDate, 'yy-MM-dd');
-        if (endDate) params.end_date = format(endDate, 'yy-MM-dd');
-        if (storeFilter) params.store_name = storeFilter;
-        if (cardFilter) params.card_name = cardFilter;
-        if (debouncedSearch) params.search = debouncedSearch;
-
-        const response = await getReceipts(params, controller.signal);
+        const response = await getReceipts(buildParams(), controller.signal);
         if (response.success) {
           const receiptList = response.receipts || [];
           setReceipts(receiptList);
+          setNextCursor(response.next_cursor || null);
 
           // Extract unique stores and cards for filters
           const uniqueStores = [...new Set(receiptList.map(r => r.store_name).filter(Boolean))];
@@ -91,9 +101,33 @@ function ReceiptList() {
     };
 
     load();
-    return () => controller.abort();
+    return () => {
+      controller.abort();
+      loadMoreController.current?.abort();
+    };
   }, [startDate, endDate, storeFilter, cardFilter, debouncedSearch]);
 
+  // 다음 페이지: next_cursor 이후 영수증을 이어 붙임
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    const controller = new AbortController();
+    loadMoreController.current = controller;
+    setLoadingMore(true);
+    try {
+      const response = await getReceipts({ ...buildParams(), cursor: nextCursor }, controller.signal);
+      if (response.success && !controller.signal.aborted) {
+        setReceipts((prev) => [...prev, ...(response.receipts || [])]);
+        setNextCursor(response.next_cursor || null);
+      }
+    } catch (err) {
+      if (err.name !== 'AbortError') {
+        console.error('Failed to fetch more receipts:', err);
+      }
+    } finally {
+      if (!controller.signal.aborted) setLoadingMore(false);
+    }
+  };
+
   const handleReceiptClick = async (receipt) => {
     setSelectedReceipt(receipt);
     setDetailLoading(true);
@@ -272,6 +306,16 @@ function ReceiptList() {
                 </div>
               );
             })}
+            {nextCursor && (
+              <button
+                type="button"
+                className="load-more-btn"
+                onClick={loadMore}
+                disabled={loadingMore}
+              >
+                {loadingMore ? '로딩 중...' : '더 보기'}
+              </button>
+            )}
           </div>
         )}
       </div>
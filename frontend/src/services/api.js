@@ -2,12 +2,14 @@
 const API_BASE_URL = import.meta.env.VITE_API_URL ?? '';
 
 export async function analyzeReceipt(imageData) {
-  const response = await fetch(`${API_BASE_URL}/api/ocr`, {
+  // data URL → Blob 변환 후 multipart 업로드 (base64 JSON 대비 전송량 감소)
+  const blob = await (await fetch(imageData)).blob();
+  const formData = new FormData();
+  formData.append('image', blob, 'receipt.jpg');
+
+  const response = await fetch(`${API_BASE_URL}/api/ocr/upload`, {
     method: 'POST',
-    headers: {
-      'Content-Type': 'application/json',
-    },
-    body: JSON.stringify({ image: imageData }),
+    body: formData,
   });
 
   if (!response.ok) {
@@ -17,6 +19,38 @@ export async function analyzeReceipt(imageData) {
   return response.json();
 }
 
+// 여러 장 일괄 분석: 결과가 끝나는 순서대로 onResult(result) 호출 (NDJSON 스트림)
+export async function analyzeReceiptBatch(images, onResult) {
+  const formData = new FormData();
+  for (const [index, imageData] of images.entries()) {
+    const blob = await (await fetch(imageData)).blob();
+    formData.append('images', blob, `receipt-${index}.jpg`);
+  }
+
+  const response = await fetch(`${API_BASE_URL}/api/ocr/batch`, {
+    method: 'POST',
+    body: formData,
+  });
+
+  if (!response.ok) {
+    throw new Error(`API 오류: ${response.status}`);
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    for (const line of lines) {
+      if (line.trim()) onResult(JSON.parse(line));
+    }
+  }
+  if (buffer.trim()) onResult(JSON.parse(buffer));
+}
+
 export async function checkHealth() {
   const response = await fetch(`${API_BASE_URL}/health`);
   return response.json();
@@ -53,6 +87,7 @@ export async function getReceipts(params = {}, signal) {
     if (params.store_name) searchParams.append('store_name', params.store_name);
     if (params.card_name) searchParams.append('card_name', params.card_name);
     if (params.search) searchParams.append('search', params.search);
+    if (params.cursor) searchParams.append('cursor', params.cursor);
   }
 
   const queryString = searchParams.toString();
@@ -120,6 +155,17 @@ export async function getFrequentItems(startDate, endDate, limit = 10, signal) {
   return response.json();
 }
 
+// 대시보드 전체 패널을 한 번에 조회
+export async function getDashboardStats(startDate, endDate, limit = 10, signal) {
+  const params = new URLSearchParams();
+  if (startDate) params.append('start_date', startDate);
+  if (endDate) params.append('end_date', endDate);
+  params.append('limit', limit);
+
+  const response = await fetch(`${API_BASE_URL}/api/stats/dashboard?${params.toString()}`, { signal });
+  return response.json();
+}
+
 export async function getStoreCardStats(storeName, startDate, endDate) {
   const params = new URLSearchParams();
   if (startDate) params.append('start_date', startDate);